@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.core.config import settings
+from app.core.memory import process_memory, to_mb
+from app.core.metrics import refresh_worker_memory
+from app.core.security import require_admin
+from app.core.startup import startup_state
+
+router = APIRouter()
+
+def _serving():
+    if startup_state.inference_service is None:
+        raise HTTPException(status_code=503, detail="Models are still loading.")
+    return startup_state.inference_service, startup_state.model_registry
+
+@router.get("/stats/inference")
+async def inference_stats():
+    """Micro-batching stats (batch sizes, queue wait) for tuning the throughput/latency tradeoff."""
+    inference_service, model_registry = _serving()
+    from app.db.redis_client import redis_client
+    from app.db.write_behind import vector_write_behind
+    from app.services.backpressure import inflight_limiter
+    from app.services.cohort_centroids import cohort_centroids
+    refresh_worker_memory()
+    return {
+        "worker": {
+            "workers": settings.SERVING_WORKERS,
+            "shared_weights": inference_service.models.shared_weights,
+            "memory_mb": to_mb(process_memory())
+        },
+        "saint_batching": inference_service.batch_stats(),
+        "saint_sessions": inference_service.session_stats(),
+        "saint_window": inference_service.models.window.stats(),
+        "gateway": inflight_limiter.stats(),
+        "trend_store": inference_service.trend_store.stats(),
+        "redis_writes": redis_client.write_stats(),
+        "cohort_centroids": cohort_centroids.stats(),
+        "postgres_write_behind": vector_write_behind.stats(),
+        "models": model_registry.stats()
+    }
+
+@router.post("/models/reload", dependencies=[Depends(require_admin)])
+async def reload_models(force: bool = False):
+    """
+    Checks model storage for a new version and hot-swaps it in (no restart, sockets stay open).
+    Admin only (X-Admin-Token); refused while a check, load or drain is already running.
+    """
+    _, model_registry = _serving()
+    if model_registry.busy:
+        raise HTTPException(status_code=409, detail="A model reload is already in progress.")
+    version = await model_registry.check_for_update(force=force)
+    return {"version": version, **model_registry.stats()}
@@ -1,5 +1,10 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from app.services.inference_service import inference_service
+import asyncio
+import time
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from app.core import metrics
+from app.core.config import settings
+from app.core.startup import startup_state
+from app.services.backpressure import ConnectionInbox, inflight_limiter
 
 router = APIRouter()
 
@@ -7,25 +12,96 @@ router = APIRouter()
 async def websocket_endpoint(websocket: WebSocket, student_id: str):
     # 1. AUTHENTICATION (Crucial for thousands of users)
     # Check if student_id is valid before accepting
-    await websocket.accept()
+
+    # Models/Redis still warming up (non-blocking startup): ask the client to retry
+    if not startup_state.is_ready:
+        await websocket.accept()
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+    inference_service = startup_state.inference_service
+    # Imported here so importing the router doesn't pull in the DB / model stack (cached after startup)
+    from app.db.redis_client import redis_client
+    from app.services.telemetry_codec import TelemetryDecodeError, negotiate
+
+    # Wire protocol for this connection: JSON, MessagePack or fixed-layout binary frames
+    try:
+        codec, subprotocol = negotiate(websocket, settings.WS_PROTOCOLS)
+    except TelemetryDecodeError as e:
+        await websocket.accept()
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason=str(e)[:120])
+        return
+    await websocket.accept(subprotocol=subprotocol)
+
+    # Every connection starts a fresh SAINT session (see InferenceService.end_session)
+    inference_service.end_session(student_id)
+
+    # Warm start: cohort centroid now, stored profile (if any) in the background
+    grade = websocket.query_params.get("grade")
+    await redis_client.hydrate_student_session(
+        student_id,
+        grade=int(grade) if grade and grade.isdigit() else None,
+        curriculum=websocket.query_params.get("curriculum")
+    )
+    metrics.SOCKET_CONNECTIONS.inc()
+    metrics.ACTIVE_SOCKETS.inc()
+    send_seconds = metrics.STAGE_SECONDS.labels("send")
+    superseded = metrics.PACKETS_SUPERSEDED.labels(settings.WS_COALESCE_POLICY)
+
+    # 2. RECEIVE packets (decoded into column arrays) into a bounded inbox, read ahead while the
+    # previous packet is served (a reconnecting client's offline buffer is coalesced instead of
+    # inferred packet by packet)
+    inbox = ConnectionInbox(settings.WS_INBOX_SIZE, settings.WS_COALESCE_POLICY)
+    reader = asyncio.create_task(inbox.fill(lambda: codec.receive(websocket)))
+    inferred = False
     
     try:
         while True:
-            # 2. RECEIVE JSON
-            data = await websocket.receive_json()
+            data, packets = await inbox.next_packet()
+            if data is None:
+                break
+            received = time.perf_counter()
+            if isinstance(data, ValueError):  # TelemetryDecodeError: answer it, keep the socket
+                await codec.send(websocket, {"status": "error", "detail": str(data)})
+                continue
+            if packets > 1:
+                superseded.inc(packets - 1)
+
+            # Global load shedding: past the in-flight cap, answer right away instead of queueing
+            if not inflight_limiter.try_acquire():
+                metrics.BUSY_RESPONSES.inc()
+                await codec.send(websocket, {"status": "busy", "retry_after_ms": settings.WS_BUSY_RETRY_MS, "packets": packets})
+                continue
             
             # 3. FAST INFERENCE
             # Ensure this is non-blocking so other users aren't delayed
-            response = await inference_service.get_detailed_trace(
-                student_id, 
-                [e['context_id'] for e in data['telemetry_batch']],
-                [e['behavior_id'] for e in data['telemetry_batch']],
-                data['telemetry_batch']
-            )
+            try:
+                context_seq, behavior_seq = data.sequences()
+                response = await inference_service.get_detailed_trace(
+                    student_id, context_seq, behavior_seq, None, telemetry_stats=data.stats()
+                )
+                inferred = True
+            finally:
+                inflight_limiter.release()
+            if packets > 1:
+                response["packets"] = packets
             
             # 4. SEND RESPONSE
-            await websocket.send_json(response)
-            
+            sending = time.perf_counter()
+            await codec.send(websocket, response)
+            sent = time.perf_counter()
+            send_seconds.observe(sent - sending)
+            metrics.REQUEST_SECONDS.observe(sent - received)
     except WebSocketDisconnect:
-        # 5. CLEANUP
-        print(f"🔌 Student {student_id} disconnected.")
\ No newline at end of file
+        pass  # Closed mid-send: same cleanup as a close seen by the reader
+    finally:
+        reader.cancel()
+        metrics.ACTIVE_SOCKETS.dec()
+
+        # 5. CLEANUP (also when the loop or the reader failed: the error is re-raised afterwards)
+        inference_service.end_session(student_id)
+        # Dehydrate: the vector goes to the write-behind queue for the next bulk upsert
+        await redis_client.persist_student_vector(student_id, updated=inferred)
+        print(f"🔌 Student {student_id} disconnected.")
+
+    if inbox.error is not None and not isinstance(inbox.error, WebSocketDisconnect):
+        raise inbox.error
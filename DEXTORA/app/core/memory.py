@@ -0,0 +1,35 @@
+import os
+import resource
+
+def process_memory(pid: int = None) -> dict:
+    """
+    Memory of one process in bytes. On Linux (/proc/<pid>/smaps_rollup):
+      - rss:     resident pages, shared ones counted in full
+      - pss:     shared pages split evenly across the processes mapping them (sums to the host total)
+      - uss:     pages only this process maps (what another worker would add)
+      - shared:  resident pages shared with other processes (e.g. memory-mapped model weights)
+    Elsewhere only the peak RSS of the current process is available.
+    """
+    pid = pid or os.getpid()
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    except OSError:
+        # ru_maxrss is KB on Linux, bytes on macOS
+        scale = 1 if os.uname().sysname == "Darwin" else 1024
+        return {"pid": pid, "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale}
+
+    return {
+        "pid": pid,
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+    }
+
+def to_mb(memory: dict) -> dict:
+    return {key: (round(value / 2**20, 1) if key != "pid" else value) for key, value in memory.items()}
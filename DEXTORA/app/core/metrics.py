@@ -0,0 +1,73 @@
+"""
+Prometheus metrics for the serving hot path (scraped from GET /metrics).
+
+Pipeline stages (tensor_build, saint, decode, policy) are observed once per forward pass, so
+with micro-batching one observation covers the whole batch; the per-message stages
+(queue_wait, trends, redis, send) are observed once per packet.
+
+With several uvicorn workers (SERVING_WORKERS > 1), set PROMETHEUS_MULTIPROC_DIR to an empty
+directory shared by the workers so any of them can answer a scrape for all (the Dockerfile does).
+"""
+import os
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from app.core.memory import process_memory
+
+# 50us .. 2.5s: the fast stages sit in the sub-millisecond buckets
+STAGE_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+
+STAGE_SECONDS = Histogram(
+    "dextora_stage_seconds", "Time spent in each serving stage", ["stage"], buckets=STAGE_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    "dextora_request_seconds", "Packet received -> response sent, per WebSocket message", buckets=STAGE_BUCKETS
+)
+BATCH_SIZE = Histogram(
+    "dextora_saint_batch_size", "Requests per micro-batched forward pass", buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+ACTIONS = Counter("dextora_rl_actions_total", "RL policy decisions", ["action"])
+PACKETS_SUPERSEDED = Counter(
+    "dextora_ws_packets_superseded_total", "Packets merged into or replaced by a later one in the inbox", ["policy"]
+)
+BUSY_RESPONSES = Counter("dextora_ws_busy_total", "Packets shed with a 'busy' response (in-flight limit)")
+PACKETS_RECEIVED = Counter("dextora_ws_packets_total", "Packets received, by wire protocol", ["protocol"])
+DECODE_ERRORS = Counter("dextora_ws_decode_errors_total", "Packets rejected by the decoder, by wire protocol", ["protocol"])
+ACTIVE_SOCKETS = Gauge("dextora_active_sockets", "Open student WebSocket connections", multiprocess_mode="livesum")
+WORKER_MEMORY = Gauge(
+    "dextora_worker_memory_bytes", "Serving worker memory (see app/core/memory.py)", ["kind"], multiprocess_mode="liveall"
+)
+SOCKET_CONNECTIONS = Counter("dextora_socket_connections_total", "Accepted student WebSocket connections")
+CENTROID_REFRESH_SECONDS = Histogram(
+    "dextora_cohort_centroid_refresh_seconds", "Cohort centroid table refresh (Postgres aggregate + rebuild)",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+CENTROID_REFRESH_FAILURES = Counter(
+    "dextora_cohort_centroid_refresh_failures_total", "Cohort centroid refreshes that failed (previous table kept)"
+)
+CENTROID_COHORTS = Gauge(
+    "dextora_cohort_centroids", "Cohorts in the warm-start centroid table", multiprocess_mode="livemax"
+)
+
+# Pipeline stages timed inside run_pipeline (possibly in a worker process)
+PIPELINE_STAGES = ("tensor_build", "saint", "decode", "policy")
+
+def observe_stages(timings: dict):
+    """Records a {stage: seconds} mapping."""
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.labels(stage).observe(seconds)
+
+def refresh_worker_memory():
+    """Updates this worker's memory gauges (other workers refresh theirs when they serve a scrape or stats call)."""
+    for kind, value in process_memory().items():
+        if kind != "pid":
+            WORKER_MEMORY.labels(kind).set(value)
+
+def render():
+    """(body, content_type) for the /metrics endpoint."""
+    refresh_worker_memory()
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,53 +1,281 @@
+import base64
+import contextlib
+import hashlib
+import json
 import os
-from google.cloud import storage
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from app.core.config import settings
 
-def download_models_from_gcs():
+try:
+    import fcntl
+except ImportError:  # Not on Windows: syncs there are not serialized across processes
+    fcntl = None
+
+# Map remote artifact name -> Local Destination
+MODEL_ARTIFACTS = {
+    "saint_weights.pt": "app/ml_assets/saint_weights.pt",
+    "ppo_student_policy.zip": "app/ml_assets/ppo_student_policy.zip"
+}
+
+@dataclass(frozen=True)
+class ArtifactInfo:
+    """Remote identity of one artifact: the object generation plus its content hash."""
+    name: str
+    generation: str
+    md5: str  # Hex digest
+    size: int
+
+def file_md5(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def artifact_version(paths: list) -> str:
+    """Short content hash over local model artifacts; identifies the model version being served."""
+    digest = hashlib.md5()
+    for path in paths:
+        digest.update(file_md5(path).encode())
+    return digest.hexdigest()[:12]
+
+# --- Storage Backends ---
+
+class StorageBackend:
+    """Where model artifacts come from. `stat` is cheap metadata; `download` fetches the bytes."""
+    def stat(self, name: str) -> ArtifactInfo | None:
+        raise NotImplementedError
+
+    def download(self, info: ArtifactInfo, dest_path: str):
+        raise NotImplementedError
+
+class GCSBackend(StorageBackend):
+    def __init__(self, bucket_name: str, prefix: str = ""):
+        from google.cloud import storage
+
+        # Picks up credentials from Environment automatically
+        self.bucket = storage.Client().bucket(bucket_name)
+        self.prefix = prefix.strip("/")
+
+    def _blob_name(self, name: str) -> str:
+        # Handle prefix if models are in a subfolder in the bucket
+        return f"{self.prefix}/{name}" if self.prefix else name
+
+    def stat(self, name: str) -> ArtifactInfo | None:
+        blob = self.bucket.get_blob(self._blob_name(name))
+        if blob is None:
+            return None
+        # GCS reports MD5 as base64; composite objects have none (only CRC32C)
+        md5 = base64.b64decode(blob.md5_hash).hex() if blob.md5_hash else ""
+        return ArtifactInfo(name, str(blob.generation), md5, int(blob.size or 0))
+
+    def download(self, info: ArtifactInfo, dest_path: str):
+        # Pin the generation we stat'ed so a concurrent upload can't give us mixed bytes
+        blob = self.bucket.blob(self._blob_name(info.name), generation=int(info.generation))
+        blob.download_to_filename(dest_path)
+
+class LocalDirBackend(StorageBackend):
+    """A directory standing in for the bucket (tests, local development, baked images)."""
+    def __init__(self, root: str):
+        self.root = root
+
+    def stat(self, name: str) -> ArtifactInfo | None:
+        path = os.path.join(self.root, name)
+        if not os.path.isfile(path):
+            return None
+        st = os.stat(path)
+        return ArtifactInfo(name, str(st.st_mtime_ns), file_md5(path), st.st_size)
+
+    def download(self, info: ArtifactInfo, dest_path: str):
+        shutil.copyfile(os.path.join(self.root, info.name), dest_path)
+
+# --- Content-Addressed Cache ---
+
+class ModelCache:
     """
-    Downloads model artifacts from GCS bucket to local path on startup.
-    This ensures ephemeral containers always have the latest 'global brain'.
+    Keeps local model artifacts in sync with a storage backend.
+
+    Downloads land in `cache_dir` under their MD5 (content-addressed), are verified, then
+    hard-linked into place with an atomic rename, so loaders never see a partial file.
+    A manifest records what is installed at each destination; artifacts whose remote
+    generation/MD5 still match it are skipped, and a blob already in the cache (e.g. a
+    rollback to an earlier version) is installed without downloading.
+    Syncs hold an exclusive file lock on the cache, so when several serving workers start
+    (or poll) together one of them downloads and the others find the manifest up to date.
     """
-    bucket_name = settings.GCS_BUCKET_NAME
-    if not bucket_name:
-        print("⚠️ GCS_BUCKET_NAME not set. Skipping GCS download (assuming local development).")
-        return
+    def __init__(self, backend: StorageBackend, cache_dir: str, max_workers: int = 4):
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, "manifest.json")
+        self.max_workers = max(1, max_workers)
+
+    def _load_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_manifest(self, manifest: dict):
+        _atomic_write(self.manifest_path, json.dumps(manifest, indent=2).encode())
 
-    print(f"⬇️ Downloading models from GCS Bucket: {bucket_name}...")
-    
-    # 1. Initialize Client (Picks up credentials from Environment automatically)
+    @staticmethod
+    def _is_current(entry: dict | None, info: ArtifactInfo, local_path: str) -> bool:
+        if not entry or entry["generation"] != info.generation or (info.md5 and entry["md5"] != info.md5):
+            return False
+        # Cheap check that nobody replaced the installed file behind our back
+        try:
+            st = os.stat(local_path)
+        except FileNotFoundError:
+            return False
+        return st.st_size == entry["size"] and st.st_mtime_ns == entry["mtime_ns"]
+
+    def _blob_path(self, info: ArtifactInfo) -> str:
+        return os.path.join(self.cache_dir, f"{info.md5 or info.generation}_{info.name}")
+
+    def _fetch(self, name: str, local_path: str, entry: dict | None):
+        """Syncs one artifact. Returns (status, seconds, manifest entry or None)."""
+        started = time.perf_counter()
+        info = self.backend.stat(name)
+        if info is None:
+            return "missing", time.perf_counter() - started, entry
+        if self._is_current(entry, info, local_path):
+            return "unchanged", time.perf_counter() - started, entry
+
+        blob_path = self._blob_path(info)
+        status = "cached"
+        if not (os.path.exists(blob_path) and (not info.md5 or file_md5(blob_path) == info.md5)):
+            status = "downloaded"
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f".{name}.", suffix=".part")
+            os.close(fd)
+            try:
+                self.backend.download(info, tmp_path)
+                md5 = file_md5(tmp_path)
+                if info.md5 and md5 != info.md5:
+                    raise IOError(f"Checksum mismatch for {name}: expected {info.md5}, got {md5}")
+                os.replace(tmp_path, blob_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        _install(blob_path, local_path)
+        st = os.stat(local_path)
+        new_entry = {
+            "generation": info.generation,
+            "md5": info.md5 or file_md5(local_path),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns
+        }
+        return status, time.perf_counter() - started, new_entry
+
+    def sync(self, artifacts: dict) -> dict:
+        """
+        Brings every `remote name -> local path` artifact up to date, concurrently.
+        Returns {name: {"status", "seconds"}}; failed artifacts keep their old local file.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with self._locked():
+            return self._sync(artifacts)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.cache_dir, ".sync.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _sync(self, artifacts: dict) -> dict:
+        manifest = self._load_manifest()
+        results = {}
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(artifacts)) or 1) as pool:
+            futures = {
+                name: pool.submit(self._fetch, name, local_path, manifest.get(local_path))
+                for name, local_path in artifacts.items()
+            }
+            for name, future in futures.items():
+                local_path = artifacts[name]
+                try:
+                    status, seconds, entry = future.result()
+                except Exception as e:
+                    print(f"     ❌ Error syncing {name}: {e}")
+                    results[name] = {"status": "error", "seconds": None}
+                    continue
+                if entry is not None:
+                    manifest[local_path] = entry
+                results[name] = {"status": status, "seconds": round(seconds, 3)}
+                print(f"   - {name} -> {local_path}: {status} ({seconds * 1000:.0f} ms)")
+
+        self._save_manifest(manifest)
+        return results
+
+def _atomic_write(path: str, data: bytes):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _install(blob_path: str, local_path: str):
+    """Atomically points `local_path` at a cached blob (hard link, or a copy across filesystems)."""
+    os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+    tmp_path = f"{local_path}.{os.getpid()}.tmp"
     try:
-        storage_client = storage.Client()
-        bucket = storage_client.bucket(bucket_name)
-    except Exception as e:
-        print(f"❌ Failed to connect to GCS: {e}")
-        return
-
-    # 2. Define artifacts to fetch
-    # Map GCS Filename -> Local Destination
-    artifacts = {
-        "saint_weights.pt": "app/ml_assets/saint_weights.pt",
-        "ppo_student_policy.zip": "app/ml_assets/ppo_student_policy.zip"
-    }
-
-    prefix = settings.GCS_MODEL_PREFIX
-    
-    for gcs_filename, local_path in artifacts.items():
-        # Handle prefix if models are in a subfolder in the bucket
-        blob_name = f"{prefix}/{gcs_filename}" if prefix else gcs_filename
-        # Remove double slashes if prefix was empty but had trailing slash or handled poorly
-        blob_name = blob_name.replace("//", "/")
-        
-        blob = bucket.blob(blob_name)
-        
-        # Ensure local directory exists
-        os.makedirs(os.path.dirname(local_path), exist_ok=True)
-        
         try:
-            print(f"   - Fetching {blob_name} -> {local_path}")
-            blob.download_to_filename(local_path)
-            print(f"     ✅ Downloaded.")
+            os.link(blob_path, tmp_path)
+        except OSError:
+            shutil.copyfile(blob_path, tmp_path)
+        os.replace(tmp_path, local_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def make_storage_backend() -> StorageBackend | None:
+    """Backend from settings; None when there is nothing to sync from."""
+    if settings.MODEL_STORAGE_BACKEND == "local":
+        if not settings.MODEL_LOCAL_SOURCE_DIR:
+            print("⚠️ MODEL_LOCAL_SOURCE_DIR not set. Skipping model sync.")
+            return None
+        return LocalDirBackend(settings.MODEL_LOCAL_SOURCE_DIR)
+
+    if not settings.GCS_BUCKET_NAME:
+        print("⚠️ GCS_BUCKET_NAME not set. Skipping GCS download (assuming local development).")
+        return None
+    return GCSBackend(settings.GCS_BUCKET_NAME, settings.GCS_MODEL_PREFIX)
+
+def download_models_from_gcs(backend: StorageBackend = None, artifacts: dict = None, cache_dir: str = None):
+    """
+    Syncs model artifacts from the storage backend (GCS by default) on startup.
+    This ensures ephemeral containers always have the latest 'global brain',
+    while unchanged artifacts are not fetched again.
+    """
+    started = time.perf_counter()
+    if backend is None:
+        # 1. Initialize Client
+        try:
+            backend = make_storage_backend()
         except Exception as e:
-            print(f"     ❌ Error downloading {blob_name}: {e}")
-            # We don't raise here to allow partial success, but in prod you might want to crash.
-    
-    print("✅ Model download sequence complete.")
+            print(f"❌ Failed to connect to model storage: {e}")
+            return {}
+        if backend is None:
+            return {}
+
+    print(f"⬇️ Syncing models via {type(backend).__name__}...")
+    cache = ModelCache(backend, cache_dir or settings.MODEL_CACHE_DIR, settings.MODEL_DOWNLOAD_WORKERS)
+    # We don't raise on errors to allow partial success, but in prod you might want to crash.
+    results = cache.sync(artifacts or MODEL_ARTIFACTS)
+
+    print(f"✅ Model sync complete in {(time.perf_counter() - started) * 1000:.0f} ms.")
+    return results
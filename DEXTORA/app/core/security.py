@@ -0,0 +1,13 @@
+import hmac
+from fastapi import Header, HTTPException
+from app.core.config import settings
+
+async def require_admin(x_admin_token: str | None = Header(default=None)):
+    """
+    Dependency for operational endpoints: the request must carry ADMIN_TOKEN as X-Admin-Token.
+    Without an ADMIN_TOKEN configured (the default) these endpoints are disabled.
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=503, detail="Admin endpoints are disabled (set ADMIN_TOKEN to enable them).")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Missing or invalid X-Admin-Token.")
@@ -0,0 +1,55 @@
+import time
+from contextlib import contextmanager
+
+class StartupState:
+    """
+    What the serving process has brought up so far, and how long each startup phase took.
+
+    Deliberately free of heavy imports: the routers read the serving objects from here, so
+    importing `main` doesn't pull in torch/SQLAlchemy or build models as a side effect.
+    """
+    COMPONENTS = ("models", "redis", "persistence")
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases = {}  # phase name -> seconds
+        self.ready = {component: False for component in self.COMPONENTS}
+        self.errors = {}
+        self.inference_service = None
+        self.model_registry = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """Times one startup phase (phases running concurrently overlap in wall time)."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.errors[name] = str(e)
+            raise
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    def mark_ready(self, component: str):
+        self.ready[component] = True
+        if all(self.ready.values()):
+            self.phases["total"] = time.perf_counter() - self.started_at
+            print(f"🟢 Ready in {self.phases['total'] * 1000:.0f} ms | " + " | ".join(
+                f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases.items() if name != "total"
+            ))
+
+    @property
+    def is_ready(self) -> bool:
+        return all(self.ready.values())
+
+    def snapshot(self):
+        return {
+            "ready": self.is_ready,
+            "components": dict(self.ready),
+            "model_version": self.inference_service.model_version if self.inference_service else None,
+            "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+            "errors": dict(self.errors)
+        }
+
+# Singleton instance
+startup_state = StartupState()
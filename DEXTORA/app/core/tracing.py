@@ -0,0 +1,38 @@
+import json
+import logging
+import random
+import sys
+
+class SampledTraceLogger:
+    """
+    Structured (one JSON object per line) diagnostic logs for the hot path, emitted for a
+    `sample_rate` share of requests. Callers decide once per request with `sampled()` and only
+    build the event fields when it returns True, so unsampled requests pay for one random().
+    """
+    def __init__(self, name: str = "dextora.trace", sample_rate: float = 0.01):
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+        self.logger = logging.getLogger(name)
+        if not self.logger.handlers:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger.addHandler(handler)
+            self.logger.setLevel(logging.INFO)
+            self.logger.propagate = False
+
+    def sampled(self) -> bool:
+        return self.sample_rate > 0 and (self.sample_rate >= 1 or random.random() < self.sample_rate)
+
+    def log(self, event: str, **fields):
+        """Emits one event; numpy scalars/arrays in `fields` are serialized via their Python values."""
+        self.logger.info(json.dumps({"event": event, **fields}, default=_to_json))
+
+def _to_json(value):
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+def create_trace_logger():
+    from app.core.config import settings
+    return SampledTraceLogger(sample_rate=settings.TRACE_SAMPLE_RATE)
+
+trace_log = create_trace_logger()
@@ -1,8 +1,10 @@
-from sqlalchemy import Column, String, Integer, DateTime, func
+from sqlalchemy import Column, String, Integer, DateTime, func, select, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from pgvector.sqlalchemy import Vector  # You must run: pip install pgvector
 from app.core.config import settings
+from app.db.vector_index import EXTVERSION_QUERY, index_statements, search_settings, supports_iterative_scan
 import numpy as np
 
 Base = declarative_base()
@@ -25,6 +27,8 @@ class PostgresClient:
         self.async_session = sessionmaker(
             self.engine, class_=AsyncSession, expire_on_commit=False
         )
+        # pgvector >= 0.8 (iterative index scans); checked once, on first use
+        self.iterative_scan_supported = None
 
     async def get_student_profile(self, student_id: str):
         async with self.async_session() as session:
@@ -35,23 +39,144 @@ class PostgresClient:
         """
         Persists the final vector from Redis to PostgreSQL.
         """
+        await self.save_personality_vectors({student_id: vector})
+
+    async def save_personality_vectors(self, vectors: dict, chunk_size: int = 1000):
+        """
+        Bulk upsert of many students' vectors: one multi-row
+        INSERT ... ON CONFLICT (student_id) DO UPDATE per chunk, all in a single transaction.
+        Students without a profile get one created (grade/curriculum left empty).
+        """
+        rows = [
+            {"student_id": student_id, "personality_vector": np.asarray(vector, dtype=np.float32)}
+            for student_id, vector in vectors.items()
+        ]
+        if not rows:
+            return
+
         async with self.async_session() as session:
             async with session.begin():
-                profile = await session.get(StudentProfile, student_id)
-                if profile:
-                    profile.personality_vector = vector.tolist()
-                else:
-                    # Create a new profile if they don't exist
-                    new_profile = StudentProfile(
-                        student_id=student_id, 
-                        personality_vector=vector.tolist()
+                for start in range(0, len(rows), chunk_size):
+                    stmt = insert(StudentProfile).values(rows[start:start + chunk_size])
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[StudentProfile.student_id],
+                        set_={
+                            "personality_vector": stmt.excluded.personality_vector,
+                            "updated_at": func.now()
+                        }
                     )
-                    session.add(new_profile)
-                await session.commit()
+                    await session.execute(stmt)
+
+    async def ensure_vector_index(self, rebuild: bool = False, **params):
+        """
+        Creates the ANN + filter indexes on student_profiles if missing (see VECTOR_INDEX_*), and
+        checks whether the installed pgvector supports VECTOR_ITERATIVE_SCAN.
+        """
+        async with self.engine.begin() as conn:
+            for statement in index_statements(rebuild=rebuild, **params):
+                await conn.execute(text(statement))
+            await self._check_iterative_scan(conn)
+
+    async def _check_iterative_scan(self, conn) -> bool:
+        """Whether the installed pgvector supports VECTOR_ITERATIVE_SCAN (queried once, then cached)."""
+        if self.iterative_scan_supported is None:
+            extversion = (await conn.execute(text(EXTVERSION_QUERY))).scalar()
+            self.iterative_scan_supported = supports_iterative_scan(extversion)
+            if settings.VECTOR_ITERATIVE_SCAN != "off" and not self.iterative_scan_supported:
+                print(f"⚠️ VECTOR_ITERATIVE_SCAN='{settings.VECTOR_ITERATIVE_SCAN}' needs pgvector >= 0.8 "
+                      f"(installed: {extversion}); filtered searches run without it.")
+        return self.iterative_scan_supported
+
+    async def find_similar_students(self, vector: np.ndarray, k: int = 10, grade: int = None,
+                                    curriculum: str = None, exclude_student_id: str = None,
+                                    ef_search: int = None, probes: int = None):
+        """
+        The k profiles nearest to `vector` (VECTOR_INDEX_METRIC distance), optionally filtered
+        by grade / curriculum. Served by the ANN index, so results are approximate.
+        Returns [{"student_id", "grade", "curriculum", "distance"}] sorted nearest first.
+        """
+        column = StudentProfile.personality_vector
+        query_vector = np.asarray(vector, dtype=np.float32)
+        distance = {
+            "cosine": column.cosine_distance,
+            "l2": column.l2_distance,
+            "ip": column.max_inner_product,
+        }[settings.VECTOR_INDEX_METRIC](query_vector).label("distance")
+
+        stmt = select(StudentProfile.student_id, StudentProfile.grade, StudentProfile.curriculum, distance)
+        stmt = stmt.where(column.is_not(None))
+        if grade is not None:
+            stmt = stmt.where(StudentProfile.grade == grade)
+        if curriculum is not None:
+            stmt = stmt.where(StudentProfile.curriculum == curriculum)
+        if exclude_student_id is not None:
+            stmt = stmt.where(StudentProfile.student_id != exclude_student_id)
+        stmt = stmt.order_by(distance).limit(k)
+
+        async with self.async_session() as session:
+            async with session.begin():
+                iterative_scan = "off"
+                if settings.VECTOR_ITERATIVE_SCAN != "off" and await self._check_iterative_scan(session):
+                    iterative_scan = None
+                for statement in search_settings(k=k, ef_search=ef_search, probes=probes, iterative_scan=iterative_scan):
+                    await session.execute(text(statement))
+                result = await session.execute(stmt)
+                neighbours = [
+                    {"student_id": row.student_id, "grade": row.grade, "curriculum": row.curriculum,
+                     "distance": float(row.distance)}
+                    for row in result
+                ]
+        # relaxed_order iterative scans may return rows slightly out of order
+        return sorted(neighbours, key=lambda n: n["distance"])
+
+    async def get_cohort_centroids(self):
+        """
+        Mean personality vector per (grade, curriculum), aggregated by Postgres so only one
+        row per cohort comes back. Returns [(grade, curriculum, centroid, count)].
+        """
+        column = StudentProfile.personality_vector
+        stmt = (
+            select(StudentProfile.grade, StudentProfile.curriculum,
+                   func.avg(column, type_=Vector(128)), func.count())
+            .where(column.is_not(None))
+            .group_by(StudentProfile.grade, StudentProfile.curriculum)
+        )
+        async with self.async_session() as session:
+            result = await session.execute(stmt)
+            return [
+                (grade, curriculum, np.asarray(centroid, dtype=np.float32), count)
+                for grade, curriculum, centroid, count in result
+            ]
+
+    async def stream_profile_vectors(self, chunk_size: int = 10000):
+        """
+        Streams every stored personality vector in fixed-size chunks through a server-side
+        cursor, yielding (student_ids, float32 ndarray[n, 128]) with n <= chunk_size.
+
+        Vectors come over the wire in pgvector's binary format (vector_send: int16 dim,
+        int16 unused, dim big-endian float4) and are decoded straight into one preallocated
+        buffer, so no ORM objects or Python lists of floats are built. The array is reused
+        for the next chunk: copy it if you need to keep it.
+        """
+        column = StudentProfile.personality_vector
+        stmt = (
+            select(StudentProfile.student_id, func.vector_send(column))
+            .where(column.is_not(None))
+            .execution_options(yield_per=chunk_size)
+        )
+        buffer = np.empty((chunk_size, 128), dtype=np.float32)
+
+        async with self.async_session() as session:
+            result = await session.stream(stmt)
+            async for partition in result.partitions(chunk_size):
+                ids = [row[0] for row in partition]
+                raw = np.frombuffer(b"".join(row[1] for row in partition), dtype=np.uint8)
+                # Skip the 4-byte header of each row, byte-swap into the native float32 buffer
+                buffer[:len(ids)] = raw.reshape(len(ids), 4 + 128 * 4)[:, 4:].view(">f4")
+                yield ids, buffer[:len(ids)]
 
     async def get_all_profiles(self):
-        """Fetches all student profiles for training."""
-        from sqlalchemy import select
+        """Fetches all student profiles as ORM objects (small tables only; see stream_profile_vectors)."""
         async with self.async_session() as session:
             result = await session.execute(select(StudentProfile))
             return result.scalars().all()
@@ -1,8 +1,114 @@
+import asyncio
+import contextlib
 import redis.asyncio as redis
 import numpy as np
 import json
 from app.core.config import settings
 from app.db.postgres_client import postgres_client
+from app.db.write_behind import vector_write_behind
+from app.services.cohort_centroids import cohort_centroids
+
+class RedisWriteCoalescer:
+    """
+    Buffers SETEX calls from all connections and flushes them as one pipeline
+    `flush_interval_ms` after the first pending write, or as soon as `max_batch` writes are pending.
+    A newer write to a key replaces its pending one, so hot students cost one SETEX per flush.
+    """
+    def __init__(self, client, flush_interval_ms: float = 5.0, max_batch: int = 256):
+        self.client = client
+        self.interval = max(0.0, flush_interval_ms) / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._pending = {}   # key -> (ttl, value)
+        self._waiters = []   # Futures resolved once the pending writes have landed
+        self._has_pending = None
+        self._batch_full = None
+        self._task = None
+        self.flushes = 0
+        self.writes = 0
+
+    def setex(self, key: str, ttl: int, value: bytes):
+        """Queues a write and returns a future that resolves when it reaches Redis."""
+        if self._task is None or self._task.done():
+            self._has_pending = asyncio.Event()
+            self._batch_full = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+        self._pending[key] = (ttl, value)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+
+        self._has_pending.set()
+        if len(self._pending) >= self.max_batch:
+            self._batch_full.set()
+        return future
+
+    def pending_value(self, key: str):
+        """Read-your-writes: the value still waiting to be flushed for `key`, if any."""
+        entry = self._pending.get(key)
+        return entry[1] if entry else None
+
+    def discard(self, key: str):
+        self._pending.pop(key, None)
+
+    async def _run(self):
+        while True:
+            await self._has_pending.wait()
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._has_pending.clear()
+            self._batch_full.clear()
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending and not self._waiters:
+            return
+        pending, waiters = self._pending, self._waiters
+        self._pending, self._waiters = {}, []
+
+        try:
+            if pending:
+                async with self.client.pipeline(transaction=False) as pipe:
+                    for key, (ttl, value) in pending.items():
+                        pipe.setex(key, ttl, value)
+                    await pipe.execute()
+        except asyncio.CancelledError:
+            # Cancelled mid-flush (shutdown): hand the writes and their waiters back, newer
+            # writes to the same keys winning, so close() lands them instead of dropping them
+            for key, entry in pending.items():
+                self._pending.setdefault(key, entry)
+            self._waiters[:0] = waiters
+            raise
+        except Exception as e:
+            print(f"❌ Redis pipeline flush of {len(pending)} writes failed: {e}")
+            for future in waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.flushes += bool(pending)
+        self.writes += len(pending)
+        for future in waiters:
+            if not future.done():
+                future.set_result(None)
+
+    async def close(self):
+        """Stops the flush task and flushes what is still pending, resolving every waiter."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self):
+        return {
+            "flushes": self.flushes,
+            "writes": self.writes,
+            "avg_writes_per_flush": round(self.writes / self.flushes, 2) if self.flushes else 0.0,
+            "pending": len(self._pending)
+        }
 
 class RedisClient:
     def __init__(self):
@@ -14,56 +120,176 @@ class RedisClient:
         )
         self.ttl = 3600  # 1-hour session timeout
 
-    async def hydrate_student_session(self, student_id: str):
+        # Coalesce vector writes from all sockets into pipelined batches
+        self.writer = RedisWriteCoalescer(
+            self.client,
+            flush_interval_ms=settings.REDIS_WRITE_FLUSH_MS,
+            max_batch=settings.REDIS_WRITE_MAX_BATCH
+        ) if settings.REDIS_WRITE_COALESCING else None
+        self._background_writes = set()
+
+    @staticmethod
+    def _vector_key(student_id: str) -> str:
+        return f"student:{student_id}:vector"
+
+    async def hydrate_student_session(self, student_id: str, grade: int = None, curriculum: str = None):
         """
         Cold Start -> Hot Start.
-        If not in Redis, pull the 'Master Vector' from PostgreSQL and load it.
+        If not in Redis, seed it with the student's cohort centroid right away (no database
+        round-trip), then pull the 'Master Vector' from PostgreSQL in the background.
         """
-        exists = await self.client.exists(f"student:{student_id}:vector")
+        exists = await self.client.exists(self._vector_key(student_id))
         if not exists:
-            # Pull from Postgres
+            # A vector from a recent disconnect may still be waiting in the write-behind queue
+            pending = vector_write_behind.pending_vector(student_id)
+            if pending is not None:
+                await self.set_student_vector(student_id, pending)
+                print(f"✅ Hydrated session for {student_id} from the write-behind queue.")
+                return
+
+            # Warm start from the cohort table (in-memory lookup)
+            centroid = cohort_centroids.lookup(grade, curriculum)
+            await self.set_student_vector(student_id, centroid, wait=False)
+
+            task = asyncio.create_task(self._hydrate_from_postgres(student_id, centroid))
+            self._background_writes.add(task)
+            task.add_done_callback(self._background_writes.discard)
+
+    async def _hydrate_from_postgres(self, student_id: str, centroid: np.ndarray):
+        """Replaces the warm-start centroid with the stored profile vector, if there is one."""
+        try:
             profile = await postgres_client.get_student_profile(student_id)
-            if profile and profile.personality_vector:
+        except Exception as e:
+            print(f"⚠️ Postgres lookup for {student_id} failed, keeping the cohort centroid: {e}")
+            return
+
+        if profile and profile.personality_vector is not None:
+            # Only overwrite if no inference has replaced the centroid in the meantime
+            current = await self.get_student_vector(student_id)
+            if np.array_equal(current, centroid):
                 # Load the 128-d vector from DB
                 vector = np.array(profile.personality_vector, dtype=np.float32)
                 await self.set_student_vector(student_id, vector)
                 print(f"✅ Hydrated session for {student_id} from Postgres.")
-            else:
-                # Initialize a neutral vector if new student
-                initial_vector = np.zeros(128, dtype=np.float32)
-                await self.set_student_vector(student_id, initial_vector)
-                print(f"🆕 Created new session for {student_id} (No Profile Found).")
+        else:
+            print(f"🆕 Created new session for {student_id} from its cohort centroid (No Profile Found).")
 
-    async def set_student_vector(self, student_id: str, vector: np.ndarray):
+    async def set_student_vector(self, student_id: str, vector: np.ndarray, wait: bool = True):
         """
         Stores the 128-d vector as a binary blob for ultra-fast performance.
+        With `wait=False` the write is queued and the caller does not wait for the round-trip.
         """
         # Converting to bytes is much faster than JSON for 5,000 users
         vector_bytes = vector.astype(np.float32).tobytes()
-        await self.client.setex(
-            f"student:{student_id}:vector", 
-            self.ttl, 
-            vector_bytes
-        )
+        key = self._vector_key(student_id)
+
+        if self.writer is not None:
+            future = self.writer.setex(key, self.ttl, vector_bytes)
+            if wait:
+                await future
+            else:
+                # Failures are already logged by the coalescer
+                future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            return
+
+        if wait:
+            await self.client.setex(key, self.ttl, vector_bytes)
+        else:
+            task = asyncio.create_task(self.client.setex(key, self.ttl, vector_bytes))
+            self._background_writes.add(task)
+            task.add_done_callback(self._background_writes.discard)
 
     async def get_student_vector(self, student_id: str) -> np.ndarray:
         """
         Retrieves the vector and converts it back to a Numpy array.
         """
-        data = await self.client.get(f"student:{student_id}:vector")
+        key = self._vector_key(student_id)
+        data = self.writer.pending_value(key) if self.writer is not None else None
+        if data is None:
+            data = await self.client.get(key)
         if data:
             return np.frombuffer(data, dtype=np.float32)
         return np.zeros(128, dtype=np.float32)
 
-    async def persist_student_vector(self, student_id: str):
+    async def get_student_vectors(self, student_ids: list) -> np.ndarray:
+        """
+        Batched read: one MGET for many students. Returns a [N, 128] float32 matrix
+        (zero rows for students without a cached vector).
+        """
+        vectors = np.zeros((len(student_ids), 128), dtype=np.float32)
+        if not student_ids:
+            return vectors
+
+        keys = [self._vector_key(s) for s in student_ids]
+        for i, data in enumerate(await self.client.mget(keys)):
+            pending = self.writer.pending_value(keys[i]) if self.writer is not None else None
+            data = pending if pending is not None else data
+            if data:
+                vectors[i] = np.frombuffer(data, dtype=np.float32)
+        return vectors
+
+    async def set_student_dna(self, student_id: str, dna_row: np.ndarray, ttl: int = None):
+        """Stores a decoded 40-score DNA row (float32 blob) for cross-worker trend analysis."""
+        key = f"student:{student_id}:dna"
+        dna_bytes = np.asarray(dna_row, dtype=np.float32).tobytes()
+        ttl = int(ttl or self.ttl)
+        if self.writer is not None:
+            future = self.writer.setex(key, ttl, dna_bytes)
+            if not settings.REDIS_WRITE_BEHIND:
+                await future
+            else:
+                future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        else:
+            await self.client.setex(key, ttl, dna_bytes)
+
+    async def get_student_dna(self, student_id: str, num_labels: int = 40):
+        """The last stored DNA row, or None."""
+        key = f"student:{student_id}:dna"
+        data = self.writer.pending_value(key) if self.writer is not None else None
+        if data is None:
+            data = await self.client.get(key)
+        if data and len(data) == num_labels * 4:
+            return np.frombuffer(data, dtype=np.float32).copy()
+        return None
+
+    async def persist_student_vector(self, student_id: str, updated: bool = True):
         """
         Dehydration: Save the final session vector back to PostgreSQL.
-        Called when a WebSocket disconnects.
+        Called when a WebSocket disconnects. `updated=False` (no inference ran this session)
+        only drops the cached vector: it is still the hydrated profile or the cohort centroid.
         """
-        vector = await self.get_student_vector(student_id)
-        # TODO: self.postgres.save_vector(student_id, vector)
-        print(f"Persisted vector for {student_id} to long-term storage.")
-        await self.client.delete(f"student:{student_id}:vector")
+        key = self._vector_key(student_id)
+        data = self.writer.pending_value(key) if self.writer is not None else None
+        if data is None:
+            data = await self.client.get(key)
+        if data is None:
+            # Expired, or another connection for this student already persisted it:
+            # never overwrite the stored profile with a placeholder
+            print(f"⚠️ No cached vector for {student_id}; nothing to persist.")
+            return
+
+        if updated:
+            vector = np.frombuffer(data, dtype=np.float32)
+            # Queued for the next bulk upsert; waits here only if the queue is full (backpressure)
+            await vector_write_behind.mark_dirty(student_id, vector)
+            print(f"Queued vector for {student_id} for long-term storage.")
+        if self.writer is not None:
+            self.writer.discard(self._vector_key(student_id))
+        await self.client.delete(self._vector_key(student_id))
+
+    def write_stats(self):
+        """How well vector writes are being coalesced into pipelines."""
+        if self.writer is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.writer.stats()}
+
+    async def close(self):
+        """Flushes queued writes, then closes the connection pool."""
+        if self.writer is not None:
+            await self.writer.close()
+        if self._background_writes:
+            await asyncio.gather(*self._background_writes, return_exceptions=True)
+        await self.client.close()
 
 # Singleton instance
 redis_client = RedisClient()
\ No newline at end of file
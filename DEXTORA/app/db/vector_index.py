@@ -0,0 +1,92 @@
+from sqlalchemy import text
+from app.core.config import settings
+
+# Distance metric -> (pgvector operator class, SQL distance operator)
+VECTOR_OPS = {
+    "cosine": ("vector_cosine_ops", "<=>"),
+    "l2": ("vector_l2_ops", "<->"),
+    "ip": ("vector_ip_ops", "<#>"),
+}
+INDEX_TYPES = ("hnsw", "ivfflat", "none")
+ITERATIVE_SCAN_MIN_VERSION = (0, 8)  # hnsw/ivfflat.iterative_scan were added in pgvector 0.8.0
+
+# The installed pgvector version, for feature checks
+EXTVERSION_QUERY = "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+
+def index_name(table: str = "student_profiles") -> str:
+    return f"ix_{table}_personality_vector"
+
+def _validate(index_type: str, metric: str):
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown VECTOR_INDEX_TYPE '{index_type}'. Expected one of {INDEX_TYPES}.")
+    if metric not in VECTOR_OPS:
+        raise ValueError(f"Unknown VECTOR_INDEX_METRIC '{metric}'. Expected one of {list(VECTOR_OPS)}.")
+
+def index_statements(table: str = "student_profiles", index_type: str = None, metric: str = None,
+                     hnsw_m: int = None, hnsw_ef_construction: int = None, ivfflat_lists: int = None,
+                     rebuild: bool = False) -> list:
+    """
+    DDL for the ANN index on `personality_vector` plus the (grade, curriculum) filter index.
+    Parameters default to the VECTOR_INDEX_* settings.
+    """
+    index_type = index_type or settings.VECTOR_INDEX_TYPE
+    metric = metric or settings.VECTOR_INDEX_METRIC
+    _validate(index_type, metric)
+    opclass, _ = VECTOR_OPS[metric]
+    name = index_name(table)
+
+    statements = [f"CREATE INDEX IF NOT EXISTS ix_{table}_grade_curriculum ON {table} (grade, curriculum)"]
+    if rebuild or index_type == "none":
+        statements.append(f"DROP INDEX IF EXISTS {name}")
+    if index_type == "hnsw":
+        m = hnsw_m or settings.VECTOR_HNSW_M
+        ef_construction = hnsw_ef_construction or settings.VECTOR_HNSW_EF_CONSTRUCTION
+        statements.append(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING hnsw (personality_vector {opclass}) "
+            f"WITH (m = {int(m)}, ef_construction = {int(ef_construction)})"
+        )
+    elif index_type == "ivfflat":
+        # IVFFlat centroids are trained on the rows present at build time: build after loading
+        lists = ivfflat_lists or settings.VECTOR_IVFFLAT_LISTS
+        statements.append(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING ivfflat (personality_vector {opclass}) "
+            f"WITH (lists = {int(lists)})"
+        )
+    return statements
+
+def supports_iterative_scan(extversion: str) -> bool:
+    """Whether a pgvector `extversion` (e.g. "0.7.4") knows the iterative_scan settings."""
+    try:
+        version = tuple(int(part) for part in extversion.split(".")[:2])
+    except (AttributeError, ValueError):
+        return False
+    return version >= ITERATIVE_SCAN_MIN_VERSION
+
+def build_settings() -> list:
+    """Session settings for a faster index build (large graphs must fit maintenance_work_mem)."""
+    return [
+        f"SET maintenance_work_mem = '{settings.VECTOR_INDEX_BUILD_MEM}'",
+        f"SET max_parallel_maintenance_workers = {int(settings.VECTOR_INDEX_BUILD_WORKERS)}",
+    ]
+
+def search_settings(index_type: str = None, k: int = 10, ef_search: int = None, probes: int = None,
+                    iterative_scan: str = None) -> list:
+    """SET LOCAL statements tuning one ANN query; must run inside the query's transaction."""
+    index_type = index_type or settings.VECTOR_INDEX_TYPE
+    iterative_scan = settings.VECTOR_ITERATIVE_SCAN if iterative_scan is None else iterative_scan
+    statements = []
+    if index_type == "hnsw":
+        # ef_search bounds the candidate list, so it can never be below k
+        ef = max(int(ef_search or settings.VECTOR_HNSW_EF_SEARCH), int(k))
+        statements.append(f"SET LOCAL hnsw.ef_search = {ef}")
+    elif index_type == "ivfflat":
+        statements.append(f"SET LOCAL ivfflat.probes = {int(probes or settings.VECTOR_IVFFLAT_PROBES)}")
+    if index_type != "none" and iterative_scan and iterative_scan != "off":
+        # pgvector >= 0.8: keep scanning the index until enough rows pass the grade/curriculum filter
+        statements.append(f"SET LOCAL {index_type}.iterative_scan = {iterative_scan}")
+    return statements
+
+def create_vector_index(conn, table: str = "student_profiles", rebuild: bool = False, **params):
+    """Creates (or rebuilds) the ANN index over an open SQLAlchemy connection (sync engines)."""
+    for statement in build_settings() + index_statements(table, rebuild=rebuild, **params):
+        conn.execute(text(statement))
@@ -0,0 +1,130 @@
+import asyncio
+import contextlib
+import itertools
+import numpy as np
+from app.core.config import settings
+from app.db.postgres_client import postgres_client
+
+class VectorWriteBehind:
+    """
+    Write-behind queue between the session cache and PostgreSQL.
+    Dirty student vectors are collected (latest value wins) and flushed in bulk upserts
+    on a timer, when `flush_batch` students are pending, and on shutdown.
+    The queue is bounded: `mark_dirty` waits while `max_pending` students are queued (backpressure).
+    """
+    def __init__(self, save_many, max_pending: int = 10000, flush_batch: int = 1000, flush_interval_s: float = 30.0):
+        self.save_many = save_many
+        self.max_pending = max(1, max_pending)
+        self.flush_batch = max(1, flush_batch)
+        self.flush_interval = flush_interval_s
+        self._pending = {}  # student_id -> vector
+        self._space = None
+        self._flush_now = None
+        self._flush_lock = None
+        self._task = None
+        self.flushed = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._space = asyncio.Condition()
+            self._flush_now = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    async def start(self):
+        self._ensure_started()
+
+    async def mark_dirty(self, student_id: str, vector: np.ndarray):
+        """Queues a vector for persistence, waiting for space if the queue is full."""
+        self._ensure_started()
+        async with self._space:
+            if student_id not in self._pending and len(self._pending) >= self.max_pending:
+                self._flush_now.set()
+                await self._space.wait_for(
+                    lambda: student_id in self._pending or len(self._pending) < self.max_pending
+                )
+            self._pending[student_id] = np.array(vector, dtype=np.float32)
+        if len(self._pending) >= self.flush_batch:
+            self._flush_now.set()
+
+    def try_mark_dirty(self, student_id: str, vector: np.ndarray) -> bool:
+        """
+        Non-blocking variant for the inference hot path. When the queue is full the update
+        is skipped (the student's vector is marked again on a later packet or on disconnect).
+        """
+        self._ensure_started()
+        if student_id not in self._pending and len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            self._flush_now.set()
+            return False
+        self._pending[student_id] = np.array(vector, dtype=np.float32)
+        if len(self._pending) >= self.flush_batch:
+            self._flush_now.set()
+        return True
+
+    def pending_vector(self, student_id: str):
+        """A vector that is queued but not yet in PostgreSQL (so hydration never reads stale data)."""
+        return self._pending.get(student_id)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self.flush()
+
+    async def flush(self):
+        """
+        Drains the queue in `flush_batch`-sized bulk upserts. Entries leave the queue only once
+        their upsert succeeded (and only if no newer value arrived meanwhile), so a failed or
+        cancelled flush loses nothing: it is retried on the next tick.
+        """
+        if self._flush_lock is None:
+            return
+        async with self._flush_lock:
+            while self._pending:
+                batch = dict(itertools.islice(self._pending.items(), self.flush_batch))
+                try:
+                    await self.save_many(batch)
+                except Exception as e:
+                    self.failed_flushes += 1
+                    print(f"❌ Write-behind flush of {len(batch)} vectors failed: {e}")
+                    break
+
+                for student_id, vector in batch.items():
+                    if self._pending.get(student_id) is vector:
+                        del self._pending[student_id]
+                self.flushed += len(batch)
+                async with self._space:
+                    self._space.notify_all()
+
+    async def close(self):
+        """Stops the timer and flushes everything still pending (called on shutdown)."""
+        if self._task is not None:
+            self._task.cancel()
+            # Let an in-flight flush unwind (releasing the flush lock) before the final one
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self):
+        return {
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+            "flushed": self.flushed,
+            "failed_flushes": self.failed_flushes,
+            "dropped_hot_path_updates": self.dropped
+        }
+
+# Singleton instance
+vector_write_behind = VectorWriteBehind(
+    postgres_client.save_personality_vectors,
+    max_pending=settings.PG_WRITE_BEHIND_MAX_PENDING,
+    flush_batch=settings.PG_WRITE_BEHIND_BATCH,
+    flush_interval_s=settings.PG_WRITE_BEHIND_INTERVAL_S
+)
@@ -0,0 +1,104 @@
+import io
+import json
+import zipfile
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+# SB3 stores custom activations as the class repr, e.g. "<class 'torch.nn.modules.activation.ReLU'>"
+_ACTIVATIONS = {
+    "Tanh": torch.tanh,
+    "ReLU": F.relu,
+    "LeakyReLU": F.leaky_relu,
+    "ELU": F.elu,
+}
+
+class PolicyHead:
+    """
+    The actor half of a trained SB3 PPO MlpPolicy, evaluated with bare torch ops.
+    Matches `PPO.predict(obs, deterministic=True)` for our flat 128-d Box observations and
+    5 discrete actions, without importing stable-baselines3/gymnasium in the serving path.
+    """
+    def __init__(self, hidden_layers: list, action_weight: torch.Tensor, action_bias: torch.Tensor, activation: str = "Tanh"):
+        if activation not in _ACTIVATIONS:
+            raise ValueError(f"Unsupported policy activation '{activation}'. Expected one of {list(_ACTIVATIONS)}.")
+        self.hidden_layers = [(w.float(), b.float()) for w, b in hidden_layers]
+        self.action_weight = action_weight.float()
+        self.action_bias = action_bias.float()
+        self.activation = activation
+        self._activation_fn = _ACTIVATIONS[activation]
+        self.obs_dim = self.hidden_layers[0][0].shape[1] if self.hidden_layers else self.action_weight.shape[1]
+        self.n_actions = self.action_bias.shape[0]
+
+    @classmethod
+    def from_sb3_zip(cls, path: str):
+        """Reads the actor weights straight out of a `PPO.save()` archive."""
+        if not path.endswith(".zip"):
+            path = f"{path}.zip"
+
+        with zipfile.ZipFile(path) as archive:
+            data = json.loads(archive.read("data"))
+            state_dict = torch.load(io.BytesIO(archive.read("policy.pth")), map_location="cpu", weights_only=True)
+
+        policy_kwargs = data.get("policy_kwargs") or {}
+        if "features_extractor_class" in policy_kwargs:
+            raise ValueError("Custom features extractors are not supported by PolicyHead; use the SB3 policy.")
+
+        activation = "Tanh"
+        if "activation_fn" in policy_kwargs:
+            activation = str(policy_kwargs["activation_fn"]).split(".")[-1].strip("'>")
+
+        # Hidden layers are the Linear modules of mlp_extractor.policy_net, in index order
+        prefix = "mlp_extractor.policy_net."
+        indices = sorted({int(k[len(prefix):].split(".")[0]) for k in state_dict if k.startswith(prefix)})
+        hidden_layers = [(state_dict[f"{prefix}{i}.weight"], state_dict[f"{prefix}{i}.bias"]) for i in indices]
+        return cls(hidden_layers, state_dict["action_net.weight"], state_dict["action_net.bias"], activation)
+
+    def save(self, path: str):
+        """Writes the actor weights as a plain torch file (loadable memory-mapped, see `load`)."""
+        torch.save({
+            "hidden_weights": [w for w, _ in self.hidden_layers],
+            "hidden_biases": [b for _, b in self.hidden_layers],
+            "action_weight": self.action_weight,
+            "action_bias": self.action_bias,
+            "activation": self.activation
+        }, path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = False):
+        """Reads a file written by `save`; with `mmap` the weights are views of the mapped file."""
+        data = torch.load(path, map_location="cpu", mmap=mmap, weights_only=True)
+        hidden_layers = list(zip(data["hidden_weights"], data["hidden_biases"]))
+        return cls(hidden_layers, data["action_weight"], data["action_bias"], data["activation"])
+
+    def _log_probs(self, obs: np.ndarray) -> torch.Tensor:
+        x = torch.as_tensor(np.asarray(obs, dtype=np.float32)).reshape(-1, self.obs_dim)
+        with torch.no_grad():
+            for weight, bias in self.hidden_layers:
+                x = self._activation_fn(F.linear(x, weight, bias))
+            logits = F.linear(x, self.action_weight, self.action_bias)
+            # Same normalisation as torch.distributions.Categorical, so ties break identically
+            return logits - logits.logsumexp(dim=-1, keepdim=True)
+
+    def action_probs(self, obs: np.ndarray) -> np.ndarray:
+        return F.softmax(self._log_probs(obs), dim=-1).numpy()
+
+    def act_batch(self, obs: np.ndarray, return_probs: bool = False):
+        """Greedy actions for obs [N, 128] -> actions [N] (and [N, 5] probabilities if asked)."""
+        probs = F.softmax(self._log_probs(obs), dim=-1)
+        actions = probs.argmax(dim=1).numpy()
+        if return_probs:
+            return actions, probs.numpy()
+        return actions
+
+    def predict(self, obs: np.ndarray, deterministic: bool = True):
+        """Drop-in for `PPO.predict`: returns (actions, None); a single observation gives a 0-d action."""
+        obs = np.asarray(obs, dtype=np.float32)
+        if deterministic:
+            actions = self.act_batch(obs)
+        else:
+            with torch.no_grad():
+                actions = torch.multinomial(F.softmax(self._log_probs(obs), dim=-1), 1).squeeze(1).numpy()
+        if obs.ndim == 1:
+            actions = actions.squeeze(axis=0)
+        return actions, None
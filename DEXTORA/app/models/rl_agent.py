@@ -2,6 +2,7 @@ import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
 from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import VecEnv
 
 class StudentRSInv(gym.Env):
     """Custom Environment for Student Recommender System"""
@@ -104,6 +105,107 @@ class StudentRSInv(gym.Env):
         # Default: If nothing is wrong, doing nothing is safe
         return 0.5 if action == 0 else -0.1
 
+# Latent indices the scenarios and rewards act on (must match StudentDNADecoder)
+MASTERY_IDX, FRUSTRATION_IDX, ATTENTION_IDX = 0, 10, 20
+
+def generate_scenarios(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Vectorized `StudentRSInv._generate_scenario`: n scenarios [n, 128] in one go."""
+    choice = rng.random(n)
+    vectors = rng.normal(0, 0.5, (n, 128)).astype(np.float32)
+
+    flow = choice < 0.3                          # SCENARIO 1: FLOW STATE (Protect)
+    struggle = (choice >= 0.3) & (choice < 0.6)  # SCENARIO 2: STRUGGLE (Chatbot)
+    fatigue = (choice >= 0.6) & (choice < 0.9)   # SCENARIO 3: FATIGUE (Flashcards)
+    # else: Random Noise (10%)
+
+    vectors[:, ATTENTION_IDX] += np.select([flow, struggle, fatigue], [2.0, -1.0, -2.0], 0.0).astype(np.float32)
+    vectors[:, FRUSTRATION_IDX] += np.select([flow, struggle, fatigue], [-0.5, 2.0, -0.5], 0.0).astype(np.float32)
+    return vectors
+
+def rewards_from_interactions(actions: np.ndarray, states: np.ndarray) -> np.ndarray:
+    """
+    Vectorized `StudentRSInv._get_reward_from_interaction` for [n] actions on [n, 128] states.
+    Same priority stack: the first matching condition decides each row's reward.
+    """
+    actions = np.asarray(actions).reshape(-1)
+    mastery_val = states[:, MASTERY_IDX]
+    frustration_val = states[:, FRUSTRATION_IDX]
+    attention_val = states[:, ATTENTION_IDX]
+
+    conditions = [
+        attention_val > 0.5,       # 1. Protect flow state -> do nothing
+        frustration_val > -0.1,    # 2. Address struggle -> chatbot
+        attention_val < -0.2,      # 3. Re-engage fatigue -> flashcards
+        mastery_val < -0.5,        # 4. Plug knowledge gaps -> video
+    ]
+    choices = [
+        np.where(actions == 0, 1.0, -1.0),
+        np.where(actions == 2, 1.0, -0.5),
+        np.where(actions == 3, 1.0, -0.5),
+        np.where(actions == 1, 1.0, -0.5),
+    ]
+    # Default: If nothing is wrong, doing nothing is safe
+    return np.select(conditions, choices, np.where(actions == 0, 0.5, -0.1)).astype(np.float32)
+
+class StudentRSVecEnv(VecEnv):
+    """
+    Natively vectorized StudentRSInv: `num_envs` independent students stepped with NumPy
+    array ops instead of one Python `step` per env. Implements the SB3 VecEnv API, so it
+    is passed to PPO directly (no DummyVecEnv/SubprocVecEnv wrapper).
+    """
+    def __init__(self, num_envs: int, saint_model=None, seed: int = None):
+        self.render_mode = None
+        super().__init__(
+            num_envs,
+            spaces.Box(low=-np.inf, high=np.inf, shape=(128,), dtype=np.float32),
+            spaces.Discrete(5)
+        )
+        self.saint = saint_model
+        self.rng = np.random.default_rng(seed)
+        self.last_obs = None
+        self._actions = None
+
+    def reset(self):
+        if self._seeds[0] is not None:
+            self.rng = np.random.default_rng(self._seeds[0])
+        self._reset_seeds()
+        self._reset_options()
+        self.last_obs = generate_scenarios(self.rng, self.num_envs)
+        return self.last_obs
+
+    def step_async(self, actions: np.ndarray):
+        self._actions = actions
+
+    def step_wait(self):
+        # Reward every env on the state it just acted on, then move all of them to new scenarios
+        rewards = rewards_from_interactions(self._actions, self.last_obs)
+        self.last_obs = generate_scenarios(self.rng, self.num_envs)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        return self.last_obs, rewards, dones, [{} for _ in range(self.num_envs)]
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name)] * len(self._get_indices(indices))
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        return [result] * len(self._get_indices(indices))
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False] * len(self._get_indices(indices))
+
+    def _get_indices(self, indices):
+        if indices is None:
+            return range(self.num_envs)
+        if isinstance(indices, int):
+            return [indices]
+        return indices
+
 # --- Training Script ---
 def train_recommender():
     # 1. Instantiate SAINT (Used as a feature extractor)
@@ -1,9 +1,16 @@
 import torch
 import torch.nn as nn
 import math
+from typing import Optional
+
+# Longest sequence one forward pass can position (size of the positional-encoding table)
+MAX_SEQ_LEN = 500
+# Vocabulary sizes of the served model (concept ids / interaction ids)
+NUM_CONCEPTS = 1000
+NUM_INTERACTIONS = 20
 
 class PositionalEncoding(nn.Module):
-    def __init__(self, d_model, max_len=500):
+    def __init__(self, d_model, max_len=MAX_SEQ_LEN):
         super().__init__()
         pe = torch.zeros(max_len, d_model)
         position = torch.arange(0, max_len, dtype=torch.float).unsqueeze(1)
@@ -35,15 +42,244 @@ class SAINT(nn.Module):
         # Final Latent Vector (The Personality Vector)
         self.fc = nn.Linear(d_model, d_model)
 
-    def forward(self, context_seq, behavior_seq):
+    def forward(self, context_seq, behavior_seq,
+                context_padding_mask: Optional[torch.Tensor] = None,
+                behavior_padding_mask: Optional[torch.Tensor] = None):
+        """
+        Padding masks are bool [batch, seq_len] tensors, True on padded positions.
+        Sequences are right-padded so positional encodings match the unpadded pass.
+        (Annotated so the module can be compiled with torch.jit.script, see saint_variants.py.)
+        """
         # 1. Process Context through Encoder
         enc_emb = self.pos_encoder(self.concept_embedding(context_seq))
-        memory = self.transformer_encoder(enc_emb)
+        memory = self.transformer_encoder(enc_emb, src_key_padding_mask=context_padding_mask)
 
         # 2. Process Behavior through Decoder (attending to Context memory)
         dec_emb = self.pos_decoder(self.behavior_embedding(behavior_seq))
-        out = self.transformer_decoder(dec_emb, memory)
+        out = self.transformer_decoder(
+            dec_emb, memory,
+            tgt_key_padding_mask=behavior_padding_mask,
+            memory_key_padding_mask=context_padding_mask
+        )
 
         # 3. Extract the last token's representation as the Personality Vector
-        personality_vector = self.fc(out[:, -1, :])
-        return personality_vector
\ No newline at end of file
+        if behavior_padding_mask is None:
+            last_token = out[:, -1, :]
+        else:
+            # Last *real* token of each row (padding sits on the right)
+            lengths = (~behavior_padding_mask).sum(dim=1)
+            last_token = out[torch.arange(out.size(0), device=out.device), lengths - 1]
+        personality_vector = self.fc(last_token)
+        return personality_vector
+
+    # --- Session mode: incremental encoding across packets ---
+
+    def forward_incremental(self, context_seq, behavior_seq, state=None, max_cached_tokens=None):
+        """
+        Encodes only the new tokens of one student's packet (batch size 1), attending to the
+        per-layer hidden states cached from earlier packets of the same session
+        (Transformer-XL style memories). With `state=None` this equals `forward`.
+        Returns (personality_vector [1, d_model], new SAINTSessionState).
+        """
+        vectors, states = self.forward_incremental_batch([context_seq[0]], [behavior_seq[0]], [state], max_cached_tokens)
+        return vectors, states[0]
+
+    def forward_incremental_batch(self, context_seqs, behavior_seqs, states, max_cached_tokens=None):
+        """
+        `forward_incremental` for several students in one pass. Rows are ragged (new tokens and
+        cached tokens alike): new tokens are right-padded, cached states left-padded, and
+        padding is masked out of every attention, so each row gets what it would alone.
+        Returns (personality_vectors [B, d_model], [new SAINTSessionState per row]).
+        """
+        context_seqs = [torch.as_tensor(c, dtype=torch.long).reshape(-1) for c in context_seqs]
+        behavior_seqs = [torch.as_tensor(b, dtype=torch.long).reshape(-1) for b in behavior_seqs]
+        context_lens = [len(c) for c in context_seqs]
+        behavior_lens = [len(b) for b in behavior_seqs]
+        states = [
+            self._rebased(state, c, b, max_cached_tokens) or SAINTSessionState.empty(
+                len(self.transformer_encoder.layers), len(self.transformer_decoder.layers)
+            )
+            for state, c, b in zip(states, context_lens, behavior_lens)
+        ]
+
+        # 1. Encoder: new context tokens attend to cached context states
+        tokens, new_mask = _pad_right(context_seqs)
+        x = self.concept_embedding(tokens) + _positions(self.pos_encoder, [s.context_position for s in states], tokens.size(1))
+        enc_inputs = []
+        for i, layer in enumerate(self.transformer_encoder.layers):
+            enc_inputs.append(x)
+            mem, mem_mask = _pad_left([s.enc_mems[i] for s in states])
+            x = _encoder_layer_step(layer, x, mem, _key_mask(mem_mask, new_mask))
+        if self.transformer_encoder.norm is not None:
+            x = self.transformer_encoder.norm(x)
+        cached, cached_mask = _pad_left([s.memory for s in states])
+        memory = x if cached is None else torch.cat([cached, x], dim=1)
+        memory_mask = _key_mask(cached_mask, new_mask)
+
+        # 2. Decoder: new behavior tokens attend to cached behavior states and the whole session's context
+        tokens, new_mask = _pad_right(behavior_seqs)
+        y = self.behavior_embedding(tokens) + _positions(self.pos_decoder, [s.behavior_position for s in states], tokens.size(1))
+        dec_inputs = []
+        for i, layer in enumerate(self.transformer_decoder.layers):
+            dec_inputs.append(y)
+            mem, mem_mask = _pad_left([s.dec_mems[i] for s in states])
+            y = _decoder_layer_step(layer, y, mem, memory, _key_mask(mem_mask, new_mask), memory_mask)
+        if self.transformer_decoder.norm is not None:
+            y = self.transformer_decoder.norm(y)
+
+        # 3. Extract each row's last real token as the Personality Vector
+        rows = torch.arange(len(states))
+        personality_vectors = self.fc(y[rows, torch.as_tensor(behavior_lens) - 1])
+
+        new_states = []
+        for i, (state, c, b) in enumerate(zip(states, context_lens, behavior_lens)):
+            row_memory = x[i:i + 1, :c].clone() if state.memory is None else torch.cat([state.memory, x[i:i + 1, :c]], dim=1)
+            new_states.append(state.extend(
+                [h[i:i + 1, :c] for h in enc_inputs], row_memory, [h[i:i + 1, :b] for h in dec_inputs],
+                context_seqs[i][None, :], behavior_seqs[i][None, :], max_cached_tokens
+            ))
+        return personality_vectors, new_states
+
+    def _rebased(self, state, context_len, behavior_len, max_cached_tokens=None):
+        """
+        `state`, unless the new tokens would run past the positional table: then the session is
+        re-encoded from position 0 over its most recent cached tokens (as many as leave room for
+        the new ones), so positions always stay within MAX_SEQ_LEN. Steps that would leave no
+        room for any history are rejected; see `incremental_step_tokens`.
+        """
+        max_len = self.pos_encoder.pe.size(1)
+        if max(context_len, behavior_len) > max_len:
+            raise ValueError(f"At most {max_len} new tokens per incremental step (got {max(context_len, behavior_len)})")
+        if state is None or (state.context_position + context_len <= max_len and state.behavior_position + behavior_len <= max_len):
+            return state
+        if state.context_tokens is None:
+            return None
+        keep = min(max_len - context_len, max_len - behavior_len)
+        if keep <= 0:
+            raise ValueError(f"{max(context_len, behavior_len)} new tokens leave no room for the cached session in the "
+                             f"{max_len}-token positional table; split them with incremental_step_tokens")
+        _, rebased = self.forward_incremental_batch(
+            [state.context_tokens[0, -keep:]], [state.behavior_tokens[0, -keep:]], [None], max_cached_tokens
+        )
+        return rebased[0]
+
+def incremental_step_tokens(max_cached_tokens=None, max_len=MAX_SEQ_LEN) -> int:
+    """
+    Most new tokens one incremental step should take so that, when the session is rebased,
+    `max_cached_tokens` of history (at least one token) still fit in the positional table
+    next to them.
+    """
+    return max_len - max(1, min(max_cached_tokens or 1, max_len - 1))
+
+def _pad_right(seqs):
+    """1-D token tensors -> right-padded [B, N] tokens and a bool mask (True on padding)."""
+    length = max(len(s) for s in seqs)
+    tokens = torch.zeros((len(seqs), length), dtype=torch.long)
+    mask = torch.ones((len(seqs), length), dtype=torch.bool)
+    for i, seq in enumerate(seqs):
+        tokens[i, :len(seq)] = seq
+        mask[i, :len(seq)] = False
+    return tokens, mask
+
+def _pad_left(mems):
+    """Cached [1, m_i, d] states (or None) -> left-padded [B, M, d] and a bool mask, or (None, None) when nothing is cached."""
+    length = max((m.size(1) for m in mems if m is not None), default=0)
+    if length == 0:
+        return None, None
+    d_model = next(m for m in mems if m is not None).size(2)
+    packed = torch.zeros((len(mems), length, d_model))
+    mask = torch.ones((len(mems), length), dtype=torch.bool)
+    for i, m in enumerate(mems):
+        if m is not None and m.size(1):
+            packed[i, length - m.size(1):] = m[0]
+            mask[i, length - m.size(1):] = False
+    return packed, mask
+
+def _key_mask(mem_mask, new_mask):
+    """Key padding mask over [cached | new] keys; None when no row has padding."""
+    mask = new_mask if mem_mask is None else torch.cat([mem_mask, new_mask], dim=1)
+    return mask if mask.any() else None
+
+def _positions(pos_encoding, offsets, length):
+    """Positional encodings [B, length, d] continuing each row's session at its offset."""
+    index = torch.as_tensor(offsets)[:, None] + torch.arange(length)[None, :]
+    # Only padding can reach past the table (rows are rebased before that); its value is masked
+    index = index.clamp(max=pos_encoding.pe.size(1) - 1)
+    return pos_encoding.pe[0, index]
+
+def _feed_forward(layer, x):
+    return layer.linear2(layer.dropout(layer.activation(layer.linear1(x))))
+
+def _encoder_layer_step(layer, x, mem, key_padding_mask=None):
+    """nn.TransformerEncoderLayer over new tokens `x`, with keys/values extended by cached inputs `mem`."""
+    kv = x if mem is None else torch.cat([mem, x], dim=1)
+    if layer.norm_first:
+        kv = layer.norm1(kv)
+        x = x + layer.dropout1(layer.self_attn(layer.norm1(x), kv, kv, key_padding_mask=key_padding_mask, need_weights=False)[0])
+        return x + layer.dropout2(_feed_forward(layer, layer.norm2(x)))
+    x = layer.norm1(x + layer.dropout1(layer.self_attn(x, kv, kv, key_padding_mask=key_padding_mask, need_weights=False)[0]))
+    return layer.norm2(x + layer.dropout2(_feed_forward(layer, x)))
+
+def _decoder_layer_step(layer, y, mem, memory, key_padding_mask=None, memory_key_padding_mask=None):
+    """nn.TransformerDecoderLayer over new tokens `y`, with self-attention keys/values extended by `mem`."""
+    kv = y if mem is None else torch.cat([mem, y], dim=1)
+    if layer.norm_first:
+        kv = layer.norm1(kv)
+        y = y + layer.dropout1(layer.self_attn(layer.norm1(y), kv, kv, key_padding_mask=key_padding_mask, need_weights=False)[0])
+        y = y + layer.dropout2(layer.multihead_attn(
+            layer.norm2(y), memory, memory, key_padding_mask=memory_key_padding_mask, need_weights=False
+        )[0])
+        return y + layer.dropout3(_feed_forward(layer, layer.norm3(y)))
+    y = layer.norm1(y + layer.dropout1(layer.self_attn(y, kv, kv, key_padding_mask=key_padding_mask, need_weights=False)[0]))
+    y = layer.norm2(y + layer.dropout2(layer.multihead_attn(
+        y, memory, memory, key_padding_mask=memory_key_padding_mask, need_weights=False
+    )[0]))
+    return layer.norm3(y + layer.dropout3(_feed_forward(layer, y)))
+
+class SAINTSessionState:
+    """
+    What SAINT keeps for one student between packets in session mode:
+    each layer's inputs for the cached tokens (their keys/values are re-projected from these),
+    the encoder output the decoder cross-attends to, the position counters, and the cached
+    token ids (to re-encode the session from position 0 before it outgrows the positional table).
+    """
+    def __init__(self, enc_mems, memory, dec_mems, context_position=0, behavior_position=0,
+                 context_tokens=None, behavior_tokens=None):
+        self.enc_mems = enc_mems
+        self.memory = memory
+        self.dec_mems = dec_mems
+        self.context_position = context_position
+        self.behavior_position = behavior_position
+        self.context_tokens = context_tokens
+        self.behavior_tokens = behavior_tokens
+
+    @classmethod
+    def empty(cls, num_encoder_layers, num_decoder_layers):
+        return cls([None] * num_encoder_layers, None, [None] * num_decoder_layers)
+
+    def extend(self, enc_inputs, memory, dec_inputs, context_tokens, behavior_tokens, max_cached_tokens=None):
+        """Appends the new tokens' states (and ids, [1, n]), keeping at most `max_cached_tokens` per sequence."""
+        def append(mem, new):
+            # A copy either way: `new` is usually a row of a batch tensor the state mustn't keep alive
+            out = new.clone() if mem is None else torch.cat([mem, new], dim=1)
+            if max_cached_tokens is not None and out.size(1) > max_cached_tokens:
+                out = out[:, -max_cached_tokens:]
+            return out.detach()
+
+        if max_cached_tokens is not None and memory.size(1) > max_cached_tokens:
+            memory = memory[:, -max_cached_tokens:]
+        return SAINTSessionState(
+            [append(m, x) for m, x in zip(self.enc_mems, enc_inputs)],
+            memory.detach(),
+            [append(m, y) for m, y in zip(self.dec_mems, dec_inputs)],
+            self.context_position + context_tokens.size(1),
+            self.behavior_position + behavior_tokens.size(1),
+            append(self.context_tokens, context_tokens),
+            append(self.behavior_tokens, behavior_tokens)
+        )
+
+    @property
+    def nbytes(self):
+        tensors = self.enc_mems + self.dec_mems + [self.memory, self.context_tokens, self.behavior_tokens]
+        tensors = [t for t in tensors if t is not None]
+        return sum(t.element_size() * t.nelement() for t in tensors)
@@ -0,0 +1,138 @@
+import json
+import os
+import torch
+import torch.nn as nn
+from app.models.saint_model import NUM_CONCEPTS, NUM_INTERACTIONS, SAINT
+
+# Serving graphs for SAINT, all built from the same fp32 weights:
+#   eager             the nn.Module as trained
+#   int8              Linear layers dynamically quantized to int8 (weights int8, activations quantized per call)
+#   torchscript       torch.jit.script + freeze (no Python dispatch per layer)
+#   torchscript_int8  both
+#   compiled          torch.compile(dynamic=True); compiles on first calls, nothing to export
+SAINT_VARIANTS = ("eager", "int8", "torchscript", "torchscript_int8", "compiled")
+SCRIPTED_VARIANTS = ("torchscript", "torchscript_int8")
+
+def load_fp32(saint_path: str, mmap: bool = False) -> SAINT:
+    """
+    The trained fp32 SAINT. With `mmap`, parameters are views of the memory-mapped weights file
+    instead of private copies, so every process serving the same file shares its pages.
+    """
+    if not mmap:
+        model = SAINT(num_concepts=NUM_CONCEPTS, num_interactions=NUM_INTERACTIONS)
+        model.load_state_dict(torch.load(saint_path, map_location="cpu"))
+        model.eval()
+        return model
+
+    # Built on the meta device (no allocation), then pointed at the mapped tensors
+    with torch.device("meta"):
+        model = SAINT(num_concepts=NUM_CONCEPTS, num_interactions=NUM_INTERACTIONS)
+    state_dict = torch.load(saint_path, map_location="cpu", mmap=True, weights_only=True)
+    model.load_state_dict(state_dict, assign=True)
+    model.eval()
+    return model
+
+def quantize_int8(model: nn.Module) -> nn.Module:
+    """Dynamic int8 quantization of every nn.Linear (feed-forward blocks and the output head).
+    Attention in-projections are packed parameters, not Linear modules, and stay fp32."""
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+def script(model: nn.Module):
+    scripted = torch.jit.script(model)
+    try:
+        # Folds weights/attributes into the graph as constants
+        return torch.jit.freeze(scripted)
+    except RuntimeError as e:
+        print(f"⚠️ torch.jit.freeze failed, serving the unfrozen script: {e}")
+        return scripted
+
+def build_variant(model: SAINT, variant: str):
+    """Turns an eval-mode fp32 SAINT into the requested serving graph."""
+    if variant not in SAINT_VARIANTS:
+        raise ValueError(f"Unknown SAINT_VARIANT '{variant}'. Expected one of {SAINT_VARIANTS}.")
+    if variant == "eager":
+        return model
+    if variant == "compiled":
+        return torch.compile(model, dynamic=True)
+    if variant in ("int8", "torchscript_int8"):
+        model = quantize_int8(model)
+    if variant in SCRIPTED_VARIANTS:
+        model = script(model)
+    return model
+
+# --- Export gate records and artifacts ---
+
+def artifact_path(saint_path: str, variant: str) -> str:
+    """e.g. app/ml_assets/saint_weights.pt -> app/ml_assets/saint_weights.torchscript_int8.pt"""
+    root, ext = os.path.splitext(saint_path)
+    return f"{root}.{variant}{ext or '.pt'}"
+
+def gate_record_path(saint_path: str, variant: str) -> str:
+    """e.g. app/ml_assets/saint_weights.pt -> app/ml_assets/saint_weights.int8.gate.json"""
+    root, _ = os.path.splitext(saint_path)
+    return f"{root}.{variant}.gate.json"
+
+def save_gate_record(saint_path: str, variant: str, source_md5: str, report: dict):
+    """Records the export gate's verdict on `variant` for the weights with `source_md5` (every variant, passed or not)."""
+    path = gate_record_path(saint_path, variant)
+    with open(path, "w") as f:
+        json.dump({"variant": variant, "source_md5": source_md5, "passed": bool(report.get("passed")), "gate": report}, f, indent=2)
+    return path
+
+def gate_passed(saint_path: str, variant: str, source_md5: str) -> bool:
+    try:
+        with open(gate_record_path(saint_path, variant), "r") as f:
+            record = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+    return record.get("source_md5") == source_md5 and record.get("passed") is True
+
+def save_artifact(module, saint_path: str, variant: str, source_md5: str, report: dict = None):
+    """Saves a scripted variant next to the fp32 weights, tagged with the weights it was built from."""
+    path = artifact_path(saint_path, variant)
+    torch.jit.save(module, path)
+    with open(f"{path}.json", "w") as f:
+        json.dump({"variant": variant, "source_md5": source_md5, "gate": report}, f, indent=2)
+    return path
+
+def _artifact_matches(path: str, source_md5: str) -> bool:
+    try:
+        with open(f"{path}.json", "r") as f:
+            return json.load(f).get("source_md5") == source_md5
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+
+def gated_variant(saint_path: str, variant: str) -> str:
+    """
+    The variant to serve: `variant` when the export gate passed it for the current weights,
+    otherwise "eager" (an ungated graph never serves, however it was obtained).
+    """
+    if variant not in SAINT_VARIANTS:
+        raise ValueError(f"Unknown SAINT_VARIANT '{variant}'. Expected one of {SAINT_VARIANTS}.")
+    if variant == "eager":
+        return variant
+    from app.core.model_loader import file_md5
+
+    if gate_passed(saint_path, variant, file_md5(saint_path)):
+        return variant
+    print(f"⚠️ SAINT_VARIANT='{variant}' has no passing export gate record for the current weights "
+          f"(run ml/training/export_saint.py); serving 'eager'.")
+    return "eager"
+
+def load_saint(saint_path: str, variant: str = "eager", mmap: bool = False):
+    """
+    SAINT for serving as `variant`, which the caller has already resolved with gated_variant
+    (so the weights are hashed and the gate reported once per load). Scripted variants come
+    from their exported artifact; if it is missing they are rebuilt here from the same weights
+    the gate checked.
+    `mmap` shares the fp32 weights across processes; only "eager" and "compiled" serve them
+    as-is (the other variants repack the weights into private memory).
+    """
+    if variant in SCRIPTED_VARIANTS:
+        from app.core.model_loader import file_md5
+
+        path = artifact_path(saint_path, variant)
+        if os.path.exists(path) and _artifact_matches(path, file_md5(saint_path)):
+            return torch.jit.load(path, map_location="cpu")
+        print(f"⚠️ No exported {variant} SAINT for the current weights; building it at load time.")
+    return build_variant(load_fp32(saint_path, mmap=mmap), variant)
@@ -0,0 +1,49 @@
+"""
+Read-only model weights shared by every serving worker on a host (MODEL_SHARED_WEIGHTS).
+
+Each uvicorn worker is a separate, spawned process with its own InferenceService, so loading
+before a fork wouldn't share anything. Instead the weights are memory-mapped from files: the
+page cache holds one copy and every worker maps it read-only.
+
+  - SAINT: the weights file itself (torch.save's zip format maps directly, see load_fp32)
+  - Policy head: the PPO archive is compressed and can't be mapped, so its actor weights are
+    exported once to `<archive>.head.pt`, tagged with the archive's md5 like SAINT's variants
+"""
+import json
+import os
+from app.core.model_loader import file_md5
+from app.models.policy_head import PolicyHead
+
+def policy_head_path(rl_path: str) -> str:
+    """e.g. app/ml_assets/ppo_student_policy.zip -> app/ml_assets/ppo_student_policy.head.pt"""
+    root = rl_path[:-len(".zip")] if rl_path.endswith(".zip") else rl_path
+    return f"{root}.head.pt"
+
+def _export_matches(path: str, source_md5: str) -> bool:
+    try:
+        with open(f"{path}.json", "r") as f:
+            return os.path.exists(path) and json.load(f).get("source_md5") == source_md5
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+
+def _replace(path: str, write):
+    # Temp name + rename: workers exporting at the same time never see a partial file, and
+    # workers still mapping the previous export keep its (unlinked) pages
+    tmp = f"{path}.{os.getpid()}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+def load_shared_policy_head(rl_path: str) -> PolicyHead:
+    """The serving policy head, memory-mapped from its export (written first if missing or stale)."""
+    archive = rl_path if rl_path.endswith(".zip") else f"{rl_path}.zip"
+    source_md5 = file_md5(archive)
+    path = policy_head_path(archive)
+    if not _export_matches(path, source_md5):
+        _replace(path, PolicyHead.from_sb3_zip(archive).save)
+
+        def write_sidecar(tmp):
+            with open(tmp, "w") as f:
+                json.dump({"source_md5": source_md5}, f)
+        # The weights land before the tag that vouches for them
+        _replace(f"{path}.json", write_sidecar)
+    return PolicyHead.load(path, mmap=True)
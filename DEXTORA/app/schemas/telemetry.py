@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 
 class TelemetryEvent(BaseModel):
     event_type: str # e.g., "scroll", "video_pause", "tab_switch"
@@ -17,4 +17,16 @@ class TelemetryBatch(BaseModel):
         """Converts the batch into list format for the SAINT model."""
         context_seq = [e.context_id for e in self.events]
         behavior_seq = [e.behavior_id for e in self.events]
-        return context_seq, behavior_seq
\ No newline at end of file
+        return context_seq, behavior_seq
+
+class GatewayEvent(BaseModel):
+    """One item of a live `telemetry_batch` packet on the WebSocket gateway."""
+    context_id: int
+    behavior_id: int
+    duration_ms: float = 0
+    intensity: Union[float, Dict[str, float]] = 0.5 # Scalar, or per-signal values that get averaged
+    tab_switches: int = 0
+
+class GatewayPacket(BaseModel):
+    """The packet the gateway receives per message (JSON / MessagePack row form)."""
+    telemetry_batch: List[GatewayEvent] = Field(min_length=1)
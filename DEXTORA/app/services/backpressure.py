@@ -0,0 +1,104 @@
+import asyncio
+from app.core.config import settings
+
+_CLOSED = object()
+
+class ConnectionInbox:
+    """
+    Bounded per-socket inbox between the receive loop and inference.
+
+    A reader task (`fill`) keeps receiving decoded packets (TelemetryFrames) while the previous packet is being served; once
+    `max_size` packets are waiting it stops reading, so a client can't get further ahead than
+    that (the socket's own flow control takes over). Whatever piled up is then served as one
+    inference according to `policy`:
+      - "merge":  the queued packets' events are concatenated, oldest first, into one packet
+      - "latest": superseded packets are dropped and only the newest is answered
+      - "none":   every packet is served on its own, in order
+    """
+    POLICIES = ("merge", "latest", "none")
+
+    def __init__(self, max_size: int = 32, policy: str = "merge"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown WS_COALESCE_POLICY '{policy}'. Expected one of {self.POLICIES}.")
+        self.policy = policy
+        self._queue = asyncio.Queue()
+        self._room = asyncio.Semaphore(max(1, max_size))  # Free inbox slots; the close marker needs none
+        self._held = None  # An invalid packet found while draining, served on its own next
+        self.error = None  # Why the reader stopped (WebSocketDisconnect on a normal close)
+
+    async def fill(self, receive):
+        """
+        Reader task: queues `await receive()` results until the socket closes or fails.
+        Packets that fail to decode (ValueError) are queued as the error, to be answered in order.
+        """
+        try:
+            while True:
+                await self._room.acquire()
+                try:
+                    packet = await receive()
+                except ValueError as e:
+                    packet = e
+                self._queue.put_nowait(packet)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._queue.put_nowait(_CLOSED)
+
+    async def next_packet(self):
+        """
+        The next packet to serve (blocking until one arrives) and how many received packets it
+        stands for, or (None, 0) once the socket is closed. A packet that failed to decode comes
+        back as its ValueError, never merged with others.
+        """
+        first, self._held = self._held, None
+        packets = [first if first is not None else await self._queue.get()]
+        if self.policy != "none" and not isinstance(packets[0], ValueError):
+            while not self._queue.empty() and packets[-1] is not _CLOSED:
+                packet = self._queue.get_nowait()
+                if isinstance(packet, ValueError):
+                    self._held = packet
+                    break
+                packets.append(packet)
+        if packets[-1] is _CLOSED:
+            # The client is gone: nobody is left to answer
+            return None, 0
+        for _ in packets:
+            self._room.release()
+        if len(packets) == 1 or self.policy == "latest":
+            return packets[-1], len(packets)
+        return type(packets[0]).concat(packets), len(packets)
+
+class InflightLimiter:
+    """
+    Global cap on inferences in flight across every socket of this worker. Past the cap the
+    gateway answers "busy" straight away instead of queueing behind the batcher.
+    """
+    def __init__(self, limit: int = 0):
+        self.limit = limit  # 0 = unlimited
+        self.inflight = 0
+        self.peak_inflight = 0
+        self.admitted = 0
+        self.shed = 0
+
+    def try_acquire(self) -> bool:
+        if self.limit and self.inflight >= self.limit:
+            self.shed += 1
+            return False
+        self.inflight += 1
+        self.admitted += 1
+        self.peak_inflight = max(self.peak_inflight, self.inflight)
+        return True
+
+    def release(self):
+        self.inflight -= 1
+
+    def stats(self):
+        return {
+            "limit": self.limit,
+            "inflight": self.inflight,
+            "peak_inflight": self.peak_inflight,
+            "admitted": self.admitted,
+            "shed": self.shed
+        }
+
+inflight_limiter = InflightLimiter(settings.WS_MAX_INFLIGHT)
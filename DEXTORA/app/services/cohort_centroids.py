@@ -0,0 +1,109 @@
+import asyncio
+import time
+import numpy as np
+from app.core import metrics
+from app.core.config import settings
+from app.db.postgres_client import postgres_client
+
+class CohortCentroids:
+    """
+    In-memory table of mean personality vectors per (grade, curriculum) cohort, used to
+    warm-start students that have no stored profile instead of a zero vector.
+
+    Centroids are aggregated inside Postgres (AVG over student_profiles, grouped by cohort), so
+    a refresh only transfers one row per cohort. Lookups are dict hits with no I/O; unknown
+    cohorts fall back to the global centroid, then to zeros before the first refresh.
+    """
+    def __init__(self, fetch_centroids, refresh_interval_s: float = 600.0, dim: int = 128):
+        self.fetch_centroids = fetch_centroids
+        self.refresh_interval = refresh_interval_s
+        self.dim = dim
+        self._zero = np.zeros(dim, dtype=np.float32)
+        # (index, global centroid, per-cohort matrix) swapped in as one tuple on refresh
+        self._table = ({}, self._zero, np.zeros((0, dim), dtype=np.float32))
+        self._task = None
+        self.refreshes = 0
+        self.failed_refreshes = 0
+        self.last_refresh_ms = None
+        self.last_refresh_at = None
+        self.hits = 0
+        self.fallbacks = 0
+
+    @staticmethod
+    def _key(grade, curriculum):
+        return (int(grade) if grade is not None else None, curriculum)
+
+    def lookup(self, grade=None, curriculum=None) -> np.ndarray:
+        """Warm-start vector for a cohort (a copy; safe to hand to the caller)."""
+        index, global_centroid, matrix = self._table
+        row = index.get(self._key(grade, curriculum))
+        if row is None:
+            self.fallbacks += 1
+            return global_centroid.copy()
+        self.hits += 1
+        return matrix[row].copy()
+
+    async def refresh(self):
+        started = time.perf_counter()
+        try:
+            rows = await self.fetch_centroids()
+        except Exception as e:
+            self.failed_refreshes += 1
+            metrics.CENTROID_REFRESH_FAILURES.inc()
+            print(f"⚠️ Cohort centroid refresh failed, keeping the previous table: {e}")
+            return
+
+        index = {}
+        matrix = np.zeros((len(rows), self.dim), dtype=np.float32)
+        counts = np.zeros(len(rows), dtype=np.float64)
+        for i, (grade, curriculum, centroid, count) in enumerate(rows):
+            index[self._key(grade, curriculum)] = i
+            matrix[i] = centroid
+            counts[i] = count
+
+        # Global centroid = count-weighted mean of the cohort means
+        global_centroid = self._zero
+        if counts.sum() > 0:
+            global_centroid = (counts @ matrix / counts.sum()).astype(np.float32)
+
+        self._table = (index, global_centroid, matrix)
+        self.refreshes += 1
+        self.last_refresh_ms = (time.perf_counter() - started) * 1000
+        self.last_refresh_at = time.time()
+        metrics.CENTROID_REFRESH_SECONDS.observe(self.last_refresh_ms / 1000)
+        metrics.CENTROID_COHORTS.set(len(index))
+        print(f"🧭 Refreshed {len(index)} cohort centroids in {self.last_refresh_ms:.1f} ms.")
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_interval)
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self):
+        index, global_centroid, matrix = self._table
+        return {
+            "cohorts": len(index),
+            "bytes": matrix.nbytes + global_centroid.nbytes,
+            "refreshes": self.refreshes,
+            "failed_refreshes": self.failed_refreshes,
+            "last_refresh_ms": round(self.last_refresh_ms, 2) if self.last_refresh_ms is not None else None,
+            "last_refresh_age_s": round(time.time() - self.last_refresh_at, 1) if self.last_refresh_at else None,
+            "hits": self.hits,
+            "fallbacks": self.fallbacks
+        }
+
+# Singleton instance
+cohort_centroids = CohortCentroids(
+    postgres_client.get_cohort_centroids,
+    refresh_interval_s=settings.COHORT_CENTROID_REFRESH_S
+)
@@ -0,0 +1,309 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import torch
+import numpy as np
+from app.models.policy_head import PolicyHead
+from app.models.saint_model import MAX_SEQ_LEN, NUM_CONCEPTS, NUM_INTERACTIONS, incremental_step_tokens
+from app.models.saint_variants import SCRIPTED_VARIANTS, gated_variant, load_saint
+from app.services.sequence_window import SequenceWindow
+from app.services.dna_decoder import StudentDNADecoder
+from app.core.config import settings
+
+class ModelBundle:
+    """The SAINT encoder, RL policy and DNA decoder used to serve one request."""
+    def __init__(self, saint_path: str, rl_path: str, policy_backend: str = None, version: str = None, saint_variant: str = None):
+        self.saint_path = saint_path
+        self.rl_path = rl_path
+        self.policy_backend = policy_backend or settings.RL_POLICY_BACKEND
+        self.version = version or "unversioned"
+        self.saint_variant = saint_variant or settings.SAINT_VARIANT
+        if settings.SAINT_SESSION_MODE and self.saint_variant in SCRIPTED_VARIANTS:
+            # Session mode calls forward_incremental, which only the Python module has
+            fallback = "int8" if self.saint_variant.endswith("int8") else "eager"
+            print(f"⚠️ SAINT_SESSION_MODE needs a Python SAINT; serving '{fallback}' instead of '{self.saint_variant}'.")
+            self.saint_variant = fallback
+        # Only variants the export gate passed for these weights serve (eager otherwise);
+        # resolved once here and handed to load_saint as-is
+        self.saint_variant = gated_variant(saint_path, self.saint_variant)
+
+        # 0. Shared weights: memory-map them so every worker process on the host shares one copy
+        self.shared_weights = settings.MODEL_SHARED_WEIGHTS
+        if self.shared_weights and self.saint_variant not in ("eager", "compiled"):
+            print(f"⚠️ SAINT_VARIANT='{self.saint_variant}' repacks the weights per process; only the policy is shared.")
+
+        # 1. Load SAINT (The Context/Behavior Processor), as the configured serving graph
+        self.saint = load_saint(saint_path, self.saint_variant, mmap=self.shared_weights)
+
+        # 1b. Per-request token ceiling (truncation / chunked encoding, length buckets)
+        self.window = SequenceWindow.from_settings(settings, max_positions=MAX_SEQ_LEN)
+        if self.window.mode == "chunked" and not hasattr(self.saint, "forward_incremental"):
+            print(f"⚠️ Chunked windows need a Python SAINT; truncating instead for '{self.saint_variant}'.")
+            self.window = SequenceWindow("truncate", self.window.max_tokens, buckets=self.window.buckets,
+                                         carry_tokens=self.window.carry_tokens)
+
+        # 2. Load RL Policy (The Decision Maker)
+        # We only need the actor for inference: by default its MLP weights are pulled out of
+        # the PPO archive and run as bare torch ops, so SB3/gymnasium stay out of the hot path.
+        if self.policy_backend == "head" and self.shared_weights:
+            from app.models.shared_weights import load_shared_policy_head
+            self.rl_policy = load_shared_policy_head(rl_path)
+        elif self.policy_backend == "head":
+            self.rl_policy = PolicyHead.from_sb3_zip(rl_path)
+        elif self.policy_backend == "sb3":
+            from stable_baselines3 import PPO
+            self.rl_policy = PPO.load(rl_path, device="cpu")
+        else:
+            raise ValueError(f"Unknown RL_POLICY_BACKEND '{self.policy_backend}'. Expected 'head' or 'sb3'.")
+
+        # 3. DNA Decoder
+        self.decoder = StudentDNADecoder()
+
+# --- Work units ---
+# Module-level functions taking the bundle first, so the same code runs inline,
+# on a worker thread, or inside a worker process holding its own model copies.
+
+def pad_sequences(seqs: list, pad_to: int = None):
+    """Right-pads token sequences (to at least `pad_to`) into a LongTensor plus a bool key-padding mask."""
+    max_len = max(pad_to or 0, max(len(s) for s in seqs))
+    tokens = torch.zeros((len(seqs), max_len), dtype=torch.long)
+    padding_mask = torch.ones((len(seqs), max_len), dtype=torch.bool)
+    for i, seq in enumerate(seqs):
+        tokens[i, :len(seq)] = torch.as_tensor(seq, dtype=torch.long)
+        padding_mask[i, :len(seq)] = False
+    return tokens, padding_mask
+
+def check_sequences(context_seq: list, behavior_seq: list):
+    """
+    Raises ValueError for a request that would fail the forward pass (and with it every other
+    request batched with it): no events, mismatched lengths or out-of-range ids.
+    """
+    if not context_seq:
+        raise ValueError("A request needs at least one event")
+    if len(context_seq) != len(behavior_seq):
+        raise ValueError(f"context_seq has {len(context_seq)} events but behavior_seq has {len(behavior_seq)}")
+    if min(context_seq) < 0 or max(context_seq) >= NUM_CONCEPTS:
+        raise ValueError(f"context ids must be in [0, {NUM_CONCEPTS})")
+    if min(behavior_seq) < 0 or max(behavior_seq) >= NUM_INTERACTIONS:
+        raise ValueError(f"behavior ids must be in [0, {NUM_INTERACTIONS})")
+
+def _add_time(timings: dict, stage: str, started: float) -> float:
+    """Accumulates the time since `started` under `stage` (no-op without `timings`); returns now."""
+    now = time.perf_counter()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + (now - started)
+    return now
+
+def _padded_forward(saint, context_seqs: list, behavior_seqs: list, pad_to: int = None, timings: dict = None) -> np.ndarray:
+    started = time.perf_counter()
+    context_tensor, context_mask = pad_sequences(context_seqs, pad_to)
+    behavior_tensor, behavior_mask = pad_sequences(behavior_seqs, pad_to)
+
+    # Equal-length batches need no masks (and skip the nested-tensor path)
+    if not context_mask.any() and not behavior_mask.any():
+        context_mask, behavior_mask = None, None
+    started = _add_time(timings, "tensor_build", started)
+
+    with torch.no_grad():
+        vectors = saint(context_tensor, behavior_tensor, context_mask, behavior_mask)
+    vectors = vectors.cpu().numpy()
+    _add_time(timings, "saint", started)
+    return vectors
+
+def encode_chunked(saint, context_seq: list, behavior_seq: list, chunk: int, state=None, max_cached_tokens=None):
+    """
+    Encodes one student's events `chunk` at a time; each chunk attends to the cached states
+    carried over from the previous ones. Returns (personality_vector [1, d_model], state).
+    """
+    chunk = max(1, chunk or len(context_seq))
+    for start in range(0, len(context_seq), chunk):
+        vector, state = saint.forward_incremental(
+            torch.as_tensor([context_seq[start:start + chunk]], dtype=torch.long),
+            torch.as_tensor([behavior_seq[start:start + chunk]], dtype=torch.long),
+            state,
+            max_cached_tokens
+        )
+    return vector, state
+
+def saint_forward(models: ModelBundle, context_seqs: list, behavior_seqs: list, window: SequenceWindow = None, timings: dict = None) -> np.ndarray:
+    """
+    SAINT over a (possibly ragged) batch of students: one padded forward pass per length
+    bucket of `window` (a single pass without one), and chunked encoding for rows longer
+    than the window in "chunked" mode. Stage seconds are added to `timings` when given.
+    """
+    groups = {}
+    for i, (context_seq, behavior_seq) in enumerate(zip(context_seqs, behavior_seqs)):
+        length = max(len(context_seq), len(behavior_seq))
+        if window is None:
+            key = None
+        elif window.needs_chunking(length):
+            key = "chunked"
+        else:
+            key = window.bucket(length)
+        groups.setdefault(key, []).append(i)
+
+    rows = [None] * len(context_seqs)
+    for key, indices in groups.items():
+        if key == "chunked":
+            started = time.perf_counter()
+            chunk = min(window.max_tokens, incremental_step_tokens(window.carry_tokens))
+            with torch.no_grad():
+                for i in indices:
+                    vector, _ = encode_chunked(models.saint, context_seqs[i], behavior_seqs[i], chunk, None, window.carry_tokens)
+                    rows[i] = vector[0].numpy()
+            _add_time(timings, "saint", started)
+            continue
+        vectors = _padded_forward(models.saint, [context_seqs[i] for i in indices], [behavior_seqs[i] for i in indices], key, timings)
+        for j, i in enumerate(indices):
+            rows[i] = vectors[j]
+    return np.stack(rows)
+
+def encode_sessions(models: ModelBundle, sessions, context_seqs: list, behavior_seqs: list, window: SequenceWindow = None) -> np.ndarray:
+    """
+    Session-mode SAINT: each student's new tokens are encoded against the state cached
+    from their earlier packets, all students in one incremental pass per step of at most
+    `window.max_tokens` (and few enough to leave room for the cached history), so longer
+    packets take several steps; the others drop out after their last one.
+    `sessions` is (SessionStateStore, student_ids, max_cached_tokens).
+    """
+    store, student_ids, max_cached_tokens = sessions
+    vectors = np.empty((len(student_ids), models.saint.d_model), dtype=np.float32)
+    states = [store.get(student_id) for student_id in student_ids]
+    longest = max(len(c) for c in context_seqs)
+    chunk = min((window.max_tokens if window else None) or longest, incremental_step_tokens(max_cached_tokens))
+    with torch.no_grad():
+        for start in range(0, longest, chunk):
+            rows = [i for i, c in enumerate(context_seqs) if start < len(c)]
+            step_vectors, step_states = models.saint.forward_incremental_batch(
+                [context_seqs[i][start:start + chunk] for i in rows],
+                [behavior_seqs[i][start:start + chunk] for i in rows],
+                [states[i] for i in rows],
+                max_cached_tokens
+            )
+            step_vectors = step_vectors.numpy()
+            for j, i in enumerate(rows):
+                vectors[i] = step_vectors[j]
+                states[i] = step_states[j]
+    # Only once the whole batch went through: a failed batch is retried row by row and must
+    # not advance the sessions that were encoded before the failure twice
+    for student_id, state in zip(student_ids, states):
+        store.put(student_id, state)
+    return vectors
+
+def to_latent(score):
+    """Helper to convert 0-100 score back to Logit (Latent Space). Works on scalars and arrays."""
+    p = np.clip(np.asarray(score) / 100.0, 0.01, 0.99)
+    return np.log(p / (1 - p))
+
+# Latent index -> DNA label the RL agent must see grounded (must match rl_agent.py)
+GROUNDED_DIMS = ((0, "Mastery"), (10, "Frustration"), (20, "Attention_Span"))
+
+def run_pipeline(models: ModelBundle, context_seqs: list, behavior_seqs: list, telemetry_stats: np.ndarray, ground, sessions=None, timings: dict = None):
+    """
+    SAINT -> DNA decode -> grounding -> RL policy for a batch of students.
+    Returns personality vectors [N, 128], DNA scores [N, 40] and actions [N].
+    With `timings`, adds the seconds spent in tensor_build / saint / decode / policy to it.
+    """
+    # STEP 0: WINDOWING: oversized packets keep their most recent events (bounded compute per request)
+    window = models.window
+    if window is not None:
+        clipped = [window.clip(c, b) for c, b in zip(context_seqs, behavior_seqs)]
+        context_seqs = [c for c, _ in clipped]
+        behavior_seqs = [b for _, b in clipped]
+
+    # STEP 1: SAINT TRANSFORMER OUTPUT (whole packet, or only its new tokens in session mode)
+    if sessions is None:
+        vectors = saint_forward(models, context_seqs, behavior_seqs, window, timings)
+        started = time.perf_counter()
+    else:
+        started = time.perf_counter()
+        vectors = encode_sessions(models, sessions, context_seqs, behavior_seqs, window)
+        started = _add_time(timings, "saint", started)
+
+    # STEP 1.5: DECODE DNA with Heuristics
+    dna = models.decoder.decode_batch(vectors, telemetry_stats)
+
+    # STEP 1.6: GROUNDING: Sync the Vector with the Heuristics
+    # The RL Agent sees the raw vector. We must update the vector to match the
+    # heuristic reality so the agent acts on the "Real" state, not the random Transformer state.
+    ground = np.asarray(ground, dtype=bool)
+    if ground.any():
+        for dim, label in GROUNDED_DIMS:
+            # Back to 2-decimal doubles first, exactly as the scores are serialized
+            scores = np.round(dna[ground, models.decoder.index[label]].astype(np.float64), 2)
+            vectors[ground, dim] = to_latent(scores)
+    started = _add_time(timings, "decode", started)
+
+    # STEP 3: RL AGENT CALCULATION
+    actions, _states = models.rl_policy.predict(vectors, deterministic=True)
+    _add_time(timings, "policy", started)
+    return vectors, dna, np.asarray(actions).reshape(-1)
+
+def run_pipeline_timed(models: ModelBundle, *args):
+    """`run_pipeline` plus its {stage: seconds} breakdown (returned, so it also crosses process boundaries)."""
+    timings = {}
+    vectors, dna, actions = run_pipeline(models, *args, timings=timings)
+    return vectors, dna, actions, timings
+
+# --- Process-pool worker state ---
+_worker_models = None
+
+def _init_worker(saint_path: str, rl_path: str, policy_backend: str, version: str, saint_variant: str, torch_threads: int):
+    global _worker_models
+    torch.set_num_threads(torch_threads)
+    _worker_models = ModelBundle(saint_path, rl_path, policy_backend, version, saint_variant)
+
+def _run_in_worker(fn, *args):
+    return fn(_worker_models, *args)
+
+class InferenceExecutor:
+    """
+    Runs CPU-bound model work off the asyncio event loop.
+
+    Backends:
+      - "inline":  run on the event loop (the old behaviour; useful as a baseline)
+      - "thread":  a thread pool sharing one set of weights; torch releases the GIL in its kernels
+      - "process": a process pool where every worker loads its own model copies
+    """
+    BACKENDS = ("inline", "thread", "process")
+
+    def __init__(self, models: ModelBundle, backend: str = "thread", workers: int = 2, torch_threads: int = 1):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown inference executor '{backend}'. Expected one of {self.BACKENDS}.")
+
+        self.models = models
+        self.backend = backend
+        self.workers = 1 if backend == "inline" else max(1, workers)
+        self.torch_threads = max(1, torch_threads)
+        self._pool = None
+
+        if backend == "thread":
+            # Intra-op threads are process-wide: workers * torch_threads should fit the CPU quota
+            torch.set_num_threads(self.torch_threads)
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        elif backend == "process":
+            # 'spawn' avoids forking a parent whose OpenMP pool is already initialised
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(models.saint_path, models.rl_path, models.policy_backend,
+                          models.version, models.saint_variant, self.torch_threads)
+            )
+        else:
+            torch.set_num_threads(self.torch_threads)
+
+    async def run(self, fn, *args):
+        """Runs `fn(models, *args)` on the configured backend."""
+        if self._pool is None:
+            return fn(self.models, *args)
+
+        loop = asyncio.get_running_loop()
+        if self.backend == "process":
+            return await loop.run_in_executor(self._pool, _run_in_worker, fn, *args)
+        return await loop.run_in_executor(self._pool, fn, self.models, *args)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,162 +1,446 @@
-import torch
+import asyncio
+import time
+from collections import Counter, deque
 import numpy as np
-from app.models.saint_model import SAINT
-from app.models.rl_agent import StudentRSInv
-from stable_baselines3 import PPO
 from app.db.redis_client import redis_client
+from app.db.write_behind import vector_write_behind
+from app.core.config import settings
+from app.core import metrics
+from app.core.tracing import trace_log
+from app.services.dna_decoder import StudentDNADecoder
+from app.services.session_store import SessionStateStore, StudentLocks
+from app.services.trend_store import TrendStore
+from app.services.inference_executor import (
+    InferenceExecutor, ModelBundle, check_sequences, run_pipeline, run_pipeline_timed, to_latent
+)
+from app.services.model_registry import ModelRegistry, ServingModel
+from app.core.model_loader import artifact_version
 
-class StudentDNADecoder:
-    def __init__(self):
-        self.labels = [
-            "Mastery", "Retention", "Fragility", "Velocity", "Error_Density",
-            "Self_Correction", "Cognitive_Load", "Logic_Bias", "Memory_Proxy", "Processing_Speed",
-            "Frustration", "Boredom", "Flow_State", "Fatigue", "Feedback_Sens",
-            "Resilience", "Curiosity", "Confidence", "Elasticity", "Interest",
-            "Attention_Span", "Persistence", "Procrastination", "Focus_Stability", "Switch_Propensity",
-            "Repetition", "Hint_Dependency", "Consistency", "Nav_Style", "Device_Fluency",
-            "Visual", "Auditory", "Read_Write", "Kinetic", "Detail_Orient",
-            "Holistic", "Creative", "Goal_Orient", "Collab_Intent", "Roadmap_Adherence"
-        ]
-
-    def decode(self, vector: np.ndarray, telemetry_batch: list):
+class BatchStats:
+    """Rolling batch-size and queue-wait statistics for tuning the batching window."""
+    def __init__(self, window=2048):
+        self.batches = 0
+        self.requests = 0
+        self.batch_sizes = Counter()
+        self.queue_waits_ms = deque(maxlen=window)
+        self.compute_ms = deque(maxlen=window)
+
+    def record(self, batch_size: int, waits_ms: list, compute_ms: float):
+        self.batches += 1
+        self.requests += batch_size
+        self.batch_sizes[batch_size] += 1
+        self.queue_waits_ms.extend(waits_ms)
+        self.compute_ms.append(compute_ms)
+
+    def snapshot(self):
+        waits = np.array(self.queue_waits_ms) if self.queue_waits_ms else np.zeros(1)
+        computes = np.array(self.compute_ms) if self.compute_ms else np.zeros(1)
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+            "queue_wait_ms": {
+                "avg": round(float(waits.mean()), 3),
+                "p50": round(float(np.percentile(waits, 50)), 3),
+                "p95": round(float(np.percentile(waits, 95)), 3),
+                "max": round(float(waits.max()), 3)
+            },
+            "compute_ms": {
+                "avg": round(float(computes.mean()), 3),
+                "p95": round(float(np.percentile(computes, 95)), 3)
+            }
+        }
+
+class _PendingRequest:
+    __slots__ = ("student_id", "context_seq", "behavior_seq", "telemetry_stats", "ground", "future", "enqueued_at")
+
+    def __init__(self, student_id, context_seq, behavior_seq, telemetry_stats, ground, future):
+        self.student_id = student_id
+        self.context_seq = context_seq
+        self.behavior_seq = behavior_seq
+        self.telemetry_stats = telemetry_stats
+        self.ground = ground
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+class SAINTBatcher:
+    """
+    Cross-connection dynamic micro-batching for the SAINT pipeline.
+    Requests from every open socket are queued and flushed as one padded forward pass
+    (followed by batched DNA decoding and one policy call) once `max_batch_size`
+    requests are waiting or the oldest has waited `max_wait_ms`.
+    Up to `workers` batches run at once; while they do, new requests keep queueing.
+    Each batch runs on the model version current when it is flushed (`get_serving`).
+    Requests are checked before they are queued, and a batch that still fails is retried row
+    by row, so one bad request never fails the others it was batched with.
+    """
+    def __init__(self, get_serving, workers: int, max_batch_size: int = 32, max_wait_ms: float = 5.0, max_cached_tokens=None):
+        self.get_serving = get_serving
+        self.workers = max(1, workers)
+        self.max_cached_tokens = max_cached_tokens
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.stats = BatchStats()
+        self._queue = None   # Created lazily so it binds to the serving event loop
+        self._slots = None
+        self._worker = None
+        self._flushes = set()  # Batches being served (the loop only keeps weak references to tasks)
+
+    async def submit(self, student_id: str, context_seq: list, behavior_seq: list, telemetry_stats: np.ndarray, ground: bool = True):
         """
-        Calculates 40 psychological & cognitive metrics using latent vector 
-        cross-referenced with real-time telemetry heuristics.
+        Queues one student's request and waits for its (vector, dna_row, action, model_version) of the batched output.
+        Raises ValueError right away for a request the model can't run (see check_sequences).
         """
-        dna = {}
-        # Calculate heuristics from raw telemetry
-        # Intensity: How 'active' the student is (0.0 to 1.0)
-        if telemetry_batch:
-            avg_intensity = np.mean([
-                np.mean(list(e.get('intensity').values())) if isinstance(e.get('intensity'), dict) 
-                else e.get('intensity', 0.5) 
-                for e in telemetry_batch
-            ])
-            total_duration = sum(e.get('duration_ms', 0) for e in telemetry_batch)
-            total_switches = sum(e.get('tab_switches', 0) for e in telemetry_batch)
-            batch_size = len(telemetry_batch)
-        else:
-            avg_intensity = 0.5
-            total_duration = 0
-            total_switches = 0
-            batch_size = 0
-
-        for i, label in enumerate(self.labels):
-            latent_val = float(vector[i % 128])
-            # Sigmoid Squash to 0-100 (Base Score)
-            base_score = 1 / (1 + np.exp(-latent_val)) * 100
-            
-            # --- 🛠️ INDUSTRY-STANDARD HEURISTICS ---
-            if label == "Attention_Span":
-                # If only 1 packet, start at a 'Neutral' 65% instead of 0%
-                if batch_size < 2:
-                    score = 65.0 
+        check_sequences(context_seq, behavior_seq)
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.workers)
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_PendingRequest(student_id, context_seq, behavior_seq, telemetry_stats, ground, future))
+        return await future
+
+    async def close(self):
+        """
+        Stops batching: batches already flushing finish and answer their callers, requests
+        still queued fail with RuntimeError instead of waiting forever.
+        """
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if not item.future.done():
+                item.future.set_exception(RuntimeError("SAINT batcher closed before the request was served"))
+
+    async def _run(self):
+        while True:
+            # Wait for a free executor slot first, so requests pile up into bigger batches
+            await self._slots.acquire()
+            batch = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = batch[0].enqueued_at + self.max_wait
+
+                # Collect until the batch is full or the oldest request hits its deadline
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Closing: hand a half-collected batch back for close() to answer
+                for item in batch:
+                    self._queue.put_nowait(item)
+                self._slots.release()
+                raise
+
+            flush = asyncio.create_task(self._flush(batch))
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: list):
+        try:
+            # Callers that went away (socket closed) don't need a row
+            batch = [item for item in batch if not item.future.cancelled()]
+            if not batch:
+                return
+
+            started = time.perf_counter()
+            serving = self.get_serving().acquire()
+            try:
+                try:
+                    vectors, dna, actions, timings = await self._forward(serving, batch)
+                    rows = [(vectors[i], dna[i], int(actions[i]), serving.version) for i in range(len(batch))]
+                except Exception as e:
+                    if len(batch) == 1:
+                        raise
+                    # Isolate the failing request(s): every other row still gets its answer
+                    print(f"⚠️ SAINT batch of {len(batch)} failed ({e}); retrying row by row.")
+                    rows, timings = await self._forward_rows(serving, batch)
+            except Exception as e:
+                # A single request failing on its own
+                if not batch[0].future.done():
+                    batch[0].future.set_exception(e)
+                return
+            finally:
+                serving.release()
+            finished = time.perf_counter()
+
+            # Route each row back to the socket awaiting it
+            for item, row in zip(batch, rows):
+                if item.future.done():
+                    continue
+                if isinstance(row, Exception):
+                    item.future.set_exception(row)
                 else:
-                    # Hybrid: Reward high intensity, Penalize switches
-                    # Formula: Base * (1 + Intensity) / (Switches + 1)
-                    score = base_score * (1 + avg_intensity) / (total_switches + 1)
-            
-            elif label == "Frustration":
-                # Formula: High Intensity + Low Progress = High Frustration
-                score = (avg_intensity * 0.7 + latent_val * 0.3) * 100
-                
-            elif label == "Cognitive_Load":
-                # Formula: (Interactions / Duration) * Complexity_Weight
-                duration_min = (total_duration / 60000) if total_duration > 0 else 1
-                score = (avg_intensity / duration_min) * 50
-                
-            elif label == "Boredom":
-                # Boredom increases if Intensity is low but Duration is high
-                score = base_score
-                if avg_intensity < 0.3:
-                    score += 15.0 
-            
-            else:
-                score = base_score
-
-            # Clean formatting: 2 decimals only, capped at 100
-            dna[label] = round(max(0, min(100.0, float(score))), 2)
-            
-        return dna
+                    item.future.set_result(row)
+
+            waits = [started - item.enqueued_at for item in batch]
+            self.stats.record(len(batch), [w * 1000 for w in waits], (finished - started) * 1000)
+            metrics.observe_stages(timings)
+            metrics.BATCH_SIZE.observe(len(batch))
+            queue_wait = metrics.STAGE_SECONDS.labels("queue_wait")
+            for wait in waits:
+                queue_wait.observe(wait)
+        finally:
+            self._slots.release()
+
+    async def _forward(self, serving: ServingModel, batch: list):
+        return await serving.executor.run(
+            run_pipeline_timed,
+            [item.context_seq for item in batch],
+            [item.behavior_seq for item in batch],
+            np.stack([item.telemetry_stats for item in batch]),
+            [item.ground for item in batch],
+            _session_args(serving, [item.student_id for item in batch], self.max_cached_tokens)
+        )
+
+    async def _forward_rows(self, serving: ServingModel, batch: list):
+        """One pass per request: ([row or the exception it raised, ...], summed timings)."""
+        rows, timings = [], {}
+        for item in batch:
+            try:
+                vectors, dna, actions, row_timings = await self._forward(serving, [item])
+            except Exception as e:
+                rows.append(e)
+                continue
+            rows.append((vectors[0], dna[0], int(actions[0]), serving.version))
+            for stage, seconds in row_timings.items():
+                timings[stage] = timings.get(stage, 0.0) + seconds
+        return rows, timings
+
+def _session_args(serving: ServingModel, student_ids: list, max_cached_tokens):
+    """run_pipeline's `sessions` argument: the serving version's state store, or None outside session mode."""
+    if serving.session_store is None:
+        return None
+    return serving.session_store, student_ids, max_cached_tokens
 
 class InferenceService:
-    def __init__(self):
-        # 1. Load SAINT (The Context/Behavior Processor)
-        self.saint = SAINT(num_concepts=1000, num_interactions=20)
-        self.saint.load_state_dict(torch.load("app/ml_assets/saint_weights.pt", map_location="cpu"))
-        self.saint.eval()
-
-        # 2. Load RL Policy (The Decision Maker)
-        # We only need the policy for inference, not the whole environment
-        self.rl_policy = PPO.load("app/ml_assets/ppo_student_policy", device="cpu")
+    def __init__(self, executor: InferenceExecutor = None):
+        # 1-3. Load SAINT, the RL Policy and the DNA Decoder
+        models = executor.models if executor else self._load_bundle(artifact_version([settings.SAINT_MODEL_PATH, settings.RL_MODEL_PATH]))
+        self.decoder = models.decoder
         
-        # 3. DNA Decoder
-        self.decoder = StudentDNADecoder()
-        
-        # 4. Trend Memory
-        self.prev_dna = {} # Stores the last state for each student
+        # 4. Trend Memory: bounded store of each student's last DNA row (Redis-backed across workers)
+        trend_backend = settings.TREND_STORE_BACKEND
+        if settings.SERVING_WORKERS > 1 and trend_backend != "redis":
+            # A reconnect may land on another worker, which would see no (or a stale) previous row
+            raise ValueError(
+                f"SERVING_WORKERS={settings.SERVING_WORKERS} needs TREND_STORE_BACKEND='redis' "
+                f"(got '{trend_backend}'): per-worker trend memory diverges across reconnects."
+            )
+        self.trend_store = TrendStore(
+            num_labels=len(self.decoder.labels),
+            max_bytes=settings.TREND_STORE_MAX_MB * 1024 * 1024,
+            ttl_seconds=settings.TREND_STORE_TTL_S,
+            redis=redis_client if trend_backend == "redis" else None
+        )
+
+        # 5. Execution backend: keeps model compute off the event loop
+        # 6. Session mode: keep each student's SAINT state across packets
+        # (both belong to the serving model version and are replaced on hot reload)
+        self.session_mode = settings.SAINT_SESSION_MODE
+        if self.session_mode and (executor.backend if executor else settings.INFERENCE_EXECUTOR) == "process":
+            # States live in this process; shipping them to workers every packet defeats the point
+            print("⚠️ SAINT_SESSION_MODE needs the 'thread' or 'inline' executor. Session mode disabled.")
+            self.session_mode = False
+        self.serving = self._serve(executor or self._make_executor(models))
+        self.student_locks = StudentLocks()
+
+        # 7. Cross-connection micro-batcher for the SAINT forward pass
+        self.batcher = SAINTBatcher(
+            lambda: self.serving,
+            self.executor.workers,
+            max_batch_size=settings.SAINT_MAX_BATCH_SIZE,
+            max_wait_ms=settings.SAINT_MAX_BATCH_WAIT_MS,
+            max_cached_tokens=settings.SAINT_SESSION_MAX_TOKENS
+        ) if settings.SAINT_BATCHING_ENABLED else None
+
+    # --- Model versions (hot reload via ModelRegistry) ---
+
+    @property
+    def executor(self) -> InferenceExecutor:
+        return self.serving.executor
+
+    @property
+    def models(self) -> ModelBundle:
+        return self.serving.models
+
+    @property
+    def session_store(self):
+        return self.serving.session_store
 
-    async def get_detailed_trace(self, student_id: str, context_seq: list, behavior_seq: list, telemetry_batch: list):
+    @property
+    def model_version(self) -> str:
+        return self.serving.version
+
+    @staticmethod
+    def _load_bundle(version: str) -> ModelBundle:
+        return ModelBundle(settings.SAINT_MODEL_PATH, settings.RL_MODEL_PATH, version=version)
+
+    @staticmethod
+    def _make_executor(models: ModelBundle) -> InferenceExecutor:
+        return InferenceExecutor(
+            models,
+            backend=settings.INFERENCE_EXECUTOR,
+            workers=settings.INFERENCE_WORKERS,
+            torch_threads=settings.TORCH_NUM_THREADS
+        )
+
+    def _serve(self, executor: InferenceExecutor) -> ServingModel:
+        session_store = SessionStateStore(
+            max_bytes=settings.SAINT_SESSION_STORE_MAX_MB * 1024 * 1024,
+            ttl_seconds=settings.SAINT_SESSION_TTL_S
+        ) if self.session_mode else None
+        return ServingModel(executor.models.version, executor, session_store)
+
+    def load_version(self, version: str) -> ServingModel:
+        """Loads the current artifacts as `version` with their own executor (blocking; run off the loop)."""
+        return self._serve(self._make_executor(self._load_bundle(version)))
+
+    async def warm_up(self, serving: ServingModel):
+        """One pipeline pass per worker so the first real requests don't pay for lazy init."""
+        stats = self.decoder.telemetry_stats([])[np.newaxis, :]
+        await asyncio.gather(*[
+            serving.executor.run(run_pipeline, [[0]], [[0]], stats, [False], None)
+            for _ in range(serving.executor.workers)
+        ])
+
+    def swap(self, serving: ServingModel) -> ServingModel:
+        """Makes `serving` the version new requests run on; returns the previous one."""
+        old, self.serving = self.serving, serving
+        return old
+
+    async def _infer(self, student_id: str, context_seq: list, behavior_seq: list, telemetry_batch: list, ground: bool = True, telemetry_stats: np.ndarray = None):
+        """
+        Runs the model pipeline for one student, through the micro-batcher when enabled.
+        Returns (personality_vector [128], dna_row [40], action, model_version).
+        `telemetry_stats` (already reduced, e.g. from a TelemetryFrame) replaces `telemetry_batch`.
+        """
+        stats = telemetry_stats if telemetry_stats is not None else self.decoder.telemetry_stats(telemetry_batch)
+        if self.session_mode:
+            # One packet per student at a time: each continues from the state the previous one left
+            async with self.student_locks.hold(student_id):
+                return await self._run_model(student_id, context_seq, behavior_seq, stats, ground)
+        return await self._run_model(student_id, context_seq, behavior_seq, stats, ground)
+
+    async def _run_model(self, student_id: str, context_seq: list, behavior_seq: list, stats: np.ndarray, ground: bool):
+        if self.batcher is not None:
+            return await self.batcher.submit(student_id, context_seq, behavior_seq, stats, ground)
+
+        serving = self.serving.acquire()
+        try:
+            vectors, dna, actions, timings = await serving.executor.run(
+                run_pipeline_timed, [context_seq], [behavior_seq], stats[np.newaxis, :], [ground],
+                _session_args(serving, [student_id], settings.SAINT_SESSION_MAX_TOKENS)
+            )
+        finally:
+            serving.release()
+        metrics.observe_stages(timings)
+        return vectors[0], dna[0], int(actions[0]), serving.version
+
+    def end_session(self, student_id: str):
+        """
+        Drops per-session state. Called when the student's socket closes and again when a new one
+        opens: the state only describes packets this worker saw, and a reconnect that went through
+        another worker in between would otherwise continue from a stale session.
+        """
+        if self.session_store is not None:
+            self.session_store.discard(student_id)
+
+    async def shutdown(self):
+        """Stops the batcher (letting batches in flight finish) and the execution backend (called from the app lifespan)."""
+        if self.batcher is not None:
+            await self.batcher.close()
+        self.executor.shutdown()
+
+    def batch_stats(self):
+        """Batch-size / queue-wait stats for tuning SAINT_MAX_BATCH_SIZE and SAINT_MAX_BATCH_WAIT_MS."""
+        if self.batcher is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.batcher.stats.snapshot()}
+
+    def session_stats(self):
+        """Occupancy and hit-rate of the SAINT session-state store."""
+        if self.session_store is None:
+            return {"enabled": False}
+        return {"enabled": True, "locked_students": len(self.student_locks), **self.session_store.stats()}
+
+    async def get_detailed_trace(self, student_id: str, context_seq: list, behavior_seq: list, telemetry_batch: list, telemetry_stats: np.ndarray = None):
         """Full trace for detailed diagnostics tool."""
-        print(f"\n--- 🔍 DETAILED TRACE: {student_id} ---")
-
-        # Convert to Tensors
-        context_tensor = torch.LongTensor([context_seq])
-        behavior_tensor = torch.LongTensor([behavior_seq])
-
-        with torch.no_grad():
-            # STEP 1: SAINT TRANSFORMER OUTPUT
-            personality_vector = self.saint(context_tensor, behavior_tensor)
-            personality_np = personality_vector.cpu().numpy().flatten()
-            
-            # STEP 1.5: DECODE DNA with Heuristics
-            dna = self.decoder.decode(personality_np, telemetry_batch)
-            
-            # STEP 1.6: GROUNDING: Sync the Vector with the Heuristics
-            # The RL Agent sees the raw vector. We must update the vector to match the 
-            # heuristic reality so the agent acts on the "Real" state, not the random Transformer state.
-            # Update Key Indices (must match rl_agent.py)
-            personality_np[0] = self._to_latent(dna.get("Mastery", 50))
-            personality_np[10] = self._to_latent(dna.get("Frustration", 50))
-            personality_np[20] = self._to_latent(dna.get("Attention_Span", 50))
-
-            # STEP 1.8: TREND ANALYSIS
-            trends = self._calculate_trends(student_id, dna)
-            self.prev_dna[student_id] = dna # Update memory
-
-            # STEP 2: CACHE SYNC
-            await redis_client.set_student_vector(student_id, personality_np)
-
-            # STEP 3: RL AGENT CALCULATION
-            action, _states = self.rl_policy.predict(personality_np, deterministic=True)
-            
-            if isinstance(action, np.ndarray):
-                action = int(action.item())
-            
-            command = self._map_action_to_command(action, student_id)
-            
-            return {
-                "dna": dna,
-                "trends": trends,
-                "action": command,
-                "vector_snippet": personality_np[:5].tolist()
+        started = time.perf_counter()
+
+        # STEP 1 - 1.6 & 3: SAINT -> DNA DECODE -> GROUNDING -> RL AGENT
+        # (micro-batched across sockets, computed off the event loop)
+        personality_np, dna_row, action, model_version = await self._infer(student_id, context_seq, behavior_seq, telemetry_batch, telemetry_stats=telemetry_stats)
+        inferred = time.perf_counter()
+
+        # STEP 1.8: TREND ANALYSIS
+        trends = self._calculate_trends(await self.trend_store.get(student_id), dna_row)
+        await self.trend_store.put(student_id, dna_row) # Update memory
+        trended = time.perf_counter()
+
+        # STEP 2: CACHE SYNC (+ checkpoint for the next write-behind flush)
+        await redis_client.set_student_vector(student_id, personality_np, wait=not settings.REDIS_WRITE_BEHIND)
+        if settings.PG_WRITE_BEHIND_ON_UPDATE:
+            vector_write_behind.try_mark_dirty(student_id, personality_np)
+        cached = time.perf_counter()
+        metrics.STAGE_SECONDS.labels("trends").observe(trended - inferred)
+        metrics.STAGE_SECONDS.labels("redis").observe(cached - trended)
+
+        command = self._map_action_to_command(action, student_id)
+        self._record_action(action, command)
+        if trace_log.sampled():
+            trace_log.log(
+                "detailed_trace", student_id=student_id, model_version=model_version, events=len(context_seq),
+                action=action, trends=trends, vector_snippet=personality_np[:5],
+                inference_ms=round((inferred - started) * 1000, 3), total_ms=round((cached - started) * 1000, 3)
+            )
+        
+        response = {
+            "dna": self.decoder.to_dict(dna_row),
+            "trends": trends,
+            "action": command,
+            "vector_snippet": personality_np[:5].tolist(),
+            "model_version": model_version
+        }
+        if settings.RESPONSE_STAGE_TIMINGS:
+            # Server-side stage breakdown (inference includes the micro-batching queue wait)
+            response["timings_ms"] = {
+                "inference": round((inferred - started) * 1000, 3),
+                "trends": round((trended - inferred) * 1000, 3),
+                "cache": round((cached - trended) * 1000, 3),
+                "total": round((cached - started) * 1000, 3)
             }
+        return response
     
     def _to_latent(self, score):
         """Helper to convert 0-100 score back to Logit (Latent Space)."""
-        p = max(0.01, min(0.99, score / 100.0))
-        return np.log(p / (1 - p))
+        return to_latent(score)
 
-    def _calculate_trends(self, student_id, current_dna):
-        if student_id not in self.prev_dna:
+    def _calculate_trends(self, prev, current_dna: np.ndarray):
+        if prev is None:
             return "🆕 New Session: Establishing Baseline"
-        
-        prev = self.prev_dna[student_id]
+
+        def diff(label):
+            i = self.decoder.index[label]
+            return round(float(current_dna[i]), 2) - round(float(prev[i]), 2)
         
         # We track 3 key educational trends
-        att_diff = current_dna['Attention_Span'] - prev['Attention_Span']
-        frus_diff = current_dna['Frustration'] - prev['Frustration']
-        load_diff = current_dna['Cognitive_Load'] - prev['Cognitive_Load']
+        att_diff = diff('Attention_Span')
+        frus_diff = diff('Frustration')
+        load_diff = diff('Cognitive_Load')
         
         report = []
         if att_diff < -5: report.append(f"⚠️ Attention dropping (↓{abs(att_diff):.2f}%)")
@@ -166,51 +450,35 @@ class InferenceService:
         return " | ".join(report) if report else "✅ Steady Progress"
 
     async def get_intervention(self, student_id: str, context_seq: list, behavior_seq: list):
-        print(f"\n--- 🔍 TRACING STUDENT: {student_id} ---")
-        print(f"📥 INPUTS: Context Sequence: {context_seq} | Behavior Sequence: {behavior_seq}")
-
-        # Convert to Tensors
-        context_tensor = torch.LongTensor([context_seq])
-        behavior_tensor = torch.LongTensor([behavior_seq])
-
-        with torch.no_grad():
-            # STEP 1: SAINT TRANSFORMER OUTPUT
-            # This is the 'Latent Personality' representing the student's current state
-            personality_vector = self.saint(context_tensor, behavior_tensor)
-            personality_np = personality_vector.cpu().numpy().flatten()
-            
-            # Display the 'Vibe' of the vector (first 5 dimensions for clarity)
-            print(f"🧠 TRANSFORMER OUTPUT (Personality Vector snippet): {personality_np[:5]}...")
-            print(f"📊 VECTOR MAGNITUDE (Energy): {np.linalg.norm(personality_np):.4f}")
-            
-            # STEP 1.5: DECODE DNA (Simple inference pass, empty batch)
-            dna = self.decoder.decode(personality_np, [])
-            print(f"🧬 DECODED DNA (Top 3): {list(dna.items())[:3]}")
-
-            # STEP 2: CACHE SYNC
-            await redis_client.set_student_vector(student_id, personality_np)
-
-            # STEP 3: RL AGENT CALCULATION
-            # Here we look at the 'Policy' decision
-            action, _states = self.rl_policy.predict(personality_np, deterministic=True)
-            
-            # action needs to be a standard python int, not numpy array
-            if isinstance(action, np.ndarray):
-                action = int(action.item())
-
-            # In a real setup, we'd also look at 'action_probas' to see how 
-            # confident the RL agent is between Video vs. Chatbot
-            print(f"🤖 RL DECISION: Action Index {action}")
-            
-            if action == 0:
-                print("🛑 RESULT: No intervention needed (Student is in flow).")
-                return None
-            
-            command = self._map_action_to_command(action, student_id)
-            print(f"🚀 FINAL OUTPUT: {command['action']} via {command['route']}")
-            print("------------------------------------------\n")
-            
-            return command
+        # STEP 1: SAINT TRANSFORMER OUTPUT
+        # This is the 'Latent Personality' representing the student's current state
+        # STEP 1.5: DECODE DNA (Simple inference pass, empty batch, no grounding)
+        # STEP 3: RL AGENT CALCULATION - here we look at the 'Policy' decision
+        personality_np, dna_row, action, model_version = await self._infer(student_id, context_seq, behavior_seq, [], ground=False)
+
+        # STEP 2: CACHE SYNC
+        cache_started = time.perf_counter()
+        await redis_client.set_student_vector(student_id, personality_np, wait=not settings.REDIS_WRITE_BEHIND)
+        metrics.STAGE_SECONDS.labels("redis").observe(time.perf_counter() - cache_started)
+
+        # In a real setup, we'd also look at 'action_probas' to see how 
+        # confident the RL agent is between Video vs. Chatbot
+        # (action 0: no intervention needed, the student is in flow)
+        command = self._map_action_to_command(action, student_id)
+        self._record_action(action, command)
+        if trace_log.sampled():
+            # The 'Vibe' of the vector (first 5 dimensions), its magnitude and the top of the DNA
+            trace_log.log(
+                "intervention", student_id=student_id, model_version=model_version,
+                context_seq=context_seq, behavior_seq=behavior_seq,
+                vector_snippet=personality_np[:5], vector_norm=round(float(np.linalg.norm(personality_np)), 4),
+                dna_top3=list(self.decoder.to_dict(dna_row).items())[:3], action=action, command=command
+            )
+        return command
+
+    @staticmethod
+    def _record_action(action: int, command):
+        metrics.ACTIONS.labels(command["action"] if command else "NO_INTERVENTION").inc()
 
     def _map_action_to_command(self, action: int, student_id: str):
         """Maps RL integer actions to Flutter deep-link commands."""
@@ -222,5 +490,15 @@ class InferenceService:
         }
         return commands.get(action)
 
-# Singleton instance for the FastAPI app
-inference_service = InferenceService()
\ No newline at end of file
+def create_inference_service():
+    """
+    Builds the app's InferenceService and its ModelRegistry. Blocking (loads the models):
+    called from the app lifespan on a worker thread rather than at import time.
+    """
+    service = InferenceService()
+    registry = ModelRegistry(
+        service,
+        poll_interval_s=settings.MODEL_RELOAD_POLL_S,
+        drain_timeout_s=settings.MODEL_RELOAD_DRAIN_TIMEOUT_S
+    )
+    return service, registry
\ No newline at end of file
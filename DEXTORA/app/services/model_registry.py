@@ -0,0 +1,149 @@
+import asyncio
+import gc
+import time
+from app.core.config import settings
+from app.core.model_loader import artifact_version, download_models_from_gcs
+
+class ServingModel:
+    """
+    One loaded model version: its bundle, the executor running it and its SAINT session
+    states (which are only valid for the weights that produced them). Requests lease the
+    version they started on, so a swap never moves work that is already in flight.
+    """
+    def __init__(self, version: str, executor, session_store=None):
+        self.version = version
+        self.executor = executor
+        self.session_store = session_store
+        self.inflight = 0
+        self.loaded_at = time.time()
+
+    @property
+    def models(self):
+        return self.executor.models
+
+    def acquire(self):
+        self.inflight += 1
+        return self
+
+    def release(self):
+        self.inflight -= 1
+
+    async def drain(self, timeout_s: float):
+        """Waits for in-flight requests on this version to finish. Returns False on timeout."""
+        deadline = time.monotonic() + timeout_s
+        while self.inflight > 0:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    def retire(self):
+        """Frees the executor and weights once nothing references this version."""
+        self.executor.shutdown()
+        if self.session_store is not None:
+            self.session_store.clear()
+
+class ModelRegistry:
+    """
+    Hot reload of the 'global brain'. Polls model storage (or is told to check), loads and
+    warms a changed version in the background, then swaps it into the InferenceService in
+    one assignment. The old version keeps serving its in-flight requests, then is retired,
+    so two copies of the weights only coexist between loading and draining.
+    """
+    def __init__(self, service, poll_interval_s: float = 0.0, drain_timeout_s: float = 30.0, sync_artifacts=None):
+        self.service = service
+        self.poll_interval = poll_interval_s
+        self.drain_timeout = drain_timeout_s
+        self.sync_artifacts = sync_artifacts or download_models_from_gcs
+        self._lock = None  # Created lazily so it binds to the serving event loop
+        self._task = None
+        self.history = []  # (version, loaded_at) of every version served by this process
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_reload_ms = None
+        self.last_check_at = None
+
+    @property
+    def busy(self) -> bool:
+        """True while an update check, load or drain of the previous version is running."""
+        return self._lock is not None and self._lock.locked()
+
+    def _artifact_paths(self):
+        return [settings.SAINT_MODEL_PATH, settings.RL_MODEL_PATH]
+
+    async def check_for_update(self, force: bool = False):
+        """Syncs artifacts from storage and reloads if their content changed. Returns the serving version."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self.last_check_at = time.time()
+            try:
+                # Network and hashing run on a worker thread; the event loop keeps serving
+                await asyncio.to_thread(self.sync_artifacts)
+                version = await asyncio.to_thread(artifact_version, self._artifact_paths())
+            except Exception as e:
+                self.failed_reloads += 1
+                print(f"⚠️ Model update check failed, keeping version {self.service.model_version}: {e}")
+                return self.service.model_version
+
+            if force or version != self.service.model_version:
+                await self._reload(version)
+            return self.service.model_version
+
+    async def _reload(self, version: str):
+        started = time.perf_counter()
+        previous = self.service.model_version
+        print(f"🔄 Loading model version {version} (serving {previous})...")
+        try:
+            # 1. Load weights and start the executor off the event loop
+            serving = await asyncio.to_thread(self.service.load_version, version)
+            # 2. Warm up: first forward passes (and process workers) before taking traffic
+            await self.service.warm_up(serving)
+        except Exception as e:
+            self.failed_reloads += 1
+            print(f"❌ Model version {version} failed to load, still serving {previous}: {e}")
+            return
+
+        # 3. Swap: new requests take the new version from here on
+        old = self.service.swap(serving)
+        self.reloads += 1
+        self.history.append((version, serving.loaded_at))
+        self.last_reload_ms = (time.perf_counter() - started) * 1000
+        print(f"✅ Now serving model version {version} (loaded in {self.last_reload_ms:.0f} ms).")
+
+        # 4. Let requests already running on the old version finish, then free it
+        if not await old.drain(self.drain_timeout):
+            print(f"⚠️ {old.inflight} request(s) still running on version {old.version} after {self.drain_timeout}s; retiring anyway.")
+        old.retire()
+        del old
+        gc.collect()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await self.check_for_update()
+
+    async def start(self):
+        self.history = [(self.service.model_version, self.service.serving.loaded_at)]
+        if self.poll_interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self):
+        return {
+            "version": self.service.model_version,
+            "inflight": self.service.serving.inflight,
+            "polling": self._task is not None and not self._task.done(),
+            "busy": self.busy,
+            "poll_interval_s": self.poll_interval,
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+            "last_reload_ms": round(self.last_reload_ms, 1) if self.last_reload_ms is not None else None,
+            "last_check_age_s": round(time.time() - self.last_check_at, 1) if self.last_check_at else None,
+            "history": [{"version": v, "loaded_at": t} for v, t in self.history]
+        }
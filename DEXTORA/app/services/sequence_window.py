@@ -0,0 +1,93 @@
+import bisect
+import threading
+
+class SequenceWindow:
+    """
+    Hard ceiling on the SAINT compute one request can cost.
+
+    Modes:
+      - "truncate": keep the most recent `max_tokens` events
+      - "chunked":  keep the most recent `max_tokens * max_chunks` events and encode them a
+                    chunk at a time, each chunk attending to the cached states of the last
+                    `carry_tokens` events before it (SAINT.forward_incremental), so attention stays
+                    O(max_tokens^2) per chunk instead of O(len^2) over the whole batch. Chunks are
+                    shortened so the carried history fits in the positional table next to them
+                    (see saint_model.incremental_step_tokens)
+
+    Packets longer than `max_events` lose their oldest events; that is logged (first time, then
+    every LOG_EVERY clips) and counted in `stats`. The default ceiling is the positional table
+    (500 tokens), so lowering SAINT_MAX_TOKENS is what opts in to truncating real packets.
+
+    `buckets` are the padded lengths batches are grouped and padded to, so a single long packet
+    doesn't pad every short one in its batch, and the model sees a handful of distinct shapes.
+    """
+    MODES = ("truncate", "chunked")
+    LOG_EVERY = 1000
+
+    def __init__(self, mode: str = "truncate", max_tokens: int = 500, max_chunks: int = 4, buckets=(), carry_tokens: int = 128):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown SAINT_WINDOW_MODE '{mode}'. Expected one of {self.MODES}.")
+        self.mode = mode
+        self.max_tokens = max(1, max_tokens)
+        self.max_chunks = max(1, max_chunks) if mode == "chunked" else 1
+        self.buckets = sorted({b for b in buckets if 0 < b < self.max_tokens} | {self.max_tokens})
+        self.carry_tokens = max(1, carry_tokens)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.clipped = 0
+        self.chunked = 0
+        self.dropped_tokens = 0
+
+    @classmethod
+    def from_settings(cls, settings, max_positions: int = None):
+        max_tokens = settings.SAINT_MAX_TOKENS
+        if max_positions is not None and max_tokens > max_positions:
+            # Positional encodings only cover `max_positions` tokens per forward pass
+            print(f"⚠️ SAINT_MAX_TOKENS={max_tokens} exceeds the positional table; using {max_positions}.")
+            max_tokens = max_positions
+        buckets = [int(b) for b in settings.SAINT_LENGTH_BUCKETS.split(",") if b.strip()]
+        return cls(settings.SAINT_WINDOW_MODE, max_tokens, settings.SAINT_MAX_CHUNKS, buckets, settings.SAINT_CHUNK_CARRY_TOKENS)
+
+    @property
+    def max_events(self) -> int:
+        return self.max_tokens * self.max_chunks
+
+    def clip(self, context_seq: list, behavior_seq: list):
+        """Most recent events that fit the window (context and behavior are aligned per event)."""
+        length = max(len(context_seq), len(behavior_seq))
+        with self._lock:
+            self.requests += 1
+            if length > self.max_tokens:
+                self.chunked += self.mode == "chunked"
+            if length > self.max_events:
+                self.clipped += 1
+                self.dropped_tokens += length - self.max_events
+                clipped = self.clipped
+        if length <= self.max_events:
+            return context_seq, behavior_seq
+        if (clipped - 1) % self.LOG_EVERY == 0:
+            print(f"⚠️ Packet of {length} events truncated to its most recent {self.max_events} "
+                  f"({clipped} truncated so far; see SAINT_MAX_TOKENS / SAINT_WINDOW_MODE).")
+        return context_seq[-self.max_events:], behavior_seq[-self.max_events:]
+
+    def needs_chunking(self, length: int) -> bool:
+        return self.mode == "chunked" and length > self.max_tokens
+
+    def bucket(self, length: int) -> int:
+        """Smallest bucket that holds `length` tokens."""
+        i = bisect.bisect_left(self.buckets, length)
+        return self.buckets[i] if i < len(self.buckets) else length
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "max_tokens": self.max_tokens,
+                "max_events": self.max_events,
+                "buckets": self.buckets,
+                "carry_tokens": self.carry_tokens,
+                "requests": self.requests,
+                "chunked": self.chunked,
+                "clipped": self.clipped,
+                "dropped_tokens": self.dropped_tokens
+            }
@@ -0,0 +1,104 @@
+import asyncio
+import contextlib
+import threading
+import time
+from collections import OrderedDict
+
+class SessionStateStore:
+    """
+    Bounded in-process store of per-student SAINT session states.
+    Evicts the least recently used sessions once `max_bytes` is exceeded and drops
+    sessions idle for longer than `ttl_seconds`. Thread-safe: inference workers read and
+    write it concurrently.
+    """
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()  # student_id -> (state, last_used)
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, student_id: str):
+        with self._lock:
+            entry = self._entries.get(student_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            state, last_used = entry
+            if time.monotonic() - last_used > self.ttl:
+                self._remove(student_id)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(student_id)
+            self.hits += 1
+            return state
+
+    def put(self, student_id: str, state):
+        with self._lock:
+            if student_id in self._entries:
+                self._remove(student_id)
+            self._entries[student_id] = (state, time.monotonic())
+            self.total_bytes += state.nbytes
+            self._evict()
+
+    def discard(self, student_id: str):
+        with self._lock:
+            if student_id in self._entries:
+                self._remove(student_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def _remove(self, student_id: str):
+        state, _ = self._entries.pop(student_id)
+        self.total_bytes -= state.nbytes
+
+    def _evict(self):
+        now = time.monotonic()
+        # Expired sessions first (oldest are at the front), then LRU until under the cap
+        while self._entries:
+            student_id, (state, last_used) = next(iter(self._entries.items()))
+            if now - last_used <= self.ttl and self.total_bytes <= self.max_bytes:
+                break
+            self._remove(student_id)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+class StudentLocks:
+    """
+    One asyncio lock per student with a request in flight, so a student's packets (e.g. from
+    two sockets) advance their session state one after the other instead of both starting
+    from the same state. Locks are dropped once nobody holds or waits for them.
+    """
+    def __init__(self):
+        self._locks = {}  # student_id -> [lock, holders + waiters]
+
+    @contextlib.asynccontextmanager
+    async def hold(self, student_id: str):
+        entry = self._locks.setdefault(student_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[student_id]
+
+    def __len__(self):
+        return len(self._locks)
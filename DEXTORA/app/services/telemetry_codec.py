@@ -0,0 +1,289 @@
+"""
+Wire protocols for the WebSocket gateway, negotiated per connection.
+
+Clients pick one with the WebSocket subprotocol header (first supported entry wins) or
+`?protocol=`; without either the connection speaks JSON as before.
+
+  - "dextora.json"     text frames, {"telemetry_batch": [{context_id, behavior_id, ...}, ...]}
+  - "dextora.msgpack"  binary MessagePack frames: the same packet, with `telemetry_batch` either as
+                       a list of events or as columns ({"context_id": [...], "behavior_id": [...], ...})
+  - "dextora.bin.v1"   fixed-layout binary frames (below), answered with MessagePack
+
+Fixed layout (little-endian): an 8-byte header (b"DX", version u8, flags u8, n_events u32) then
+five columns of n_events each: context_id i32, behavior_id i32, duration_ms u32, intensity f32,
+tab_switches u16. 8 + 18 * n bytes per packet.
+
+Every protocol decodes straight into a column-wise TelemetryFrame. Only empty packets and id
+ranges (out-of-range ids would fail the whole SAINT batch) are checked on the fast path; event
+lists that don't have the expected shape are run through the GatewayPacket schema, which either
+coerces them or produces the error message sent back to the client.
+"""
+import json
+import struct
+import time
+import numpy as np
+from pydantic import ValidationError
+from app.core import metrics
+from app.models.saint_model import NUM_CONCEPTS, NUM_INTERACTIONS
+from app.schemas.telemetry import GatewayPacket
+from app.services.dna_decoder import (
+    NUM_TELEMETRY_STATS, STAT_AVG_INTENSITY, STAT_BATCH_SIZE, STAT_TOTAL_DURATION, STAT_TOTAL_SWITCHES
+)
+
+try:
+    import orjson
+except ImportError:  # Falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack / binary protocols are then not offered
+    msgpack = None
+
+class TelemetryDecodeError(ValueError):
+    """A message that isn't valid telemetry: answered with an error, the socket stays open."""
+
+class TelemetryFrame:
+    """One packet's telemetry as columns."""
+    __slots__ = ("context", "behavior", "duration_ms", "intensity", "tab_switches")
+
+    def __init__(self, context, behavior, duration_ms, intensity, tab_switches):
+        self.context = context
+        self.behavior = behavior
+        self.duration_ms = duration_ms
+        self.intensity = intensity
+        self.tab_switches = tab_switches
+
+    def __len__(self):
+        return len(self.context)
+
+    @classmethod
+    def concat(cls, frames: list):
+        """One frame holding the events of `frames`, in order (inbox "merge" policy)."""
+        return cls(*[np.concatenate([getattr(f, column) for f in frames]) for column in cls.__slots__])
+
+    def sequences(self):
+        """(context_seq, behavior_seq) as the lists the pipeline takes."""
+        return self.context.tolist(), self.behavior.tolist()
+
+    def stats(self) -> np.ndarray:
+        """StudentDNADecoder.telemetry_stats for this packet, without building event dicts."""
+        stats = np.zeros(NUM_TELEMETRY_STATS)
+        stats[STAT_AVG_INTENSITY] = 0.5
+        if len(self) == 0:
+            return stats
+        stats[STAT_AVG_INTENSITY] = self.intensity.mean()
+        stats[STAT_TOTAL_DURATION] = self.duration_ms.sum()
+        stats[STAT_TOTAL_SWITCHES] = self.tab_switches.sum()
+        stats[STAT_BATCH_SIZE] = len(self)
+        return stats
+
+    def validate(self):
+        """Cheap vectorized checks for what would break inference."""
+        if len(self) == 0:
+            # An all-padding row would come out of SAINT as NaN and be stored and answered
+            raise TelemetryDecodeError("telemetry_batch must contain at least one event")
+        if self.context.min() < 0 or self.context.max() >= NUM_CONCEPTS:
+            raise TelemetryDecodeError(f"context_id must be in [0, {NUM_CONCEPTS})")
+        if self.behavior.min() < 0 or self.behavior.max() >= NUM_INTERACTIONS:
+            raise TelemetryDecodeError(f"behavior_id must be in [0, {NUM_INTERACTIONS})")
+        return self
+
+def _mean_intensity(value):
+    # Per-signal intensities are averaged, as StudentDNADecoder.telemetry_stats does
+    if isinstance(value, dict):
+        return sum(value.values()) / len(value) if value else float("nan")
+    return value
+
+def _frame_from_events(events: list) -> TelemetryFrame:
+    n = len(events)
+    return TelemetryFrame(
+        np.fromiter((e["context_id"] for e in events), np.int64, n),
+        np.fromiter((e["behavior_id"] for e in events), np.int64, n),
+        np.fromiter((e.get("duration_ms", 0) for e in events), np.float64, n),
+        np.fromiter((_mean_intensity(e.get("intensity", 0.5)) for e in events), np.float64, n),
+        np.fromiter((e.get("tab_switches", 0) for e in events), np.float64, n)
+    )
+
+def _frame_from_columns(columns: dict) -> TelemetryFrame:
+    context = np.asarray(columns["context_id"], dtype=np.int64)
+    n = len(context)
+    frame = TelemetryFrame(
+        context,
+        np.asarray(columns["behavior_id"], dtype=np.int64),
+        np.asarray(columns.get("duration_ms", np.zeros(n)), dtype=np.float64),
+        np.asarray(columns.get("intensity", np.full(n, 0.5)), dtype=np.float64),
+        np.asarray(columns.get("tab_switches", np.zeros(n)), dtype=np.float64)
+    )
+    if any(getattr(frame, column).shape != (n,) for column in TelemetryFrame.__slots__):
+        raise TelemetryDecodeError("telemetry_batch columns must be flat and of equal length")
+    return frame
+
+def decode_packet(data) -> TelemetryFrame:
+    """A parsed JSON / MessagePack packet -> TelemetryFrame (event list or column form)."""
+    if not isinstance(data, dict) or "telemetry_batch" not in data:
+        raise TelemetryDecodeError("Expected an object with a telemetry_batch")
+    batch = data["telemetry_batch"]
+    try:
+        if isinstance(batch, dict):
+            return _frame_from_columns(batch).validate()
+        return _frame_from_events(batch).validate()
+    except TelemetryDecodeError:
+        raise
+    except (KeyError, TypeError, ValueError, AttributeError):
+        pass
+
+    # Unexpected shape: the schema either coerces it (e.g. numeric strings) or explains what's wrong
+    try:
+        packet = GatewayPacket.model_validate(data)
+    except ValidationError as e:
+        raise TelemetryDecodeError(str(e)) from None
+    return _frame_from_events([event.model_dump() for event in packet.telemetry_batch]).validate()
+
+# --- Fixed-layout binary frames ---
+
+FRAME_MAGIC = b"DX"
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct("<2sBBI")
+FRAME_COLUMNS = (
+    ("context", "<i4"), ("behavior", "<i4"), ("duration_ms", "<u4"), ("intensity", "<f4"), ("tab_switches", "<u2")
+)
+FRAME_BYTES_PER_EVENT = sum(np.dtype(dtype).itemsize for _, dtype in FRAME_COLUMNS)
+
+def decode_frame(buffer: bytes) -> TelemetryFrame:
+    """Fixed-layout binary frame -> TelemetryFrame (column views over the received bytes)."""
+    if len(buffer) < FRAME_HEADER.size:
+        raise TelemetryDecodeError("Frame shorter than its header")
+    magic, version, _flags, n = FRAME_HEADER.unpack_from(buffer)
+    if magic != FRAME_MAGIC or version != FRAME_VERSION:
+        raise TelemetryDecodeError(f"Not a version {FRAME_VERSION} telemetry frame")
+    if len(buffer) != FRAME_HEADER.size + n * FRAME_BYTES_PER_EVENT:
+        raise TelemetryDecodeError(f"Frame size {len(buffer)} doesn't match {n} events")
+
+    columns, offset = [], FRAME_HEADER.size
+    for _, dtype in FRAME_COLUMNS:
+        column = np.frombuffer(buffer, dtype=dtype, count=n, offset=offset)
+        columns.append(column)
+        offset += column.nbytes
+    context, behavior, duration_ms, intensity, tab_switches = columns
+    # Intensity is averaged in float64 like the JSON path; the others are used as-is
+    return TelemetryFrame(context, behavior, duration_ms, intensity.astype(np.float64), tab_switches).validate()
+
+def encode_frame(frame: TelemetryFrame) -> bytes:
+    """TelemetryFrame -> fixed-layout binary frame (clients, tests and benchmarks)."""
+    parts = [FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, 0, len(frame))]
+    for column, dtype in FRAME_COLUMNS:
+        parts.append(np.ascontiguousarray(getattr(frame, column), dtype=dtype).tobytes())
+    return b"".join(parts)
+
+# --- Response encoding ---
+
+def _to_builtin(value):
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def dumps_json(payload) -> str:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(payload, default=_to_builtin)
+
+def loads_json(text):
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+def pack_msgpack(payload) -> bytes:
+    return msgpack.packb(payload, use_bin_type=True, default=_to_builtin)
+
+# --- Per-connection codecs ---
+
+class WireCodec:
+    """Receives TelemetryFrames from / sends responses to one socket in a given protocol."""
+    name = "json"
+    subprotocol = "dextora.json"
+
+    def __init__(self):
+        self.parse_seconds = metrics.STAGE_SECONDS.labels("parse")
+        self.packets = metrics.PACKETS_RECEIVED.labels(self.name)
+        self.errors = metrics.DECODE_ERRORS.labels(self.name)
+
+    async def receive(self, websocket) -> TelemetryFrame:
+        message = await self._receive_message(websocket)
+        started = time.perf_counter()
+        self.packets.inc()
+        try:
+            frame = self.decode(message)
+        except TelemetryDecodeError:
+            self.errors.inc()
+            raise
+        self.parse_seconds.observe(time.perf_counter() - started)
+        return frame
+
+    async def _receive_message(self, websocket):
+        return await websocket.receive_text()
+
+    def decode(self, message) -> TelemetryFrame:
+        try:
+            data = loads_json(message)
+        except ValueError as e:
+            raise TelemetryDecodeError(f"Invalid JSON: {e}") from None
+        return decode_packet(data)
+
+    async def send(self, websocket, payload: dict):
+        await websocket.send_text(dumps_json(payload))
+
+class MsgpackCodec(WireCodec):
+    name = "msgpack"
+    subprotocol = "dextora.msgpack"
+
+    async def _receive_message(self, websocket):
+        return await websocket.receive_bytes()
+
+    def decode(self, message) -> TelemetryFrame:
+        try:
+            data = msgpack.unpackb(message, raw=False)
+        except Exception as e:
+            raise TelemetryDecodeError(f"Invalid MessagePack: {e}") from None
+        return decode_packet(data)
+
+    async def send(self, websocket, payload: dict):
+        await websocket.send_bytes(pack_msgpack(payload))
+
+class BinaryFrameCodec(MsgpackCodec):
+    name = "binary"
+    subprotocol = "dextora.bin.v1"
+
+    def decode(self, message) -> TelemetryFrame:
+        return decode_frame(message)
+
+CODECS = {codec.name: codec for codec in (WireCodec, MsgpackCodec, BinaryFrameCodec)}
+
+def available_protocols(enabled: str) -> dict:
+    """{name: codec class} for the enabled protocols whose dependencies are installed."""
+    names = [name.strip() for name in enabled.split(",") if name.strip()]
+    return {
+        name: CODECS[name] for name in names
+        if name in CODECS and (name == "json" or msgpack is not None)
+    }
+
+def negotiate(websocket, enabled: str):
+    """
+    The codec for this connection and the subprotocol to accept it with (None for plain JSON).
+    Raises TelemetryDecodeError when the client asked for a protocol that isn't available.
+    """
+    protocols = available_protocols(enabled)
+    by_subprotocol = {codec.subprotocol: codec for codec in protocols.values()}
+
+    offered = websocket.scope.get("subprotocols", [])
+    requested = websocket.query_params.get("protocol")
+    if requested:
+        if requested not in protocols:
+            raise TelemetryDecodeError(f"Unsupported protocol '{requested}'. Available: {sorted(protocols)}")
+        codec = protocols[requested]
+        return codec(), codec.subprotocol if codec.subprotocol in offered else None
+
+    for subprotocol in offered:
+        if subprotocol in by_subprotocol:
+            return by_subprotocol[subprotocol](), subprotocol
+    if "json" not in protocols:
+        raise TelemetryDecodeError(f"No supported protocol requested. Available: {sorted(protocols)}")
+    return WireCodec(), None
@@ -0,0 +1,87 @@
+import time
+from collections import OrderedDict
+import numpy as np
+
+# Rough per-student cost of the id -> slot index (dict entry + key string), counted against the cap
+_INDEX_BYTES_PER_ENTRY = 160
+
+class TrendStore:
+    """
+    Each student's previous DNA row, used for trend analysis.
+
+    Rows live in one preallocated float32 [capacity, num_labels] array; an ordered
+    student_id -> slot map gives LRU order. Capacity is derived from `max_bytes`, and rows
+    idle for longer than `ttl_seconds` are treated as gone.
+
+    With `redis` set (the RedisClient), Redis is the source of truth so every worker sees the
+    same previous row; the local array is then only a fallback while Redis is unreachable.
+    """
+    def __init__(self, num_labels: int = 40, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 21600, redis=None):
+        self.num_labels = num_labels
+        row_bytes = num_labels * 4 + 8 + _INDEX_BYTES_PER_ENTRY
+        self.capacity = max(1, max_bytes // row_bytes)
+        self.ttl = ttl_seconds
+        self.redis = redis
+
+        self._rows = np.zeros((self.capacity, num_labels), dtype=np.float32)
+        self._touched = np.zeros(self.capacity, dtype=np.float64)
+        self._slots = OrderedDict()  # student_id -> slot, least recently used first
+        self._free = list(range(self.capacity - 1, -1, -1))
+        self.evictions = 0
+        self.redis_errors = 0
+
+    async def get(self, student_id: str):
+        """The student's previous DNA row (a copy), or None if there is none."""
+        if self.redis is not None:
+            try:
+                return await self.redis.get_student_dna(student_id, self.num_labels)
+            except Exception as e:
+                self.redis_errors += 1
+                print(f"⚠️ Trend store Redis read failed, using local memory: {e}")
+        return self._get_local(student_id)
+
+    async def put(self, student_id: str, dna_row: np.ndarray):
+        self._put_local(student_id, dna_row)
+        if self.redis is not None:
+            try:
+                await self.redis.set_student_dna(student_id, dna_row, self.ttl)
+            except Exception as e:
+                self.redis_errors += 1
+                print(f"⚠️ Trend store Redis write failed: {e}")
+
+    def _get_local(self, student_id: str):
+        slot = self._slots.get(student_id)
+        if slot is None:
+            return None
+        if time.monotonic() - self._touched[slot] > self.ttl:
+            self._release(student_id)
+            return None
+        self._slots.move_to_end(student_id)
+        return self._rows[slot].copy()
+
+    def _put_local(self, student_id: str, dna_row: np.ndarray):
+        slot = self._slots.get(student_id)
+        if slot is None:
+            if not self._free:
+                # Full: reuse the least recently used slot
+                self._release(next(iter(self._slots)))
+                self.evictions += 1
+            slot = self._free.pop()
+            self._slots[student_id] = slot
+        else:
+            self._slots.move_to_end(student_id)
+        self._rows[slot] = dna_row
+        self._touched[slot] = time.monotonic()
+
+    def _release(self, student_id: str):
+        self._free.append(self._slots.pop(student_id))
+
+    def stats(self):
+        return {
+            "backend": "redis" if self.redis is not None else "memory",
+            "students": len(self._slots),
+            "capacity": self.capacity,
+            "bytes": self._rows.nbytes + self._touched.nbytes + len(self._slots) * _INDEX_BYTES_PER_ENTRY,
+            "evictions": self.evictions,
+            "redis_errors": self.redis_errors
+        }
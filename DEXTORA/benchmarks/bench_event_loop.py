@@ -0,0 +1,121 @@
+"""
+Event-loop latency benchmark for the inference execution backends.
+
+Simulates many concurrent sockets calling `get_detailed_trace` in one event loop and
+reports round-trip latency percentiles plus event-loop lag (how late a 10 ms timer fires,
+i.e. how long every other socket's receive/send would have been stalled).
+
+Run from the DEXTORA directory (models must exist in app/ml_assets/, see ml/data/init_models.py):
+    python -m benchmarks.bench_event_loop --sockets 200 --packets 10
+    python -m benchmarks.bench_event_loop --backends inline thread --redis   # hit a local Redis too
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from contextlib import redirect_stdout
+import numpy as np
+from app.core.config import settings
+import app.services.inference_service as inference_module
+from app.services.inference_executor import InferenceExecutor, ModelBundle
+
+class _InMemoryRedis:
+    """Keeps Redis round-trips out of the measurement unless --redis is given."""
+    def __init__(self):
+        self.vectors = {}
+
+    async def set_student_vector(self, student_id, vector, wait=True):
+        self.vectors[student_id] = vector
+
+def _packet():
+    num_items = random.randint(1, 3)
+    return [{
+        "context_id": random.randint(100, 105),
+        "behavior_id": random.randint(0, 5),
+        "duration_ms": random.randint(30000, 120000),
+        "intensity": random.uniform(0.1, 0.95),
+        "tab_switches": random.randint(0, 8)
+    } for _ in range(num_items)]
+
+async def _socket(service, student_id, packets, interval_s, latencies):
+    for _ in range(packets):
+        batch = _packet()
+        started = time.perf_counter()
+        await service.get_detailed_trace(
+            student_id,
+            [e["context_id"] for e in batch],
+            [e["behavior_id"] for e in batch],
+            batch
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        if interval_s:
+            await asyncio.sleep(interval_s)
+
+async def _loop_lag_probe(lags, stop):
+    tick = 0.01
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(tick)
+        lags.append(max(0.0, (time.perf_counter() - started - tick) * 1000))
+
+async def _run_backend(models, backend, args):
+    executor = InferenceExecutor(models, backend=backend, workers=args.workers, torch_threads=args.torch_threads)
+    service = inference_module.InferenceService(executor=executor)
+
+    # Warm up (spawns process workers, JIT-free first forward)
+    await asyncio.gather(*[_socket(service, f"WARM_{i}", 1, 0, []) for i in range(executor.workers * 2)])
+
+    latencies, lags = [], []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_loop_lag_probe(lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        _socket(service, f"STU_{i}", args.packets, args.interval_ms / 1000, latencies)
+        for i in range(args.sockets)
+    ])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    await service.shutdown()
+
+    lat = np.array(latencies)
+    lag = np.array(lags) if lags else np.zeros(1)
+    return {
+        "backend": backend,
+        "workers": executor.workers,
+        "torch_threads": executor.torch_threads,
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {p: round(float(np.percentile(lat, q)), 2) for p, q in (("p50", 50), ("p95", 95), ("p99", 99))},
+        "loop_lag_ms": {"p99": round(float(np.percentile(lag, 99)), 2), "max": round(float(lag.max()), 2)}
+    }
+
+async def main(args):
+    if not args.redis:
+        inference_module.redis_client = _InMemoryRedis()
+
+    models = ModelBundle(settings.SAINT_MODEL_PATH, settings.RL_MODEL_PATH)
+    results = []
+    for backend in args.backends:
+        # get_detailed_trace prints a trace line per request; keep it out of the timing
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            result = await _run_backend(models, backend, args)
+        results.append(result)
+        print(f"{backend:>8} | rps {result['throughput_rps']:>8} | "
+              f"p50 {result['latency_ms']['p50']:>8} ms | p99 {result['latency_ms']['p99']:>8} ms | "
+              f"loop lag p99 {result['loop_lag_ms']['p99']:>8} ms")
+
+    print(json.dumps({"sockets": args.sockets, "packets": args.packets, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sockets", type=int, default=200)
+    parser.add_argument("--packets", type=int, default=10, help="Packets sent per socket")
+    parser.add_argument("--interval-ms", type=float, default=0.0, help="Pause between a socket's packets")
+    parser.add_argument("--backends", nargs="+", default=["inline", "thread", "process"], choices=InferenceExecutor.BACKENDS)
+    parser.add_argument("--workers", type=int, default=settings.INFERENCE_WORKERS)
+    parser.add_argument("--torch-threads", type=int, default=settings.TORCH_NUM_THREADS)
+    parser.add_argument("--redis", action="store_true", help="Write vectors to the configured Redis instead of memory")
+    asyncio.run(main(parser.parse_args()))
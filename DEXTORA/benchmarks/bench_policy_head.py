@@ -0,0 +1,49 @@
+"""
+Microbenchmark: PPO.predict (stable-baselines3) vs the extracted PolicyHead.
+
+Run from the DEXTORA directory:
+    python -m benchmarks.bench_policy_head --batch-sizes 1 8 32 128
+"""
+import argparse
+import json
+import time
+import numpy as np
+from stable_baselines3 import PPO
+from app.core.config import settings
+from app.models.policy_head import PolicyHead
+
+def _time_per_call(fn, obs, min_seconds=0.5):
+    fn(obs)  # warm-up
+    calls, started = 0, time.perf_counter()
+    while time.perf_counter() - started < min_seconds:
+        fn(obs)
+        calls += 1
+    return (time.perf_counter() - started) / calls
+
+def main(args):
+    sb3_policy = PPO.load(settings.RL_MODEL_PATH, device="cpu")
+    head = PolicyHead.from_sb3_zip(settings.RL_MODEL_PATH)
+
+    results = []
+    for batch_size in args.batch_sizes:
+        obs = np.random.normal(0, 1.0, (batch_size, 128)).astype(np.float32)
+        sb3_s = _time_per_call(lambda o: sb3_policy.predict(o, deterministic=True), obs)
+        head_s = _time_per_call(head.act_batch, obs)
+        results.append({
+            "batch_size": batch_size,
+            "sb3_us_per_call": round(sb3_s * 1e6, 1),
+            "head_us_per_call": round(head_s * 1e6, 1),
+            "sb3_obs_per_sec": round(batch_size / sb3_s),
+            "head_obs_per_sec": round(batch_size / head_s),
+            "speedup": round(sb3_s / head_s, 1)
+        })
+        r = results[-1]
+        print(f"batch {batch_size:>4} | PPO.predict {r['sb3_us_per_call']:>9} us | "
+              f"PolicyHead {r['head_us_per_call']:>8} us | x{r['speedup']}")
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 128])
+    main(parser.parse_args())
@@ -0,0 +1,64 @@
+"""
+Benchmark: environment steps/sec for the RL training envs.
+
+Compares the original StudentRSInv (one student per step, as PPO sees it through a
+DummyVecEnv), N StudentRSInv copies in subprocess workers, and the natively vectorized
+StudentRSVecEnv. With --ppo, also times PPO.learn end to end on each.
+
+Run from the DEXTORA directory:
+    python -m benchmarks.bench_rl_env --n-envs 8 64 256
+    python -m benchmarks.bench_rl_env --n-envs 16 --ppo 20000
+"""
+import argparse
+import json
+import time
+import numpy as np
+from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import DummyVecEnv
+from app.models.rl_agent import StudentRSInv
+from ml.training.train_rl import make_env
+
+def env_steps_per_sec(env, min_seconds: float):
+    env.reset()
+    actions = np.random.randint(0, 5, (env.num_envs,))
+    steps, started = 0, time.perf_counter()
+    while time.perf_counter() - started < min_seconds:
+        env.step(actions)
+        steps += env.num_envs
+    return steps / (time.perf_counter() - started)
+
+def ppo_steps_per_sec(env, timesteps: int):
+    model = PPO("MlpPolicy", env, n_steps=max(1, 2048 // env.num_envs), batch_size=64, verbose=0, device="cpu")
+    started = time.perf_counter()
+    model.learn(total_timesteps=timesteps)
+    return timesteps / (time.perf_counter() - started)
+
+def main(args):
+    setups = [("single", 1)]
+    for n in args.n_envs:
+        setups += [("subproc", n), ("vec", n)]
+
+    results = []
+    for kind, n in setups:
+        env = DummyVecEnv([lambda: StudentRSInv(None)]) if kind == "single" else make_env(kind, None, n, seed=0)
+        result = {"env": kind, "n_envs": n, "env_steps_per_sec": round(env_steps_per_sec(env, args.seconds))}
+        if args.ppo:
+            result["ppo_steps_per_sec"] = round(ppo_steps_per_sec(env, args.ppo))
+        env.close()
+        results.append(result)
+        line = f"{kind:>8} x {n:<4} | env {result['env_steps_per_sec']:>12,} steps/s"
+        if args.ppo:
+            line += f" | PPO.learn {result['ppo_steps_per_sec']:>9,} steps/s"
+        print(line)
+
+    baseline = results[0]["env_steps_per_sec"]
+    for result in results:
+        result["speedup_vs_single"] = round(result["env_steps_per_sec"] / baseline, 1)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n-envs", type=int, nargs="+", default=[8, 64, 256])
+    parser.add_argument("--seconds", type=float, default=2.0, help="Minimum wall time per env measurement")
+    parser.add_argument("--ppo", type=int, default=0, help="Also time PPO.learn for this many timesteps")
+    main(parser.parse_args())
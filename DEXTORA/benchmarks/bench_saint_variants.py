@@ -0,0 +1,86 @@
+"""
+Benchmark: SAINT forward latency and memory per serving variant (see app/models/saint_variants.py).
+
+Latency is timed through the serving `saint_forward` on padded batches of random packets;
+memory is the serialized size of each variant (weights as they sit in RAM).
+
+Run from the DEXTORA directory (models must exist in app/ml_assets/, see ml/data/init_models.py):
+    python -m benchmarks.bench_saint_variants --batch-sizes 1 8 32 --seq-len 16
+    python -m benchmarks.bench_saint_variants --variants eager int8 --torch-threads 2
+"""
+import argparse
+import io
+import json
+import time
+from types import SimpleNamespace
+import numpy as np
+import torch
+from app.core.config import settings
+from app.models.saint_variants import SAINT_VARIANTS, SCRIPTED_VARIANTS, build_variant, load_fp32
+from app.services.inference_executor import saint_forward
+
+def serialized_bytes(model, variant: str) -> int:
+    buffer = io.BytesIO()
+    if variant in SCRIPTED_VARIANTS:
+        torch.jit.save(model, buffer)
+    else:
+        torch.save(getattr(model, "_orig_mod", model).state_dict(), buffer)
+    return buffer.getbuffer().nbytes
+
+def _packets(batch_size: int, seq_len: int, rng):
+    lengths = rng.integers(max(1, seq_len // 2), seq_len + 1, batch_size)
+    return (
+        [rng.integers(0, 1000, n).tolist() for n in lengths],
+        [rng.integers(0, 20, n).tolist() for n in lengths]
+    )
+
+def ms_per_call(models, context_seqs, behavior_seqs, min_seconds: float):
+    for _ in range(3):  # warm-up (torch.compile compiles here)
+        saint_forward(models, context_seqs, behavior_seqs)
+    calls, started = 0, time.perf_counter()
+    while time.perf_counter() - started < min_seconds:
+        saint_forward(models, context_seqs, behavior_seqs)
+        calls += 1
+    return (time.perf_counter() - started) / calls * 1000
+
+def main(args):
+    torch.set_num_threads(args.torch_threads)
+    rng = np.random.default_rng(0)
+    workloads = {b: _packets(b, args.seq_len, rng) for b in args.batch_sizes}
+
+    results = []
+    for variant in args.variants:
+        started = time.perf_counter()
+        saint = build_variant(load_fp32(settings.SAINT_MODEL_PATH), variant)
+        build_s = time.perf_counter() - started
+        models = SimpleNamespace(saint=saint)
+
+        result = {
+            "variant": variant,
+            "build_s": round(build_s, 2),
+            "serialized_mb": round(serialized_bytes(saint, variant) / 2**20, 2),
+            "ms_per_batch": {}
+        }
+        for batch_size, (context_seqs, behavior_seqs) in workloads.items():
+            result["ms_per_batch"][batch_size] = round(ms_per_call(models, context_seqs, behavior_seqs, args.seconds), 3)
+        results.append(result)
+        print(f"{variant:>16} | {result['serialized_mb']:>6} MB | " + " | ".join(
+            f"b{b} {ms:>7} ms" for b, ms in result["ms_per_batch"].items()
+        ))
+
+    baseline = next((r for r in results if r["variant"] == "eager"), None)
+    if baseline:
+        for r in results:
+            r["speedup_vs_eager"] = {
+                b: round(baseline["ms_per_batch"][b] / ms, 2) for b, ms in r["ms_per_batch"].items()
+            }
+    print(json.dumps({"seq_len": args.seq_len, "torch_threads": args.torch_threads, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--variants", nargs="+", default=list(SAINT_VARIANTS), choices=SAINT_VARIANTS)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seq-len", type=int, default=16, help="Max events per packet")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Minimum wall time per measurement")
+    parser.add_argument("--torch-threads", type=int, default=settings.TORCH_NUM_THREADS)
+    main(parser.parse_args())
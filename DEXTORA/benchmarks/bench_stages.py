@@ -0,0 +1,268 @@
+"""
+Per-stage microbenchmark suite with regression baselines.
+
+Times each pipeline stage in isolation: SAINT.forward across batch sizes and sequence lengths,
+DNA decoding, PPO.predict (and the serving PolicyHead), latent grounding, trend analysis and,
+with --redis, set/get_student_vector and hydrate_student_session against a local Redis
+(Postgres lookups during hydration go to an in-memory stand-in).
+
+Each stage reports ops/sec plus Python-heap allocations per op (tracemalloc: peak transient KB
+and retained bytes; tensors from torch's own allocator are not traced). Results are compared
+against a stored JSON baseline; a stage that loses more than --threshold of its throughput, or
+grows its peak allocations by more than that, fails the suite (exit code 1).
+
+Run from the DEXTORA directory (models must exist in app/ml_assets/, see ml/data/init_models.py):
+    python -m benchmarks.bench_stages --save-baseline          # record benchmarks/baselines/stages.json
+    python -m benchmarks.bench_stages                          # compare against it
+    python -m benchmarks.bench_stages --redis --only redis     # just the Redis stages
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+import numpy as np
+import torch
+from app.core.config import settings
+from app.models.policy_head import PolicyHead
+from app.models.saint_variants import load_fp32
+from app.services.dna_decoder import StudentDNADecoder
+from app.services.inference_executor import GROUNDED_DIMS, to_latent
+
+DEFAULT_BASELINE = "benchmarks/baselines/stages.json"
+ALLOC_OPS = 20  # Ops traced per stage for the allocation figures
+
+def _telemetry_batch(rng, n=3):
+    return [{
+        "context_id": int(rng.integers(100, 106)),
+        "behavior_id": int(rng.integers(0, 6)),
+        "duration_ms": int(rng.integers(30000, 120000)),
+        "intensity": float(rng.uniform(0.1, 0.95)),
+        "tab_switches": int(rng.integers(0, 8))
+    } for _ in range(n)]
+
+# --- Measurement ---
+
+def _result(ops: int, seconds: float, peak_bytes: list, retained_bytes: int):
+    return {
+        "ops_per_sec": round(ops / seconds, 1),
+        "us_per_op": round(seconds / ops * 1e6, 2),
+        "peak_alloc_kb_per_op": round(float(np.mean(peak_bytes)) / 1024, 2),
+        "retained_bytes_per_op": round(retained_bytes / ALLOC_OPS, 1)
+    }
+
+def measure(fn, min_seconds: float):
+    """Times a sync op, then traces the allocations of ALLOC_OPS more calls."""
+    fn()  # warm-up
+    ops, started = 0, time.perf_counter()
+    while time.perf_counter() - started < min_seconds:
+        fn()
+        ops += 1
+    seconds = time.perf_counter() - started
+
+    tracemalloc.start()
+    peaks, before = [], tracemalloc.get_traced_memory()[0]
+    for _ in range(ALLOC_OPS):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return _result(ops, seconds, peaks, retained)
+
+async def measure_async(fn, min_seconds: float):
+    """`measure` for coroutine functions."""
+    await fn()
+    ops, started = 0, time.perf_counter()
+    while time.perf_counter() - started < min_seconds:
+        await fn()
+        ops += 1
+    seconds = time.perf_counter() - started
+
+    tracemalloc.start()
+    peaks, before = [], tracemalloc.get_traced_memory()[0]
+    for _ in range(ALLOC_OPS):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        await fn()
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return _result(ops, seconds, peaks, retained)
+
+# --- Stages ---
+
+def model_stages(args, rng):
+    """(name, zero-arg callable) for every compute stage."""
+    saint = load_fp32(settings.SAINT_MODEL_PATH)
+    decoder = StudentDNADecoder()
+    head = PolicyHead.from_sb3_zip(settings.RL_MODEL_PATH)
+    stages = []
+
+    for batch_size in args.batch_sizes:
+        for seq_len in args.seq_lens:
+            context = torch.as_tensor(rng.integers(0, 1000, (batch_size, seq_len)), dtype=torch.long)
+            behavior = torch.as_tensor(rng.integers(0, 20, (batch_size, seq_len)), dtype=torch.long)
+
+            def saint_forward(context=context, behavior=behavior):
+                with torch.no_grad():
+                    saint(context, behavior)
+            stages.append((f"saint.forward[b={batch_size},L={seq_len}]", saint_forward))
+
+    vector = rng.normal(0, 1, 128).astype(np.float32)
+    batch = _telemetry_batch(rng)
+    stages.append(("dna.decode", lambda: decoder.decode(vector, batch)))
+
+    vectors = rng.normal(0, 1, (32, 128)).astype(np.float32)
+    stats = np.stack([decoder.telemetry_stats(_telemetry_batch(rng)) for _ in range(32)])
+    stages.append(("dna.decode_batch[b=32]", lambda: decoder.decode_batch(vectors, stats)))
+
+    try:
+        from stable_baselines3 import PPO
+        ppo = PPO.load(settings.RL_MODEL_PATH, device="cpu")
+        stages.append(("ppo.predict[b=1]", lambda: ppo.predict(vector, deterministic=True)))
+        stages.append(("ppo.predict[b=32]", lambda: ppo.predict(vectors, deterministic=True)))
+    except ImportError:
+        print("⚠️ stable-baselines3 not installed; skipping PPO.predict stages.")
+    stages.append(("policy_head.predict[b=1]", lambda: head.predict(vector, deterministic=True)))
+    stages.append(("policy_head.predict[b=32]", lambda: head.predict(vectors, deterministic=True)))
+
+    dna = decoder.decode_batch(vectors, stats)
+    grounded = [decoder.index[label] for _, label in GROUNDED_DIMS]
+    stages.append(("grounding.to_latent[scalar]", lambda: to_latent(float(dna[0, grounded[0]]))))
+
+    def ground_batch():
+        out = vectors.copy()
+        for (dim, _), column in zip(GROUNDED_DIMS, grounded):
+            out[:, dim] = to_latent(np.round(dna[:, column].astype(np.float64), 2))
+        return out
+    stages.append(("grounding.to_latent[b=32]", ground_batch))
+
+    # _calculate_trends only needs the decoder from the service
+    from app.services.inference_service import InferenceService
+    trend_host = SimpleNamespace(decoder=decoder)
+    prev, current = dna[0], dna[1]
+    stages.append(("trends.calculate", lambda: InferenceService._calculate_trends(trend_host, prev, current)))
+    return stages
+
+async def redis_stages(rng):
+    """Redis stages against the configured (local) server. Postgres lookups hit a stand-in."""
+    from app.db.redis_client import RedisClient
+    from benchmarks.standin_server import install_standins
+
+    install_standins()  # Postgres stand-in for hydrate_student_session's background lookup
+    client = RedisClient()  # Fresh client: install_standins also swapped the singleton's connection
+    await client.client.ping()
+
+    vector = rng.normal(0, 1, 128).astype(np.float32)
+    await client.set_student_vector("BENCH_STAGE", vector)
+    counter = iter(range(10**12))
+
+    async def set_vector():
+        await client.set_student_vector("BENCH_STAGE", vector)
+
+    async def get_vector():
+        await client.get_student_vector("BENCH_STAGE")
+
+    async def hydrate():
+        # A new student every op: the cold path (EXISTS + centroid write + background lookup)
+        await client.hydrate_student_session(f"BENCH_HYDRATE_{next(counter)}", grade=9, curriculum="IB")
+
+    stages = [("redis.set_student_vector", set_vector), ("redis.get_student_vector", get_vector),
+              ("redis.hydrate_student_session", hydrate)]
+    return client, stages
+
+# --- Baselines ---
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """Stage names that regressed beyond `threshold` vs the baseline."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("stages", {}).get(name)
+        if base is None:
+            continue
+        slower = result["ops_per_sec"] < base["ops_per_sec"] * (1 - threshold)
+        # 1 KB of slack so tiny allocation counts don't flap
+        heavier = result["peak_alloc_kb_per_op"] > base["peak_alloc_kb_per_op"] * (1 + threshold) + 1.0
+        if slower or heavier:
+            regressions.append(name)
+        result["vs_baseline"] = {
+            "ops_per_sec": round(result["ops_per_sec"] / base["ops_per_sec"], 3),
+            "peak_alloc": round((result["peak_alloc_kb_per_op"] + 1e-9) / (base["peak_alloc_kb_per_op"] + 1e-9), 3),
+            "regressed": slower or heavier
+        }
+    return regressions
+
+async def main(args):
+    torch.set_num_threads(args.torch_threads)
+    rng = np.random.default_rng(0)
+
+    selected = lambda name: not args.only or any(name.startswith(prefix) for prefix in args.only)
+    results = {}
+    for name, fn in model_stages(args, rng):
+        if selected(name):
+            results[name] = measure(fn, args.seconds)
+            print(f"{name:<34} {results[name]['ops_per_sec']:>12,.1f} ops/s | "
+                  f"peak {results[name]['peak_alloc_kb_per_op']:>9} KB/op")
+
+    if args.redis:
+        client, stages = await redis_stages(rng)
+        for name, fn in stages:
+            if selected(name):
+                results[name] = await measure_async(fn, args.seconds)
+                print(f"{name:<34} {results[name]['ops_per_sec']:>12,.1f} ops/s | "
+                      f"peak {results[name]['peak_alloc_kb_per_op']:>9} KB/op")
+        await client.close()
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "torch_threads": args.torch_threads
+        },
+        "stages": results
+    }
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📌 Baseline saved to {args.baseline}")
+        return True
+
+    regressions = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+    else:
+        print(f"⚠️ No baseline at {args.baseline}; run with --save-baseline first.")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    if regressions:
+        print(f"❌ {len(regressions)} stage(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return False
+    print("✅ No stage regressed beyond the threshold.")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seq-lens", type=int, nargs="+", default=[3, 16, 64])
+    parser.add_argument("--seconds", type=float, default=0.5, help="Minimum wall time per stage")
+    parser.add_argument("--torch-threads", type=int, default=settings.TORCH_NUM_THREADS)
+    parser.add_argument("--redis", action="store_true", help="Also run the Redis stages against REDIS_HOST:REDIS_PORT")
+    parser.add_argument("--only", nargs="*", help="Stage name prefixes to run (e.g. saint redis)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Record these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed regression per stage (fraction)")
+    parser.add_argument("--out", help="Also write this run's results here")
+    sys.exit(0 if asyncio.run(main(parser.parse_args())) else 1)
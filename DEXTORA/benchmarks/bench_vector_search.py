@@ -0,0 +1,161 @@
+"""
+Benchmark: pgvector ANN index vs exact search for "similar students" queries.
+
+Loads synthetic 128-d profiles (clustered like real archetypes) into a scratch copy of
+student_profiles with binary COPY, builds the configured ANN index, then reports recall@k
+and latency against exact (sequential scan) search, unfiltered and filtered by
+grade/curriculum, for a sweep of ef_search (HNSW) or probes (IVFFlat) values.
+
+Needs a Postgres with pgvector reachable at DATABASE_URL. Run from the DEXTORA directory:
+    python -m benchmarks.bench_vector_search --rows 2000000 --index hnsw --ef-search 40 64 128 256
+    python -m benchmarks.bench_vector_search --reuse --index ivfflat --probes 10 20 50
+"""
+import argparse
+import json
+import time
+import numpy as np
+import psycopg
+from pgvector.psycopg import register_vector
+from app.core.config import settings
+from app.db.vector_index import VECTOR_OPS, build_settings, index_statements, search_settings
+
+GRADES = np.arange(6, 13)
+CURRICULA = np.array(["K-12", "IGCSE", "IB"])
+
+def _sync_url():
+    return settings.DATABASE_URL.replace("+psycopg", "").replace("+asyncpg", "")
+
+def _synthetic_vectors(rng, centers, n):
+    labels = rng.integers(0, len(centers), n)
+    return (centers[labels] + rng.normal(0, 0.35, (n, centers.shape[1]))).astype(np.float32)
+
+def load_profiles(conn, table, rows, chunk, rng, centers):
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {table}")
+        cur.execute(f"CREATE TABLE {table} (LIKE student_profiles INCLUDING DEFAULTS)")
+        cur.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (student_id)")
+    conn.commit()
+
+    started = time.perf_counter()
+    with conn.cursor() as cur:
+        with cur.copy(f"COPY {table} (student_id, grade, curriculum, personality_vector) FROM STDIN WITH (FORMAT BINARY)") as copy:
+            copy.set_types(["text", "int4", "text", "vector"])
+            for start in range(0, rows, chunk):
+                n = min(chunk, rows - start)
+                vectors = _synthetic_vectors(rng, centers, n)
+                grades = rng.choice(GRADES, n)
+                curricula = rng.choice(CURRICULA, n)
+                for i in range(n):
+                    copy.write_row((f"BENCH_{start + i}", int(grades[i]), curricula[i], vectors[i]))
+    conn.commit()
+    elapsed = time.perf_counter() - started
+    with conn.cursor() as cur:
+        cur.execute(f"ANALYZE {table}")
+    conn.commit()
+    print(f"📥 Loaded {rows} profiles in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+    return elapsed
+
+def build_index(conn, table, args):
+    started = time.perf_counter()
+    with conn.cursor() as cur:
+        for statement in build_settings() + index_statements(
+            table, args.index, args.metric, args.m, args.ef_construction, args.lists, rebuild=True
+        ):
+            cur.execute(statement)
+    conn.commit()
+    elapsed = time.perf_counter() - started
+    print(f"📇 Built {args.index} index in {elapsed:.1f}s")
+    return elapsed
+
+def _query_sql(table, metric, filtered):
+    op = VECTOR_OPS[metric][1]
+    where = "WHERE grade = %s AND curriculum = %s" if filtered else ""
+    return f"SELECT student_id FROM {table} {where} ORDER BY personality_vector {op} %s LIMIT %s"
+
+def run_queries(conn, sql, queries, k, setup):
+    """Runs each query in its own transaction after `setup` SET LOCALs -> (ids per query, latencies ms)."""
+    results, latencies = [], []
+    with conn.cursor() as cur:
+        for vector, grade, curriculum in queries:
+            params = (vector, k) if grade is None else (grade, curriculum, vector, k)
+            with conn.transaction():
+                for statement in setup:
+                    cur.execute(statement)
+                started = time.perf_counter()
+                cur.execute(sql, params)
+                ids = [row[0] for row in cur.fetchall()]
+                latencies.append((time.perf_counter() - started) * 1000)
+            results.append(ids)
+    return results, np.array(latencies)
+
+def recall_at_k(approx, exact):
+    hits = [len(set(a) & set(e)) / max(1, len(e)) for a, e in zip(approx, exact)]
+    return float(np.mean(hits))
+
+def main(args):
+    rng = np.random.default_rng(args.seed)
+    centers = rng.normal(0, 1.0, (args.clusters, 128)).astype(np.float32)
+
+    conn = psycopg.connect(_sync_url())
+    register_vector(conn)
+    summary = {"rows": args.rows, "index": args.index, "metric": args.metric, "k": args.k, "results": []}
+
+    if not args.reuse:
+        summary["load_s"] = round(load_profiles(conn, args.table, args.rows, args.chunk, rng, centers), 2)
+    if not args.reuse or args.rebuild:
+        summary["index_build_s"] = round(build_index(conn, args.table, args), 2)
+
+    query_vectors = _synthetic_vectors(rng, centers, args.queries)
+    workloads = {
+        "unfiltered": [(v, None, None) for v in query_vectors],
+        "filtered": [(v, int(rng.choice(GRADES)), str(rng.choice(CURRICULA))) for v in query_vectors],
+    }
+    knob = "ef_search" if args.index == "hnsw" else "probes"
+    sweep = args.ef_search if args.index == "hnsw" else args.probes
+
+    for workload, queries in workloads.items():
+        sql = _query_sql(args.table, args.metric, workload == "filtered")
+        # Exact ground truth: no index scans, so the planner falls back to a full sort
+        exact, exact_ms = run_queries(conn, sql, queries, args.k, ["SET LOCAL enable_indexscan = off"])
+        print(f"{workload:>10} | exact          | p50 {np.percentile(exact_ms, 50):8.2f} ms | p99 {np.percentile(exact_ms, 99):8.2f} ms")
+
+        for value in sweep:
+            setup = search_settings(args.index, args.k, ef_search=value, probes=value, iterative_scan=args.iterative_scan)
+            approx, ann_ms = run_queries(conn, sql, queries, args.k, setup)
+            result = {
+                "workload": workload,
+                knob: value,
+                "recall": round(recall_at_k(approx, exact), 4),
+                "ann_p50_ms": round(float(np.percentile(ann_ms, 50)), 2),
+                "ann_p99_ms": round(float(np.percentile(ann_ms, 99)), 2),
+                "exact_p50_ms": round(float(np.percentile(exact_ms, 50)), 2),
+                "exact_p99_ms": round(float(np.percentile(exact_ms, 99)), 2),
+                "speedup_p50": round(float(np.percentile(exact_ms, 50) / np.percentile(ann_ms, 50)), 1)
+            }
+            summary["results"].append(result)
+            print(f"{workload:>10} | {knob} {value:<6} | p50 {result['ann_p50_ms']:8.2f} ms | "
+                  f"p99 {result['ann_p99_ms']:8.2f} ms | recall@{args.k} {result['recall']:.3f} | x{result['speedup_p50']}")
+
+    conn.close()
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--chunk", type=int, default=100_000)
+    parser.add_argument("--clusters", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--table", default="bench_student_profiles")
+    parser.add_argument("--index", choices=["hnsw", "ivfflat"], default=settings.VECTOR_INDEX_TYPE if settings.VECTOR_INDEX_TYPE != "none" else "hnsw")
+    parser.add_argument("--metric", choices=list(VECTOR_OPS), default=settings.VECTOR_INDEX_METRIC)
+    parser.add_argument("--m", type=int, default=settings.VECTOR_HNSW_M)
+    parser.add_argument("--ef-construction", type=int, default=settings.VECTOR_HNSW_EF_CONSTRUCTION)
+    parser.add_argument("--lists", type=int, default=settings.VECTOR_IVFFLAT_LISTS)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[40, 64, 128, 256])
+    parser.add_argument("--probes", type=int, nargs="+", default=[10, 20, 50, 100])
+    parser.add_argument("--iterative-scan", default=settings.VECTOR_ITERATIVE_SCAN)
+    parser.add_argument("--reuse", action="store_true", help="Keep the existing table instead of reloading it")
+    parser.add_argument("--rebuild", action="store_true", help="With --reuse, rebuild the index anyway")
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,129 @@
+"""
+Benchmark: parse time and bytes per packet for each gateway wire protocol (see
+app/services/telemetry_codec.py), plus response encode time.
+
+"json (stdlib)" is the old gateway path: json.loads then per-event dict indexing and
+StudentDNADecoder.telemetry_stats. Every other row decodes into a TelemetryFrame (columns +
+stats), which is what the gateway now hands to inference.
+
+Packets come from ml/data/generate_rich_telemetry.py; live packets carry 1-3 events, offline
+buffers flushed on reconnect carry more.
+
+Run from the DEXTORA directory:
+    python -m benchmarks.bench_wire_protocol
+    python -m benchmarks.bench_wire_protocol --events 1 3 10 50 --packets 5000
+"""
+import argparse
+import json
+import random
+import time
+import numpy as np
+from app.services.dna_decoder import StudentDNADecoder
+from app.services.telemetry_codec import (
+    decode_frame, decode_packet, dumps_json, encode_frame, msgpack, orjson, pack_msgpack
+)
+from ml.data.generate_rich_telemetry import STATE_TYPES, STATE_WEIGHTS, generate_batch
+
+def make_packets(n: int, events: int, rng: random.Random):
+    return [
+        {"telemetry_batch": generate_batch(rng.choices(STATE_TYPES, weights=STATE_WEIGHTS)[0], rng, num_items=events)}
+        for _ in range(n)
+    ]
+
+def as_columns(packet: dict) -> dict:
+    batch = packet["telemetry_batch"]
+    return {"telemetry_batch": {key: [e[key] for e in batch] for key in batch[0]}}
+
+def time_per_packet(fn, messages: list, repeat: int) -> float:
+    """Best-of-`repeat` microseconds per message."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for message in messages:
+            fn(message)
+        best = min(best, time.perf_counter() - started)
+    return best / len(messages) * 1e6
+
+def main(args):
+    rng = random.Random(args.seed)
+    decoder = StudentDNADecoder()
+
+    def stdlib_json_path(text):
+        data = json.loads(text)
+        batch = data["telemetry_batch"]
+        return [e["context_id"] for e in batch], [e["behavior_id"] for e in batch], decoder.telemetry_stats(batch)
+
+    def frame_path(decode):
+        def run(message):
+            frame = decode(message)
+            return frame.sequences(), frame.stats()
+        return run
+
+    results = []
+    for events in args.events:
+        packets = make_packets(args.packets, events, rng)
+        frames = [decode_packet(p) for p in packets]
+        protocols = {"json (stdlib)": ([json.dumps(p) for p in packets], stdlib_json_path)}
+        if orjson is not None:
+            protocols["json (orjson) -> frame"] = (
+                [json.dumps(p) for p in packets], frame_path(lambda m: decode_packet(orjson.loads(m)))
+            )
+        if msgpack is not None:
+            protocols["msgpack rows -> frame"] = (
+                [msgpack.packb(p) for p in packets], frame_path(lambda m: decode_packet(msgpack.unpackb(m)))
+            )
+            protocols["msgpack columns -> frame"] = (
+                [msgpack.packb(as_columns(p)) for p in packets], frame_path(lambda m: decode_packet(msgpack.unpackb(m)))
+            )
+        protocols["binary frame"] = ([encode_frame(f) for f in frames], frame_path(decode_frame))
+
+        for name, (messages, parse) in protocols.items():
+            # Same stats on every path (binary intensities are float32 on the wire)
+            reference = decoder.telemetry_stats(packets[0]["telemetry_batch"])
+            np.testing.assert_allclose(np.asarray(parse(messages[0])[-1]), reference, rtol=1e-6)
+            results.append({
+                "events": events,
+                "protocol": name,
+                "bytes_per_packet": round(float(np.mean([len(m) for m in messages])), 1),
+                "parse_us": round(time_per_packet(parse, messages, args.repeat), 3)
+            })
+
+    # Responses: the trace payload the gateway sends back per packet
+    response = {
+        "dna": {label: round(random.uniform(0, 100), 2) for label in decoder.labels},
+        "trends": "✅ Steady Progress",
+        "action": {"type": "NUDGE", "action": "SWITCH_TO_VIDEO", "route": "/video_player"},
+        "vector_snippet": [round(random.gauss(0, 1), 6) for _ in range(5)],
+        "model_version": "0123456789ab",
+        "timings_ms": {"inference": 4.2, "trends": 0.05, "cache": 0.3, "total": 4.6}
+    }
+    encoders = {"json (stdlib)": json.dumps, "json (gateway)": dumps_json}
+    if msgpack is not None:
+        encoders["msgpack"] = pack_msgpack
+    encode_results = [
+        {
+            "encoder": name,
+            "bytes": len(encode(response)),
+            "encode_us": round(time_per_packet(encode, [response] * 1000, args.repeat), 3)
+        }
+        for name, encode in encoders.items()
+    ]
+
+    print(f"{'events':>6} | {'protocol':<26} | {'bytes/packet':>12} | {'parse us':>9}")
+    for r in results:
+        print(f"{r['events']:>6} | {r['protocol']:<26} | {r['bytes_per_packet']:>12} | {r['parse_us']:>9}")
+    print()
+    for r in encode_results:
+        print(f"response {r['encoder']:<16} | {r['bytes']:>6} bytes | {r['encode_us']:>8} us")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"parse": results, "encode": encode_results}, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, nargs="+", default=[1, 3, 10, 50], help="Events per packet")
+    parser.add_argument("--packets", type=int, default=2000, help="Packets per (size, protocol)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Also write the results as JSON here")
+    main(parser.parse_args())
@@ -0,0 +1,72 @@
+"""
+Benchmark: memory per serving worker with private vs shared (memory-mapped) model weights.
+
+Spawns --workers processes the way `uvicorn --workers` does. Each builds the serving
+ModelBundle, runs one pipeline pass and then reports its RSS / PSS / USS (app/core/memory.py)
+while all of them are still alive. With shared weights the model pages show up as shared RSS,
+and PSS/USS per worker drop accordingly. Runtime overhead (torch, Python) is per process either way.
+
+Run from the DEXTORA directory (models must exist in app/ml_assets/, see ml/data/init_models.py):
+    python -m benchmarks.bench_worker_memory --workers 4
+    python -m benchmarks.bench_worker_memory --workers 8 --modes shared
+"""
+import argparse
+import json
+import multiprocessing
+import os
+
+def _worker(shared: bool, barrier, results):
+    # Settings are read at import, so the mode has to be in the environment first
+    os.environ["MODEL_SHARED_WEIGHTS"] = "true" if shared else "false"
+    from app.core.config import settings
+    from app.core.memory import process_memory
+    from app.services.inference_executor import ModelBundle, run_pipeline
+
+    models = ModelBundle(settings.SAINT_MODEL_PATH, settings.RL_MODEL_PATH)
+    stats = models.decoder.telemetry_stats([])[None, :]
+    run_pipeline(models, [[1, 2, 3]], [[0, 1, 2]], stats, [True])
+
+    barrier.wait()  # Everyone loaded: shared pages are now mapped by all workers
+    results.put(process_memory())
+    barrier.wait()  # Stay alive until every worker has measured
+
+def run_mode(shared: bool, workers: int):
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=_worker, args=(shared, barrier, results)) for _ in range(workers)]
+    for p in processes:
+        p.start()
+    memory = [results.get() for _ in range(workers)]
+    for p in processes:
+        p.join()
+
+    mb = lambda key: [round(m.get(key, 0) / 2**20, 1) for m in memory]
+    return {
+        "mode": "shared" if shared else "private",
+        "workers": workers,
+        "rss_mb": mb("rss"),
+        "pss_mb": mb("pss"),
+        "uss_mb": mb("uss"),
+        "shared_mb": mb("shared"),
+        "total_pss_mb": round(sum(mb("pss")), 1)
+    }
+
+def main(args):
+    reports = []
+    for mode in args.modes:
+        report = run_mode(mode == "shared", args.workers)
+        reports.append(report)
+        print(f"{report['mode']:>8} | {args.workers} workers | total PSS {report['total_pss_mb']:>8} MB | "
+              f"per worker USS {min(report['uss_mb'])}-{max(report['uss_mb'])} MB, "
+              f"shared {min(report['shared_mb'])}-{max(report['shared_mb'])} MB")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(reports, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", choices=["private", "shared"], default=["private", "shared"])
+    parser.add_argument("--out", help="Also write the per-worker numbers as JSON here")
+    main(parser.parse_args())
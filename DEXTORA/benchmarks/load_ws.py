@@ -0,0 +1,190 @@
+"""
+WebSocket load generator: thousands of simulated students against /ws/{student_id}.
+
+Each student opens its own socket, then sends state-driven packets (Flow / Struggle / Fatigue /
+Neutral / Gap, as in ml/data/generate_rich_telemetry.py) and waits for each response. A student
+stays in a state for a few packets before moving on, so the server sees realistic trends.
+Students join according to the ramp profile and send every --interval-ms (+/- jitter) until
+--duration elapses.
+
+Reports throughput, round-trip latency percentiles, error rate, the server's own per-stage
+timings (`timings_ms` in each response) and a /stats/inference snapshot as JSON.
+
+Run from the DEXTORA directory against a running server, e.g. `python -m benchmarks.standin_server`:
+    python -m benchmarks.load_ws --students 2000 --ramp linear --ramp-seconds 30 --duration 90
+    python -m benchmarks.load_ws --students 500 --ramp step --step-size 100 --ramp-seconds 25 --out load.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import urllib.request
+from collections import Counter, defaultdict
+import numpy as np
+import websockets
+from ml.data.generate_rich_telemetry import STATE_TYPES, STATE_WEIGHTS, generate_batch
+
+CURRICULA = ["K-12", "IGCSE", "IB"]
+
+class LoadStats:
+    def __init__(self):
+        self.latencies_ms = []
+        self.server_timings = defaultdict(list)
+        self.errors = Counter()
+        self.sent = 0
+        self.received = 0
+        self.connected = 0
+        self.active = 0
+        self.peak_active = 0
+
+    def record_response(self, latency_ms: float, response: dict):
+        self.received += 1
+        self.latencies_ms.append(latency_ms)
+        for stage, ms in (response.get("timings_ms") or {}).items():
+            self.server_timings[stage].append(ms)
+
+    def summary(self, elapsed_s: float):
+        lat = np.array(self.latencies_ms) if self.latencies_ms else np.zeros(1)
+        attempts = self.sent + self.errors["connect"]
+        return {
+            "elapsed_s": round(elapsed_s, 2),
+            "students_connected": self.connected,
+            "peak_concurrent_sockets": self.peak_active,
+            "packets_sent": self.sent,
+            "responses": self.received,
+            "throughput_rps": round(self.received / elapsed_s, 1) if elapsed_s else 0.0,
+            "latency_ms": {
+                "p50": round(float(np.percentile(lat, 50)), 2),
+                "p95": round(float(np.percentile(lat, 95)), 2),
+                "p99": round(float(np.percentile(lat, 99)), 2),
+                "max": round(float(lat.max()), 2)
+            },
+            "errors": dict(self.errors),
+            "error_rate": round(sum(self.errors.values()) / attempts, 4) if attempts else 0.0,
+            "server_timings_ms": {
+                stage: {
+                    "avg": round(float(np.mean(values)), 3),
+                    "p95": round(float(np.percentile(values, 95)), 3)
+                }
+                for stage, values in self.server_timings.items()
+            }
+        }
+
+def ramp_delays(students: int, profile: str, ramp_seconds: float, step_size: int):
+    """Start offset (seconds) for each student."""
+    if profile == "instant" or ramp_seconds <= 0:
+        return [0.0] * students
+    if profile == "linear":
+        return [ramp_seconds * i / students for i in range(students)]
+    # "step": step_size students join together, steps evenly spread over the ramp
+    steps = max(1, -(-students // step_size))
+    return [ramp_seconds * (i // step_size) / steps for i in range(students)]
+
+class SimulatedStudent:
+    """Markov walk over the telemetry states: stays put with probability `stickiness`."""
+    def __init__(self, student_id: str, rng: random.Random, stickiness: float = 0.7):
+        self.student_id = student_id
+        self.rng = rng
+        self.stickiness = stickiness
+        self.state = rng.choices(STATE_TYPES, weights=STATE_WEIGHTS)[0]
+
+    def next_packet(self):
+        if self.rng.random() > self.stickiness:
+            self.state = self.rng.choices(STATE_TYPES, weights=STATE_WEIGHTS)[0]
+        return {"student_id": self.student_id, "telemetry_batch": generate_batch(self.state, self.rng)}
+
+async def run_student(i: int, args, start_delay: float, deadline: float, stats: LoadStats):
+    await asyncio.sleep(start_delay)
+    rng = random.Random(args.seed * 1_000_003 + i)
+    student = SimulatedStudent(f"LOAD_{i:06d}", rng)
+    uri = f"{args.url}/ws/{student.student_id}?grade={rng.randint(6, 12)}&curriculum={rng.choice(CURRICULA)}"
+    interval = args.interval_ms / 1000
+
+    try:
+        ws = await websockets.connect(uri, open_timeout=args.timeout, max_size=None)
+    except Exception:
+        stats.errors["connect"] += 1
+        return
+
+    stats.connected += 1
+    stats.active += 1
+    stats.peak_active = max(stats.peak_active, stats.active)
+    try:
+        # Spread the first packets so sockets that joined together don't send in lockstep
+        await asyncio.sleep(rng.uniform(0, interval))
+        while time.perf_counter() < deadline:
+            payload = json.dumps(student.next_packet())
+            started = time.perf_counter()
+            try:
+                await ws.send(payload)
+                stats.sent += 1
+                response = json.loads(await asyncio.wait_for(ws.recv(), args.timeout))
+            except asyncio.TimeoutError:
+                stats.errors["timeout"] += 1
+                break
+            except websockets.ConnectionClosed as e:
+                stats.errors[f"closed_{e.code}" if e.code else "closed"] += 1
+                break
+            stats.record_response((time.perf_counter() - started) * 1000, response)
+
+            jitter = rng.uniform(-args.jitter, args.jitter) * interval
+            await asyncio.sleep(max(0.0, interval + jitter))
+    except Exception as e:
+        stats.errors[type(e).__name__] += 1
+    finally:
+        stats.active -= 1
+        await ws.close()
+
+def fetch_server_stats(http_url: str):
+    try:
+        with urllib.request.urlopen(f"{http_url}/stats/inference", timeout=5) as response:
+            return json.loads(response.read())
+    except Exception as e:
+        return {"error": str(e)}
+
+async def main(args):
+    stats = LoadStats()
+    delays = ramp_delays(args.students, args.ramp, args.ramp_seconds, args.step_size)
+    started = time.perf_counter()
+    deadline = started + args.duration
+
+    async def progress():
+        while True:
+            await asyncio.sleep(5)
+            print(f"⏱️ {time.perf_counter() - started:>6.1f}s | sockets {stats.active:>6} | "
+                  f"responses {stats.received:>8} | errors {sum(stats.errors.values()):>5}", flush=True)
+
+    reporter = asyncio.create_task(progress())
+    await asyncio.gather(*[run_student(i, args, delays[i], deadline, stats) for i in range(args.students)])
+    reporter.cancel()
+    elapsed = time.perf_counter() - started
+
+    http_url = args.url.replace("ws://", "http://").replace("wss://", "https://")
+    summary = {
+        "config": {
+            "url": args.url, "students": args.students, "ramp": args.ramp, "ramp_seconds": args.ramp_seconds,
+            "interval_ms": args.interval_ms, "duration_s": args.duration
+        },
+        **stats.summary(elapsed),
+        "server_stats": await asyncio.to_thread(fetch_server_stats, http_url)
+    }
+    print(json.dumps(summary, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://127.0.0.1:8080", help="Server base URL")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds from start until students stop sending")
+    parser.add_argument("--ramp", choices=["instant", "linear", "step"], default="linear")
+    parser.add_argument("--ramp-seconds", type=float, default=20.0)
+    parser.add_argument("--step-size", type=int, default=100, help="Students per step for --ramp step")
+    parser.add_argument("--interval-ms", type=float, default=1000.0, help="Pause between a student's packets")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Interval jitter as a fraction of --interval-ms")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Connect / response timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Also write the JSON summary here")
+    asyncio.run(main(parser.parse_args()))
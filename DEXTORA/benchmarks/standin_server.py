@@ -0,0 +1,124 @@
+"""
+Runs the full app locally with in-memory stand-ins for Redis and PostgreSQL, for load tests
+(benchmarks/load_ws.py) on a laptop or CI box without Memorystore/AlloyDB.
+
+The serving path is unchanged (WebSocket gateway, micro-batching, executors, write coalescing,
+write-behind); only the network round-trips to Redis/Postgres are replaced by dict operations.
+Point REDIS_HOST/DATABASE_URL at real local servers and run `uvicorn main:app` instead to
+include them in the measurement.
+
+Run from the DEXTORA directory (models must exist in app/ml_assets/, see ml/data/init_models.py):
+    python -m benchmarks.standin_server --port 8080
+    python -m benchmarks.standin_server --port 8080 --known-profiles 0.5
+"""
+import argparse
+import random
+import numpy as np
+import uvicorn
+
+class InMemoryRedis:
+    """The subset of redis.asyncio.Redis the app uses, on a dict (TTLs are ignored)."""
+    def __init__(self):
+        self.data = {}
+
+    async def ping(self):
+        return True
+
+    async def exists(self, key):
+        return int(key in self.data)
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+        return True
+
+    async def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    async def close(self):
+        pass
+
+    def pipeline(self, transaction=False):
+        return _InMemoryPipeline(self)
+
+class _InMemoryPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.commands.clear()
+
+    def setex(self, key, ttl, value):
+        self.commands.append((key, value))
+
+    async def execute(self):
+        for key, value in self.commands:
+            self.redis.data[key] = value
+        results, self.commands = [True] * len(self.commands), []
+        return results
+
+class InMemoryPostgres:
+    """Profiles, bulk upserts and cohort centroids without a database."""
+    def __init__(self, known_profiles: float = 0.0):
+        self.known_profiles = known_profiles
+        self.vectors = {}
+        self.upserts = 0
+
+    async def get_student_profile(self, student_id: str):
+        vector = self.vectors.get(student_id)
+        if vector is None and random.random() < self.known_profiles:
+            vector = np.random.normal(0, 0.5, 128).astype(np.float32)
+        if vector is None:
+            return None
+        return type("StudentProfile", (), {"student_id": student_id, "personality_vector": vector})()
+
+    async def save_personality_vectors(self, vectors: dict, chunk_size: int = 1000):
+        self.vectors.update(vectors)
+        self.upserts += 1
+
+    async def get_cohort_centroids(self):
+        if not self.vectors:
+            return []
+        matrix = np.stack(list(self.vectors.values()))
+        return [(None, None, matrix.mean(axis=0).astype(np.float32), len(matrix))]
+
+def install_standins(known_profiles: float = 0.0):
+    """Swaps the app's Redis/Postgres singletons onto the in-memory stand-ins."""
+    from app.db.postgres_client import postgres_client
+    from app.db.redis_client import redis_client
+    from app.db.write_behind import vector_write_behind
+    from app.services.cohort_centroids import cohort_centroids
+
+    redis = InMemoryRedis()
+    redis_client.client = redis
+    if redis_client.writer is not None:
+        redis_client.writer.client = redis
+
+    postgres = InMemoryPostgres(known_profiles)
+    postgres_client.get_student_profile = postgres.get_student_profile
+    postgres_client.save_personality_vectors = postgres.save_personality_vectors
+    postgres_client.get_cohort_centroids = postgres.get_cohort_centroids
+    # These bound the Postgres methods when they were constructed
+    vector_write_behind.save_many = postgres.save_personality_vectors
+    cohort_centroids.fetch_centroids = postgres.get_cohort_centroids
+    return redis, postgres
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--known-profiles", type=float, default=0.0, help="Share of new students with a stored profile")
+    args = parser.parse_args()
+
+    install_standins(args.known_profiles)
+    from main import app
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -1,42 +1,113 @@
+import asyncio
+import importlib
 import uvicorn
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
 from app.api.websocket import router as websocket_router
-from app.db.redis_client import redis_client
+from app.api.endpoints import router as endpoints_router
+from app.core import metrics
 from app.core.config import settings
+from app.core.startup import startup_state
+
+# Heavy modules (torch, SQLAlchemy, pgvector, google-cloud-storage) are imported inside
+# the startup phases below, on worker threads, so they load concurrently with each other.
+
+async def _start_models():
+    # 0. Sync models from GCS (Global Brain Sync), then load and warm them
+    with startup_state.phase("model_sync"):
+        model_loader = await asyncio.to_thread(importlib.import_module, "app.core.model_loader")
+        await asyncio.to_thread(model_loader.download_models_from_gcs)
+
+    with startup_state.phase("model_load"):
+        inference_module = await asyncio.to_thread(importlib.import_module, "app.services.inference_service")
+        service, registry = await asyncio.to_thread(inference_module.create_inference_service)
+
+    with startup_state.phase("model_warmup"):
+        await service.warm_up(service.serving)
+    startup_state.inference_service, startup_state.model_registry = service, registry
+
+    # Model registry (polls storage for a new 'global brain' and hot-swaps it)
+    await registry.start()
+    startup_state.mark_ready("models")
+
+async def _start_redis():
+    from redis.exceptions import ConnectionError
+
+    with startup_state.phase("redis"):
+        redis_module = await asyncio.to_thread(importlib.import_module, "app.db.redis_client")
+        for i in range(5):
+            try:
+                print(f"Connecting to Redis at {settings.REDIS_HOST}:{settings.REDIS_PORT} (Attempt {i+1}/5)...")
+                await redis_module.redis_client.client.ping()
+                print("Connected to Memorystore Redis successfully.")
+                break
+            except ConnectionError:
+                if i == 4:
+                    print("❌ Could not connect to Redis after 5 attempts.")
+                    raise
+                print("Redis not ready, waiting 2s...")
+                await asyncio.sleep(2)
+    startup_state.mark_ready("redis")
+
+    with startup_state.phase("persistence"):
+        # Write-behind queue for session vectors -> PostgreSQL
+        from app.db.write_behind import vector_write_behind
+        await vector_write_behind.start()
+
+        # Cohort centroid table for warm-starting new students (refreshed periodically)
+        from app.services.cohort_centroids import cohort_centroids
+        await cohort_centroids.start()
+    startup_state.mark_ready("persistence")
+
+async def _start():
+    # Models and Redis come up concurrently: neither waits on the other's imports or I/O
+    await asyncio.gather(_start_models(), _start_redis())
+
+async def _start_in_background():
+    try:
+        await _start()
+    except Exception as e:
+        print(f"❌ Startup failed, /ready will keep reporting 503: {e}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Handles startup and shutdown logic.
-    Ensures Redis is connected before students start logging in.
+    Ensures models are warm and Redis is connected before students start logging in
+    (with STARTUP_BLOCKING off, the server listens right away and /ready gates traffic).
     """
-    # Startup: 0. Download Models from GCS (Global Brain Sync)
-    from app.core.model_loader import download_models_from_gcs
-    download_models_from_gcs()
+    startup_task = None
+    if settings.STARTUP_BLOCKING:
+        await _start()
+    else:
+        startup_task = asyncio.create_task(_start_in_background())
 
-    # Startup: Initialize Redis connection pool
-    import asyncio
-    from redis.exceptions import ConnectionError
-    
-    for i in range(5):
-        try:
-            print(f"Connecting to Redis at {settings.REDIS_HOST}:{settings.REDIS_PORT} (Attempt {i+1}/5)...")
-            await redis_client.client.ping()
-            print("Connected to Memorystore Redis successfully.")
-            break
-        except ConnectionError:
-            if i == 4:
-                print("❌ Could not connect to Redis after 5 attempts.")
-                raise
-            print("Redis not ready, waiting 2s...")
-            await asyncio.sleep(2)
-    
     yield
-    
-    # Shutdown: Clean up connections
-    await redis_client.client.close()
-    print("Redis connections closed.")
+
+    if startup_task is not None and not startup_task.done():
+        startup_task.cancel()
+        await asyncio.gather(startup_task, return_exceptions=True)
+
+    # Shutdown: Stop inference workers, then clean up connections
+    if startup_state.model_registry is not None:
+        await startup_state.model_registry.close()
+        await startup_state.inference_service.shutdown()
+
+    if startup_state.ready["persistence"]:
+        from app.services.cohort_centroids import cohort_centroids
+        await cohort_centroids.close()
+
+    if startup_state.ready["redis"]:
+        from app.db.redis_client import redis_client
+        await redis_client.close()
+        print("Redis connections closed.")
+
+    if startup_state.ready["persistence"]:
+        # Flush every dirty session vector to PostgreSQL before the container goes away
+        from app.db.write_behind import vector_write_behind
+        await vector_write_behind.close()
+        print("Write-behind queue flushed to PostgreSQL.")
 
 app = FastAPI(
     title="Personality-Driven Student RS",
@@ -45,13 +116,25 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Health Check for Google Cloud Run
+# Health Check for Google Cloud Run (liveness: the process is up)
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "users_active": "calculating..."}
 
+# Readiness: models loaded and warmed, Redis connected, persistence started
+@app.get("/ready")
+async def readiness_check():
+    return JSONResponse(startup_state.snapshot(), status_code=200 if startup_state.is_ready else 503)
+
+# Prometheus scrape target: per-stage latency histograms, RL action counters, socket gauges
+@app.get("/metrics")
+async def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(body, media_type=content_type)
+
 # Include the WebSocket Gateway
 app.include_router(websocket_router)
+app.include_router(endpoints_router)
 
 if __name__ == "__main__":
     # In production, Cloud Run provides the PORT environment variable
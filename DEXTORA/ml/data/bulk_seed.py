@@ -0,0 +1,156 @@
+"""
+Bulk seeder for capacity testing: millions of archetype-centred student profiles.
+
+Vectors are generated in vectorized chunks and streamed to Postgres with binary COPY.
+Each chunk is packed into the PGCOPY wire format with a NumPy structured dtype (one
+record per row, grouped by curriculum so every field has a fixed width), so no per-row
+Python work happens at all. Parallel loader processes each COPY their own id range.
+
+Run from the DEXTORA directory against a Postgres with pgvector:
+    python -m ml.data.bulk_seed --rows 5000000 --workers 4
+    python -m ml.data.bulk_seed --rows 1000000 --mix Visual_Sprinter=0.6,Kinetic_Explorer=0.4 --truncate --index
+"""
+import argparse
+import multiprocessing
+import struct
+import time
+import numpy as np
+import psycopg
+from sqlalchemy import create_engine, text
+from app.db.vector_index import create_vector_index, index_name
+from ml.data.seed_data import ARCHETYPES, CURRICULA, SYNC_DATABASE_URL, init_schema
+
+DIM = 128
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+COPY_TRAILER = struct.pack(">h", -1)
+COPY_SQL = "COPY student_profiles (student_id, grade, curriculum, personality_vector) FROM STDIN WITH (FORMAT BINARY)"
+
+def _row_dtype(id_len: int, curriculum_len: int) -> np.dtype:
+    """One binary COPY tuple: field count, then (int32 length, payload) per column, big-endian."""
+    return np.dtype([
+        ("fields", ">i2"),
+        ("id_len", ">i4"), ("student_id", f"S{id_len}"),
+        ("grade_len", ">i4"), ("grade", ">i4"),
+        ("curriculum_len", ">i4"), ("curriculum", f"S{curriculum_len}"),
+        # pgvector binary format: int16 dim, int16 unused, dim float4
+        ("vector_len", ">i4"), ("dim", ">i2"), ("unused", ">i2"), ("vector", ">f4", (DIM,)),
+    ])
+
+def generate_chunk(rng, start: int, n: int, prefix: str, id_width: int, archetype_matrix: np.ndarray, mix: np.ndarray):
+    """(student_ids, grades, curricula indices, float32 vectors [n, 128]) for ids start..start+n-1."""
+    student_ids = np.char.add(prefix, np.char.zfill(np.arange(start, start + n).astype(str), id_width))
+    archetypes = rng.choice(len(archetype_matrix), size=n, p=mix)
+    vectors = rng.normal(0, 0.05, (n, DIM)).astype(np.float32)
+    vectors[:, :archetype_matrix.shape[1]] += archetype_matrix[archetypes]
+    grades = rng.integers(6, 13, n)
+    curricula = rng.integers(0, len(CURRICULA), n)
+    return student_ids.astype("S"), grades, curricula, vectors
+
+def pack_copy_rows(student_ids: np.ndarray, grades: np.ndarray, curricula: np.ndarray, vectors: np.ndarray) -> bytes:
+    """Packs a chunk into binary COPY tuples (no header/trailer)."""
+    id_len = student_ids.dtype.itemsize
+    parts = []
+    for c, curriculum in enumerate(CURRICULA):
+        rows = np.flatnonzero(curricula == c)
+        if len(rows) == 0:
+            continue
+        name = curriculum.encode()
+        records = np.empty(len(rows), dtype=_row_dtype(id_len, len(name)))
+        records["fields"] = 4
+        records["id_len"] = id_len
+        records["student_id"] = student_ids[rows]
+        records["grade_len"] = 4
+        records["grade"] = grades[rows]
+        records["curriculum_len"] = len(name)
+        records["curriculum"] = name
+        records["vector_len"] = 4 + 4 * DIM
+        records["dim"] = DIM
+        records["unused"] = 0
+        records["vector"] = vectors[rows]
+        parts.append(records.tobytes())
+    return b"".join(parts)
+
+def load_range(args):
+    """Worker: COPYs rows [start, end) in chunks over its own connection -> (rows, seconds)."""
+    start, end, chunk, prefix, id_width, mix, seed = args
+    rng = np.random.default_rng(seed)
+    archetype_matrix = np.array(list(ARCHETYPES.values()), dtype=np.float32)
+    started = time.perf_counter()
+
+    with psycopg.connect(SYNC_DATABASE_URL.replace("+psycopg2", "")) as conn:
+        with conn.cursor() as cur:
+            with cur.copy(COPY_SQL) as copy:
+                copy.write(COPY_HEADER)
+                for chunk_start in range(start, end, chunk):
+                    n = min(chunk, end - chunk_start)
+                    copy.write(pack_copy_rows(*generate_chunk(rng, chunk_start, n, prefix, id_width, archetype_matrix, mix)))
+                copy.write(COPY_TRAILER)
+    return end - start, time.perf_counter() - started
+
+def parse_mix(spec: str) -> np.ndarray:
+    """'Visual_Sprinter=0.5,Kinetic_Explorer=0.5' -> probabilities in ARCHETYPES order."""
+    weights = dict.fromkeys(ARCHETYPES, 0.0 if spec else 1.0)
+    for item in filter(None, spec.split(",")):
+        name, _, weight = item.partition("=")
+        if name not in ARCHETYPES:
+            raise ValueError(f"Unknown archetype '{name}'. Expected one of {list(ARCHETYPES)}.")
+        weights[name] = float(weight or 1.0)
+    mix = np.array(list(weights.values()), dtype=np.float64)
+    if mix.sum() <= 0:
+        raise ValueError("Archetype mix must have a positive total weight.")
+    return mix / mix.sum()
+
+def bulk_seed(args):
+    print(f"🚀 Bulk seeding {args.rows:,} students with {args.workers} loader process(es)...")
+    mix = parse_mix(args.mix)
+    print("🎭 Archetype mix: " + ", ".join(f"{name}={p:.2f}" for name, p in zip(ARCHETYPES, mix)))
+
+    engine = create_engine(SYNC_DATABASE_URL, echo=False)
+    init_schema(engine)
+    with engine.begin() as conn:
+        if args.truncate:
+            print("🧹 Truncating student_profiles...")
+            conn.execute(text("TRUNCATE student_profiles"))
+        # Maintaining the ANN graph row by row is far slower than building it once afterwards
+        had_index = conn.execute(text(f"SELECT to_regclass('{index_name()}') IS NOT NULL")).scalar()
+        conn.execute(text(f"DROP INDEX IF EXISTS {index_name()}"))
+
+    id_width = len(str(args.start_id + args.rows - 1))
+    bounds = np.linspace(args.start_id, args.start_id + args.rows, args.workers + 1).astype(int)
+    tasks = [
+        (int(bounds[w]), int(bounds[w + 1]), args.chunk, args.prefix, id_width, mix, args.seed + w)
+        for w in range(args.workers) if bounds[w + 1] > bounds[w]
+    ]
+
+    started = time.perf_counter()
+    if len(tasks) == 1:
+        results = [load_range(tasks[0])]
+    else:
+        with multiprocessing.get_context("spawn").Pool(len(tasks)) as pool:
+            results = pool.map(load_range, tasks)
+    elapsed = time.perf_counter() - started
+
+    for w, (rows, seconds) in enumerate(results):
+        print(f"   worker {w}: {rows:,} rows in {seconds:.1f}s ({rows / seconds:,.0f} rows/s)")
+    print(f"✅ Loaded {args.rows:,} rows in {elapsed:.1f}s -> {args.rows / elapsed:,.0f} rows/s")
+
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE student_profiles"))
+    if args.index or had_index:
+        index_started = time.perf_counter()
+        with engine.begin() as conn:
+            create_vector_index(conn)
+        print(f"📇 Built the vector index in {time.perf_counter() - index_started:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=max(1, multiprocessing.cpu_count() // 2))
+    parser.add_argument("--chunk", type=int, default=50_000, help="Rows generated and packed per step")
+    parser.add_argument("--mix", default="", help="Archetype weights, e.g. Visual_Sprinter=0.5,Textual_DeepDiver=0.5 (default: uniform)")
+    parser.add_argument("--prefix", default="STU_BULK_")
+    parser.add_argument("--start-id", type=int, default=0)
+    parser.add_argument("--truncate", action="store_true", help="Empty student_profiles first")
+    parser.add_argument("--index", action="store_true", help="Build the ANN index after loading (always rebuilt if it existed)")
+    parser.add_argument("--seed", type=int, default=0)
+    bulk_seed(parser.parse_args())
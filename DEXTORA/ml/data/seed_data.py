@@ -3,6 +3,7 @@ import random
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from app.db.postgres_client import Base, StudentProfile
+from app.db.vector_index import create_vector_index
 from app.core.config import settings
 
 # Use SYNC engine for seeding to avoid async driver issues
@@ -11,6 +12,22 @@ SYNC_DATABASE_URL = settings.DATABASE_URL.replace("+psycopg", "").replace("+asyn
 if "postgresql://" not in SYNC_DATABASE_URL:
     SYNC_DATABASE_URL = SYNC_DATABASE_URL.replace("postgresql", "postgresql+psycopg2")
 
+# Personality Archetypes: the first 3 dims represent learning mode
+ARCHETYPES = {
+    "Visual_Sprinter": [0.8, 0.1, 0.1], # High visual, low text/audio
+    "Textual_DeepDiver": [0.1, 0.9, 0.0],
+    "Kinetic_Explorer": [0.3, 0.2, 0.5]
+}
+CURRICULA = ["K-12", "IGCSE", "IB"]
+
+def init_schema(engine):
+    """Enables pgvector and creates the tables."""
+    with engine.begin() as conn:
+        print("🔧 Enabling pgvector extension...")
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        print("🏗️ Creating tables...")
+        Base.metadata.create_all(conn)
+
 def seed_database():
     print("🚀 Starting DEXTORA Seed Process (SYNC)...")
     print(f"DEBUG: DATABASE_URL={SYNC_DATABASE_URL}")
@@ -18,18 +35,10 @@ def seed_database():
     engine = create_engine(SYNC_DATABASE_URL, echo=False)
 
     # 1. Initialize Postgres Extension & Tables
-    with engine.begin() as conn:
-        print("🔧 Enabling pgvector extension...")
-        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
-        print("🏗️ Creating tables...")
-        Base.metadata.create_all(conn)
+    init_schema(engine)
     
     # 2. Define Personality Archetypes
-    archetypes = {
-        "Visual_Sprinter": [0.8, 0.1, 0.1], # High visual, low text/audio
-        "Textual_DeepDiver": [0.1, 0.9, 0.0],
-        "Kinetic_Explorer": [0.3, 0.2, 0.5]
-    }
+    archetypes = ARCHETYPES
 
     # Use Raw DBAPI Connection to bypass SQLAlchemy completely
     raw_conn = engine.raw_connection()
@@ -52,7 +61,7 @@ def seed_database():
             cursor.execute("""
                 INSERT INTO student_profiles (student_id, grade, curriculum, personality_vector)
                 VALUES (%s, %s, %s, %s)
-            """, (s_id, random.randint(6, 12), random.choice(["K-12", "IGCSE", "IB"]), vec_str))
+            """, (s_id, random.randint(6, 12), random.choice(CURRICULA), vec_str))
         
         raw_conn.commit()
         print("✅ Seeding Complete. 100 students created.")
@@ -63,5 +72,10 @@ def seed_database():
     finally:
         raw_conn.close()
 
+    # 3. ANN index for "similar students" queries (built after the load; IVFFlat trains on existing rows)
+    with engine.begin() as conn:
+        print(f"📇 Building {settings.VECTOR_INDEX_TYPE} index on personality_vector...")
+        create_vector_index(conn)
+
 if __name__ == "__main__":
     seed_database()
\ No newline at end of file
@@ -0,0 +1,194 @@
+"""
+On-disk telemetry sequence store for SAINT training.
+
+Recorded `telemetry_batch` packets are packed into shards of flat int32 token arrays:
+
+    <store>/manifest.json
+    <store>/shard_00000/context.npy    int32 [tokens]   concept ids (SAINT encoder)
+    <store>/shard_00000/behavior.npy   int32 [tokens]   interaction ids (SAINT decoder)
+    <store>/shard_00000/offsets.npy    int64 [sequences + 1]   sequence i = tokens[offsets[i]:offsets[i + 1]]
+    <store>/shard_00000/students.txt   one student_id per sequence
+
+Consecutive packets of the same student are appended to one sequence, so logs ordered
+by student/session become full histories. Shards are opened with `np.memmap`, so
+readers only page in the windows they touch, whatever the total token count.
+
+Run from the DEXTORA directory:
+    python -m ml.data.sequence_store ml/data/samples/rich_telemetry.json --out data/telemetry_store
+    python -m ml.data.sequence_store logs/2026-*.jsonl --out data/telemetry_store --shard-tokens 50000000
+"""
+import argparse
+import glob
+import json
+import os
+from array import array
+import numpy as np
+
+TOKEN_DTYPE = np.int32
+OFFSET_DTYPE = np.int64
+MANIFEST = "manifest.json"
+
+def iter_packets(path: str):
+    """
+    Yields recorded packets from a .json file (one packet or a list of packets) or a
+    .jsonl file (one packet per line, streamed so logs never have to fit in memory).
+    """
+    with open(path, "r") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+            return
+        data = json.load(f)
+    yield from (data if isinstance(data, list) else [data])
+
+def packet_tokens(packet: dict):
+    """(student_id, context_ids, behavior_ids) of one packet; accepts the wire and TelemetryBatch layouts."""
+    events = packet.get("telemetry_batch", packet.get("events")) or []
+    return (
+        str(packet.get("student_id", "")),
+        [int(e["context_id"]) for e in events],
+        [int(e["behavior_id"]) for e in events]
+    )
+
+class SequenceStoreWriter:
+    """
+    Appends packets to the store, starting a new shard once `shard_tokens` is reached
+    (a sequence is never split across shards). Only the open shard is buffered in memory.
+    """
+    def __init__(self, out_dir: str, shard_tokens: int = 16_000_000):
+        if os.path.exists(os.path.join(out_dir, MANIFEST)):
+            raise FileExistsError(f"'{out_dir}' already holds a sequence store.")
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.shard_tokens = max(1, shard_tokens)
+        self.shards = []
+        self._current_student = None
+        self._new_shard()
+
+    def _new_shard(self):
+        self._context = array("i")
+        self._behavior = array("i")
+        self._offsets = array("q", [0])
+        self._students = []
+
+    def add_packet(self, student_id: str, context_ids: list, behavior_ids: list):
+        if len(context_ids) != len(behavior_ids):
+            raise ValueError(f"Packet for '{student_id}' has {len(context_ids)} context ids but {len(behavior_ids)} behavior ids.")
+        if not context_ids:
+            return
+
+        if student_id != self._current_student:
+            # Close the previous student's sequence; roll over to a new shard between sequences
+            self._end_sequence()
+            if len(self._context) >= self.shard_tokens:
+                self._flush_shard()
+            self._current_student = student_id
+            self._students.append(student_id)
+
+        self._context.extend(context_ids)
+        self._behavior.extend(behavior_ids)
+
+    def _end_sequence(self):
+        if self._current_student is not None:
+            self._offsets.append(len(self._context))
+            self._current_student = None
+
+    def _flush_shard(self):
+        if not self._students:
+            return
+        name = f"shard_{len(self.shards):05d}"
+        shard_dir = os.path.join(self.out_dir, name)
+        os.makedirs(shard_dir, exist_ok=True)
+
+        np.save(os.path.join(shard_dir, "context.npy"), np.frombuffer(self._context, dtype=TOKEN_DTYPE))
+        np.save(os.path.join(shard_dir, "behavior.npy"), np.frombuffer(self._behavior, dtype=TOKEN_DTYPE))
+        np.save(os.path.join(shard_dir, "offsets.npy"), np.frombuffer(self._offsets, dtype=OFFSET_DTYPE))
+        with open(os.path.join(shard_dir, "students.txt"), "w") as f:
+            f.write("\n".join(self._students) + "\n")
+
+        self.shards.append({"name": name, "sequences": len(self._students), "tokens": len(self._context)})
+        self._new_shard()
+
+    def close(self):
+        """Flushes the open shard and writes the manifest (the store is readable only after this)."""
+        self._end_sequence()
+        self._flush_shard()
+        manifest = {
+            "version": 1,
+            "token_dtype": np.dtype(TOKEN_DTYPE).name,
+            "sequences": sum(s["sequences"] for s in self.shards),
+            "tokens": sum(s["tokens"] for s in self.shards),
+            "shards": self.shards
+        }
+        with open(os.path.join(self.out_dir, MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+def convert_telemetry(paths: list, out_dir: str, shard_tokens: int = 16_000_000):
+    """Packs recorded telemetry files (in the given order) into a sequence store. Returns the manifest."""
+    writer = SequenceStoreWriter(out_dir, shard_tokens)
+    for path in paths:
+        for packet in iter_packets(path):
+            writer.add_packet(*packet_tokens(packet))
+    return writer.close()
+
+class SequenceStore:
+    """
+    Read-only view over a store's shards. Arrays are memory-mapped on first access in
+    each process, so an instance can be pickled into DataLoader workers cheaply.
+    """
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, MANIFEST), "r") as f:
+            self.manifest = json.load(f)
+        self.shards = self.manifest["shards"]
+        self._arrays = {}
+
+    def __getstate__(self):
+        # Workers re-open their own maps instead of inheriting the parent's
+        state = self.__dict__.copy()
+        state["_arrays"] = {}
+        return state
+
+    def shard(self, i: int):
+        """(context, behavior, offsets) memmaps of shard i."""
+        if i not in self._arrays:
+            shard_dir = os.path.join(self.store_dir, self.shards[i]["name"])
+            # Copy-on-write maps: views are writable for torch.from_numpy, the files are never modified
+            self._arrays[i] = tuple(
+                np.load(os.path.join(shard_dir, f"{field}.npy"), mmap_mode="c")
+                for field in ("context", "behavior", "offsets")
+            )
+        return self._arrays[i]
+
+    def sequence(self, shard: int, index: int):
+        """(context, behavior) views of one full sequence."""
+        context, behavior, offsets = self.shard(shard)
+        start, end = offsets[index], offsets[index + 1]
+        return context[start:end], behavior[start:end]
+
+    def students(self, shard: int):
+        with open(os.path.join(self.store_dir, self.shards[shard]["name"], "students.txt"), "r") as f:
+            return f.read().splitlines()
+
+def _expand(patterns: list):
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        if not matches:
+            raise FileNotFoundError(f"No telemetry files match '{pattern}'.")
+        paths.extend(matches)
+    return paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Recorded telemetry .json / .jsonl files (globs allowed)")
+    parser.add_argument("--out", required=True, help="Output store directory")
+    parser.add_argument("--shard-tokens", type=int, default=16_000_000, help="Tokens per shard before rolling over")
+    args = parser.parse_args()
+
+    manifest = convert_telemetry(_expand(args.inputs), args.out, args.shard_tokens)
+    print(f"✅ Packed {manifest['tokens']:,} tokens in {manifest['sequences']:,} sequences "
+          f"across {len(manifest['shards'])} shard(s) into {args.out}")
@@ -1,31 +1,47 @@
 import torch
 import numpy as np
 import matplotlib.pyplot as plt
-from sklearn.decomposition import PCA
+from sklearn.decomposition import IncrementalPCA
 from app.db.postgres_client import postgres_client
 import asyncio
 
+CHUNK_SIZE = 10000
+MAX_PLOT_POINTS = 50000
+
 async def visualize_personalities():
     print("🎨 Mapping the Student Personality Space...")
-    
-    # 1. Pull all vectors from the database
-    async with postgres_client.async_session() as session:
-        profiles = await postgres_client.get_all_profiles()
-    
-    vectors = np.array([p.personality_vector for p in profiles])
-    ids = [p.student_id for p in profiles]
-    
-    # 2. Use PCA to reduce 128 dimensions to 2 for plotting
-    pca = PCA(n_components=2)
-    reduced_vectors = pca.fit_transform(vectors)
-    
+
+    # 1. Fit PCA (128 dimensions -> 2) chunk by chunk while streaming vectors from the database
+    pca = IncrementalPCA(n_components=2)
+    total = 0
+    async for ids, vectors in postgres_client.stream_profile_vectors(chunk_size=CHUNK_SIZE):
+        if len(ids) >= pca.n_components:  # partial_fit needs at least n_components rows
+            pca.partial_fit(vectors)
+        total += len(ids)
+    if not hasattr(pca, "components_"):
+        print("❌ Not enough personality vectors found.")
+        return
+
+    # 2. Second pass: project every chunk, keeping a uniform sample small enough to plot
+    keep = min(1.0, MAX_PLOT_POINTS / total)
+    rng = np.random.default_rng(0)
+    reduced_chunks, ids = [], []
+    async for chunk_ids, vectors in postgres_client.stream_profile_vectors(chunk_size=CHUNK_SIZE):
+        mask = rng.random(len(chunk_ids)) < keep
+        if not mask.any():
+            continue
+        reduced_chunks.append(pca.transform(vectors[mask]).astype(np.float32))
+        ids.extend(i for i, m in zip(chunk_ids, mask) if m)
+    reduced_vectors = np.concatenate(reduced_chunks)
+    print(f"👥 Projected {total} students, plotting {len(ids)}.")
+
     # 3. Plot the Map
     plt.figure(figsize=(10, 7))
     plt.scatter(reduced_vectors[:, 0], reduced_vectors[:, 1], alpha=0.6, c='blue')
-    
+
     for i, txt in enumerate(ids[:10]): # Label first 10 for clarity
         plt.annotate(txt, (reduced_vectors[i, 0], reduced_vectors[i, 1]))
-        
+
     plt.title("DEXTORA Personality Latent Space (PCA)")
     plt.xlabel("Principal Component 1 (e.g., Learning Speed)")
     plt.ylabel("Principal Component 2 (e.g., Content Preference)")
@@ -33,4 +49,4 @@ async def visualize_personalities():
     plt.show()
 
 if __name__ == "__main__":
-    asyncio.run(visualize_personalities())
\ No newline at end of file
+    asyncio.run(visualize_personalities())
@@ -0,0 +1,124 @@
+"""
+Export optimized SAINT serving graphs, gated on accuracy against the fp32 model.
+
+Every variant runs the full serving pipeline (SAINT -> DNA decode -> grounding -> PPO policy)
+over a replay set of recorded packets plus random synthetic ones, in padded batches. A variant
+passes when its personality vectors stay within the cosine/abs-error bounds and its final PPO
+actions are identical to fp32. Every variant gets a gate record next to the weights
+(app/ml_assets/saint_weights.<variant>.gate.json), and passing scripted variants are saved
+there too (app/ml_assets/saint_weights.<variant>.pt); select one with SAINT_VARIANT. Serving
+only loads a variant whose record passed for the current weights and falls back to eager
+otherwise, so re-run this after every retrain.
+
+Run from the DEXTORA directory:
+    python -m ml.training.export_saint
+    python -m ml.training.export_saint --variants int8 torchscript_int8 --replay logs/*.jsonl --synthetic 5000
+"""
+import argparse
+import glob
+import json
+import random
+import sys
+from types import SimpleNamespace
+import numpy as np
+from app.core.config import settings
+from app.core.model_loader import file_md5
+from app.models.saint_variants import (
+    SAINT_VARIANTS, SCRIPTED_VARIANTS, build_variant, load_fp32, save_artifact, save_gate_record
+)
+from app.services.inference_executor import ModelBundle, run_pipeline
+from ml.data.sequence_store import iter_packets
+
+def load_replay_set(patterns: list, synthetic: int, max_len: int, seed: int = 0):
+    """[(context_seq, behavior_seq, telemetry_batch)] from recorded packets plus synthetic ones."""
+    replay = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            for packet in iter_packets(path):
+                events = packet.get("telemetry_batch", packet.get("events")) or []
+                if events:
+                    replay.append((
+                        [int(e["context_id"]) for e in events],
+                        [int(e["behavior_id"]) for e in events],
+                        events
+                    ))
+
+    rng = random.Random(seed)
+    for _ in range(synthetic):
+        events = [{
+            "context_id": rng.randrange(1000),
+            "behavior_id": rng.randrange(20),
+            "duration_ms": rng.randint(1000, 120000),
+            "intensity": rng.uniform(0.01, 0.99),
+            "tab_switches": rng.randint(0, 10)
+        } for _ in range(rng.randint(1, max_len))]
+        replay.append(([e["context_id"] for e in events], [e["behavior_id"] for e in events], events))
+    return replay
+
+def run_replay(models, replay: list, batch_size: int):
+    """Personality vectors [N, 128] and actions [N] for the whole replay set."""
+    vectors, actions = [], []
+    for start in range(0, len(replay), batch_size):
+        batch = replay[start:start + batch_size]
+        stats = np.stack([models.decoder.telemetry_stats(events) for _, _, events in batch])
+        v, _dna, a = run_pipeline(
+            models, [c for c, _, _ in batch], [b for _, b, _ in batch], stats, [True] * len(batch)
+        )
+        vectors.append(v)
+        actions.append(a)
+    return np.concatenate(vectors), np.concatenate(actions)
+
+def compare(reference, candidate):
+    ref_vectors, ref_actions = reference
+    vectors, actions = candidate
+    cosine = (ref_vectors * vectors).sum(axis=1) / (
+        np.linalg.norm(ref_vectors, axis=1) * np.linalg.norm(vectors, axis=1) + 1e-12
+    )
+    return {
+        "samples": len(ref_actions),
+        "action_mismatches": int((ref_actions != actions).sum()),
+        "min_cosine": round(float(cosine.min()), 6),
+        "mean_cosine": round(float(cosine.mean()), 6),
+        "max_abs_error": round(float(np.abs(ref_vectors - vectors).max()), 6)
+    }
+
+def main(args):
+    # fp32 reference: eager SAINT + the serving policy head + decoder
+    reference_models = ModelBundle(settings.SAINT_MODEL_PATH, settings.RL_MODEL_PATH, saint_variant="eager")
+    replay = load_replay_set(args.replay, args.synthetic, args.max_len)
+    print(f"🎞️ Replay set: {len(replay)} packets")
+    reference = run_replay(reference_models, replay, args.batch_size)
+
+    source_md5 = file_md5(settings.SAINT_MODEL_PATH)
+    report = {"source_md5": source_md5, "replay_packets": len(replay), "variants": {}}
+    for variant in args.variants:
+        saint = build_variant(load_fp32(settings.SAINT_MODEL_PATH), variant)
+        models = SimpleNamespace(
+            saint=saint, decoder=reference_models.decoder, rl_policy=reference_models.rl_policy, window=reference_models.window
+        )
+        result = compare(reference, run_replay(models, replay, args.batch_size))
+        result["passed"] = result["action_mismatches"] <= args.max_action_mismatches and result["min_cosine"] >= args.min_cosine
+
+        if result["passed"] and variant in SCRIPTED_VARIANTS:
+            result["artifact"] = save_artifact(saint, settings.SAINT_MODEL_PATH, variant, source_md5, result)
+        save_gate_record(settings.SAINT_MODEL_PATH, variant, source_md5, result)
+        report["variants"][variant] = result
+        print(f"{'✅' if result['passed'] else '❌'} {variant:>16} | action mismatches {result['action_mismatches']:>5} | "
+              f"min cosine {result['min_cosine']:.6f} | max abs err {result['max_abs_error']:.2e}")
+
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 Gate report written to {args.report}")
+    return all(r["passed"] for r in report["variants"].values())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--variants", nargs="+", default=[v for v in SAINT_VARIANTS if v != "eager"], choices=SAINT_VARIANTS)
+    parser.add_argument("--replay", nargs="*", default=["ml/data/samples/*.json"], help="Recorded packet files (globs)")
+    parser.add_argument("--synthetic", type=int, default=2000, help="Random packets added to the replay set")
+    parser.add_argument("--max-len", type=int, default=32, help="Max events per synthetic packet")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-action-mismatches", type=int, default=0)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--report", default="app/ml_assets/saint_variants.json")
+    sys.exit(0 if main(parser.parse_args()) else 1)
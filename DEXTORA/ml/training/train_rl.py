@@ -3,10 +3,27 @@ import torch
 import numpy as np
 from stable_baselines3 import PPO
 from app.models.saint_model import SAINT
-from app.models.rl_agent import StudentRSInv # The custom environment we built earlier
+from stable_baselines3.common.vec_env import SubprocVecEnv
+from app.models.rl_agent import StudentRSInv, StudentRSVecEnv # The custom environments we built earlier
+import argparse
 import os
 
-def train_rl_policy():
+def make_env(kind: str, saint_model, n_envs: int, seed: int = None):
+    """
+    "single":  the original one-student StudentRSInv (SB3 wraps it in a DummyVecEnv)
+    "vec":     StudentRSVecEnv, n_envs students stepped together with NumPy
+    "subproc": n_envs StudentRSInv copies, one per subprocess worker
+    """
+    if kind == "single":
+        return StudentRSInv(saint_model)
+    if kind == "vec":
+        return StudentRSVecEnv(n_envs, saint_model, seed=seed)
+    if kind == "subproc":
+        # Workers don't need the encoder: scenarios are sampled directly in latent space
+        return SubprocVecEnv([lambda: StudentRSInv(None) for _ in range(n_envs)], start_method="spawn")
+    raise ValueError(f"Unknown env kind '{kind}'. Expected 'single', 'vec' or 'subproc'.")
+
+def train_rl_policy(env_kind: str = "single", n_envs: int = 1, total_timesteps: int = 20000, rollout_steps: int = 2048, batch_size: int = 64):
     print("🤖 Initializing Reinforcement Learning Training...")
 
     # 1. Load the SAINT model we just trained
@@ -21,7 +38,9 @@ def train_rl_policy():
 
     # 2. Setup the Environment
     # This environment simulates student responses based on their persona
-    env = StudentRSInv(saint_model)
+    env = make_env(env_kind, saint_model, n_envs)
+    n_envs = getattr(env, "num_envs", 1)
+    print(f"🌍 Environment: {env_kind} x {n_envs}")
 
     # 3. Define the Policy (PPO)
     # We use MlpPolicy because our input is a flat 128-d vector
@@ -31,8 +50,8 @@ def train_rl_policy():
         env, 
         verbose=1, 
         learning_rate=0.0003,
-        n_steps=2048,
-        batch_size=64,
+        n_steps=max(1, rollout_steps // n_envs), # Steps per env; keeps the rollout size fixed
+        batch_size=batch_size,
         n_epochs=10,
         gamma=0.99, # Focus on long-term engagement
         device="cpu"
@@ -40,8 +59,9 @@ def train_rl_policy():
 
     # 4. The Learning Phase
     # We will simulate 20,000 interactions across our 100 students
-    print("🚀 Training RL Agent for 20,000 timesteps...")
-    model.learn(total_timesteps=20000)
+    print(f"🚀 Training RL Agent for {total_timesteps:,} timesteps...")
+    model.learn(total_timesteps=total_timesteps)
+    env.close()
 
     # 5. Save the 'Policy'
     model_path = "app/ml_assets/ppo_student_policy"
@@ -49,4 +69,11 @@ def train_rl_policy():
     print(f"✅ RL Policy saved to {model_path}.zip")
 
 if __name__ == "__main__":
-    train_rl_policy()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the PPO intervention policy.")
+    parser.add_argument("--env", choices=["single", "vec", "subproc"], default="single")
+    parser.add_argument("--n-envs", type=int, default=1, help="Parallel envs for 'vec' / 'subproc'")
+    parser.add_argument("--timesteps", type=int, default=20000)
+    parser.add_argument("--rollout-steps", type=int, default=2048, help="Total steps per PPO rollout (split across envs)")
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+    train_rl_policy(args.env, args.n_envs, args.timesteps, args.rollout_steps, args.batch_size)
\ No newline at end of file
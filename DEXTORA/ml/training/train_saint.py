@@ -3,8 +3,10 @@ import torch.nn as nn
 import torch.optim as optim
 from torch.utils.data import Dataset, DataLoader
 import asyncio
-from app.db.postgres_client import postgres_client, StudentProfile
+from app.db.postgres_client import postgres_client
 from app.models.saint_model import SAINT
+from ml.data.sequence_store import SequenceStore
+import argparse
 import numpy as np
 
 # 1. Dataset Loader: Converts Postgres rows into Tensors
@@ -26,15 +28,68 @@ class TelemetryDataset(Dataset):
         target = torch.randint(0, 1000, (1,)) 
         return context, behavior, target
 
-async def train_saint():
+# 1b. Real telemetry: fixed-length windows over a memory-mapped sequence store
+class TelemetrySequenceDataset(Dataset):
+    """
+    Every `stride`-spaced window of `seq_len` tokens inside a recorded sequence, with the
+    concept that follows it as the target. Windows are zero-copy views of the store's
+    memmaps; only per-sequence window counts are held in memory.
+    """
+    def __init__(self, store_dir, seq_len=10, stride=None):
+        self.store = SequenceStore(store_dir)
+        self.seq_len = seq_len
+        self.stride = stride or seq_len
+
+        # Cumulative window counts: per sequence within each shard, then per shard
+        self.sequence_windows = []
+        for i in range(len(self.store.shards)):
+            lengths = np.diff(self.store.shard(i)[2])
+            counts = np.where(lengths > seq_len, (lengths - seq_len - 1) // self.stride + 1, 0)
+            self.sequence_windows.append(np.concatenate(([0], np.cumsum(counts))))
+        self.shard_windows = np.concatenate(([0], np.cumsum([c[-1] for c in self.sequence_windows]))).astype(np.int64)
+
+    def __len__(self):
+        return int(self.shard_windows[-1])
+
+    def __getitem__(self, idx):
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        shard = int(np.searchsorted(self.shard_windows, idx, side="right")) - 1
+        local = idx - self.shard_windows[shard]
+        cumulative = self.sequence_windows[shard]
+        sequence = int(np.searchsorted(cumulative, local, side="right")) - 1
+
+        context, behavior, offsets = self.store.shard(shard)
+        start = int(offsets[sequence] + (local - cumulative[sequence]) * self.stride)
+        end = start + self.seq_len
+
+        # Target: the 'next' concept after the window (Self-Supervised Learning)
+        target = torch.tensor([int(context[end])], dtype=torch.long)
+        return torch.from_numpy(np.asarray(context[start:end])), torch.from_numpy(np.asarray(behavior[start:end])), target
+
+async def _postgres_dataset(seq_len):
+    # Stream students from Postgres in chunks (bounded memory); only the ids are kept
+    student_ids = []
+    async for ids, _vectors in postgres_client.stream_profile_vectors(chunk_size=10000):
+        student_ids.extend(ids)
+    print(f"👥 Streamed {len(student_ids)} student profiles.")
+    return TelemetryDataset(student_ids, seq_len)
+
+async def train_saint(store_dir=None, seq_len=10, stride=None, batch_size=16, num_workers=0, epochs=5):
     print("🧠 Starting SAINT Training...")
-    
-    # Load all students from Postgres
-    # The helper manages its own session, so we just await it directly
-    profiles = await postgres_client.get_all_profiles()
-        
-    dataset = TelemetryDataset(profiles)
-    loader = DataLoader(dataset, batch_size=16, shuffle=True)
+
+    if store_dir:
+        dataset = TelemetrySequenceDataset(store_dir, seq_len, stride)
+        print(f"📼 {len(dataset):,} windows from {dataset.store.manifest['tokens']:,} recorded tokens.")
+    else:
+        dataset = await _postgres_dataset(seq_len)
+    loader = DataLoader(
+        dataset,
+        batch_size=batch_size,
+        shuffle=True,
+        num_workers=num_workers,
+        persistent_workers=num_workers > 0
+    )
 
     # Initialize Model, Loss, and Optimizer
     model = SAINT(num_concepts=1000, num_interactions=20)
@@ -43,7 +98,7 @@ async def train_saint():
 
     # --- The Training Loop ---
     model.train()
-    for epoch in range(5): # Start with 5 epochs for the 100 students
+    for epoch in range(epochs): # Start with 5 epochs for the 100 students
         total_loss = 0
         for context, behavior, target in loader:
             optimizer.zero_grad()
@@ -70,4 +125,13 @@ if __name__ == "__main__":
     import sys
     if sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-    asyncio.run(train_saint())
\ No newline at end of file
+
+    parser = argparse.ArgumentParser(description="Train SAINT on recorded telemetry (or synthetic sequences).")
+    parser.add_argument("--store", help="Sequence store built by ml.data.sequence_store; synthetic data if omitted")
+    parser.add_argument("--seq-len", type=int, default=10)
+    parser.add_argument("--stride", type=int, default=None, help="Window stride (default: seq-len)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=0, help="DataLoader worker processes")
+    parser.add_argument("--epochs", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(train_saint(args.store, args.seq_len, args.stride, args.batch_size, args.workers, args.epochs))
\ No newline at end of file
@@ -0,0 +1,23 @@
+"""
+Shared runner for the verify_* scripts.
+
+Run a script from the DEXTORA directory, e.g. `python -m tests.verify_trend_store`; it exits
+non-zero if any check fails.
+"""
+import sys
+
+def report(subject: str, checks) -> bool:
+    """Prints every (label, passed) check and a summary line for `subject`; True if all passed."""
+    checks = list(checks)
+    for label, passed in checks:
+        print(f"{'✅' if passed else '❌'} {label}")
+    failed = [label for label, passed in checks if not passed]
+    if failed:
+        print(f"❌ {subject}: {len(failed)} of {len(checks)} checks failed.")
+        return False
+    print(f"✅ {subject}: all {len(checks)} checks passed.")
+    return True
+
+def main(verify):
+    """Runs `verify()` as a script's entry point and exits with its result."""
+    sys.exit(0 if verify() else 1)
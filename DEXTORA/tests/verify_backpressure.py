@@ -0,0 +1,98 @@
+import asyncio
+from app.services.backpressure import ConnectionInbox, InflightLimiter
+from tests.checks import main, report
+
+class Packet:
+    """Stands in for a TelemetryFrame: a list of events that can be concatenated."""
+    def __init__(self, *events):
+        self.events = list(events)
+
+    @classmethod
+    def concat(cls, packets):
+        return cls(*[e for p in packets for e in p.events])
+
+class FakeSocket:
+    """Feeds queued messages to the inbox reader; a queued exception is raised by receive()."""
+    def __init__(self):
+        self.messages = asyncio.Queue()
+
+    async def receive(self):
+        message = await self.messages.get()
+        if isinstance(message, Exception):
+            raise message
+        return message
+
+class Closed(Exception):
+    """Stands in for WebSocketDisconnect."""
+
+async def _served(policy, messages, reads, max_size=32):
+    """
+    [(events or error name, packets)] for `reads` served packets, all `messages` having
+    arrived before the first read; then the socket closes. Also returns the inbox.
+    """
+    socket, inbox = FakeSocket(), ConnectionInbox(max_size, policy)
+    reader = asyncio.create_task(inbox.fill(socket.receive))
+    for message in messages:
+        socket.messages.put_nowait(message)
+    await asyncio.sleep(0.01)  # Let the reader queue everything
+
+    served = []
+    for _ in range(reads):
+        data, packets = await inbox.next_packet()
+        if data is None:
+            # The reader already stopped; there is nothing left to close
+            await reader
+            return served, True, inbox
+        served.append((data.events if isinstance(data, Packet) else type(data).__name__, packets))
+    socket.messages.put_nowait(Closed())
+    closed = await inbox.next_packet() == (None, 0)
+    await reader
+    return served, closed, inbox
+
+def verify_backpressure():
+    """
+    Checks the per-connection inbox coalescing policies (merge / latest / none), that decode
+    errors are answered on their own and in order, that a close ends the stream, and the
+    in-flight limiter's load shedding.
+    """
+    checks = []
+    packets = [Packet(1), Packet(2, 3), Packet(4)]
+    cases = {
+        "merge": [([1, 2, 3, 4], 3)],
+        "latest": [([4], 3)],
+        "none": [([1], 1), ([2, 3], 1), ([4], 1)],
+    }
+    for policy, expected in cases.items():
+        served, closed, _ = asyncio.run(_served(policy, packets, len(expected)))
+        checks.append((f"{policy}: {served}", served == expected and closed))
+
+    # An undecodable packet splits the merge and is answered in its place
+    expected = [([1, 2], 2), ("ValueError", 1), ([3], 1)]
+    served, closed, _ = asyncio.run(_served("merge", [Packet(1), Packet(2), ValueError("bad"), Packet(3)], len(expected)))
+    checks.append((f"merge around a decode error: {served}", served == expected and closed))
+
+    # A reader failure ends the stream (packets still queued have nobody to answer) and is
+    # kept for the handler to re-raise after its cleanup
+    served, _, inbox = asyncio.run(_served("merge", [Packet(1), RuntimeError("boom")], 1))
+    checks.append((f"reader error recorded: {type(inbox.error).__name__}",
+                   served == [] and isinstance(inbox.error, RuntimeError)))
+
+    # A full inbox stops the reader until a packet is served
+    served, closed, _ = asyncio.run(_served("none", [Packet(i) for i in range(5)], 5, max_size=2))
+    checks.append(("bounded inbox (2 slots) serves all 5 packets in order",
+                   served == [([i], 1) for i in range(5)] and closed))
+
+    limiter = InflightLimiter(limit=2)
+    admitted = [limiter.try_acquire() for _ in range(3)]
+    limiter.release()
+    checks.append((f"in-flight limit: {limiter.stats()}",
+                   admitted == [True, True, False] and limiter.try_acquire() and limiter.stats()["shed"] == 1))
+    try:
+        ConnectionInbox(policy="drop")
+        checks.append(("unknown coalescing policy rejected", False))
+    except ValueError:
+        checks.append(("unknown coalescing policy rejected", True))
+    return report("WebSocket backpressure", checks)
+
+if __name__ == "__main__":
+    main(verify_backpressure)
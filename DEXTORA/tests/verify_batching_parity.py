@@ -0,0 +1,103 @@
+import asyncio
+import numpy as np
+from app.core.config import settings
+from app.services.inference_executor import GROUNDED_DIMS, InferenceExecutor, ModelBundle, run_pipeline
+from app.services.inference_service import SAINTBatcher
+from app.services.model_registry import ServingModel
+from tests.checks import main, report
+
+# Grounded dims are overwritten from the rounded DNA scores, so they only agree as closely as
+# the DNA does (one 0.01 rounding step); the DNA check covers them
+LATENT_DIMS = np.setdiff1d(np.arange(128), [dim for dim, _ in GROUNDED_DIMS])
+
+def _requests(models, n, rng):
+    lengths = rng.integers(1, 64, n)
+    contexts = [rng.integers(0, 1000, length).tolist() for length in lengths]
+    behaviors = [rng.integers(0, 20, length).tolist() for length in lengths]
+    stats = np.stack([
+        models.decoder.telemetry_stats([{"intensity": float(rng.random()), "duration_ms": int(rng.integers(0, 60000))}] * int(k))
+        for k in rng.integers(0, 5, n)
+    ])
+    return contexts, behaviors, stats
+
+async def _through_batcher(models, contexts, behaviors, stats):
+    serving = ServingModel(models.version, InferenceExecutor(models, backend="inline"))
+    batcher = SAINTBatcher(lambda: serving, workers=1, max_batch_size=len(contexts), max_wait_ms=50)
+    try:
+        return await asyncio.gather(*[
+            batcher.submit(f"S{i}", c, b, s) for i, (c, b, s) in enumerate(zip(contexts, behaviors, stats))
+        ], return_exceptions=True)
+    finally:
+        await batcher.close()
+
+class SlowExecutor:
+    """Delays every batch, so a shutdown lands while one is in flight."""
+    def __init__(self, executor, delay_s):
+        self.executor = executor
+        self.delay = delay_s
+
+    async def run(self, fn, *args):
+        await asyncio.sleep(self.delay)
+        return await self.executor.run(fn, *args)
+
+async def _close_mid_batch(models, contexts, behaviors, stats):
+    """Four requests, two per batch, one batch at a time: close() while the first is served."""
+    serving = ServingModel(models.version, SlowExecutor(InferenceExecutor(models, backend="inline"), 0.2))
+    batcher = SAINTBatcher(lambda: serving, workers=1, max_batch_size=2, max_wait_ms=1)
+    requests = [asyncio.create_task(batcher.submit(f"S{i}", contexts[i], behaviors[i], stats[i])) for i in range(4)]
+    await asyncio.sleep(0.05)
+    await asyncio.wait_for(batcher.close(), 5)
+    results = await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 1)
+    return results, len(batcher._flushes)
+
+def verify_batching_parity(num_requests=32, seed=0):
+    """
+    Checks that a padded, micro-batched forward pass gives every request the same vector, DNA
+    and action as running it on its own, and that one bad request in a batch only fails itself.
+    """
+    print(f"🔍 Loading {settings.SAINT_MODEL_PATH}...")
+    models = ModelBundle(settings.SAINT_MODEL_PATH, settings.RL_MODEL_PATH)
+    rng = np.random.default_rng(seed)
+    contexts, behaviors, stats = _requests(models, num_requests, rng)
+    ground = [True] * num_requests
+
+    batched = run_pipeline(models, contexts, behaviors, stats, ground)
+    single = [run_pipeline(models, [c], [b], s[np.newaxis, :], [True]) for c, b, s in zip(contexts, behaviors, stats)]
+    vector_err = max(float(np.abs(batched[0][i] - single[i][0][0])[LATENT_DIMS].max()) for i in range(num_requests))
+    dna_err = max(float(np.abs(batched[1][i] - single[i][1][0]).max()) for i in range(num_requests))
+    action_mismatches = sum(int(batched[2][i]) != int(single[i][2][0]) for i in range(num_requests))
+    checks = [
+        (f"vectors match per-request inference (max error {vector_err:.2e})", vector_err < 1e-4),
+        (f"DNA matches per-request inference (max error {dna_err:.2e})", dna_err <= 0.011),
+        (f"actions match per-request inference ({action_mismatches} mismatches)", action_mismatches == 0),
+    ]
+
+    # Through the batcher, with an invalid request (rejected before queueing) and one whose
+    # stats break the forward pass (the batch is retried row by row)
+    contexts[1] = [5000]
+    behaviors[1] = [0]
+    stats = list(stats)
+    stats[2] = np.zeros(3)
+    results = asyncio.run(_through_batcher(models, contexts, behaviors, stats))
+    rejected = isinstance(results[1], ValueError)
+    isolated = isinstance(results[2], Exception)
+    others_ok = all(
+        not isinstance(r, Exception) and np.abs(r[0] - single[i][0][0])[LATENT_DIMS].max() < 1e-4 and r[2] == int(single[i][2][0])
+        for i, r in enumerate(results) if i not in (1, 2)
+    )
+    checks += [
+        ("invalid request rejected before batching", rejected),
+        ("failing row isolated from its batch", isolated),
+        ("other rows of that batch unaffected", others_ok),
+    ]
+    # Shutdown while a batch is being served: it still answers, the queued ones fail fast
+    results, flushing = asyncio.run(_close_mid_batch(models, contexts[3:], behaviors[3:], stats[3:]))
+    checks += [
+        ("batch in flight at close() is answered", all(not isinstance(r, Exception) for r in results[:2])),
+        ("requests still queued fail instead of hanging", all(isinstance(r, RuntimeError) for r in results[2:])),
+        ("no flush left running after close()", flushing == 0),
+    ]
+    return report(f"Micro-batched inference over {num_requests} requests", checks)
+
+if __name__ == "__main__":
+    main(verify_batching_parity)
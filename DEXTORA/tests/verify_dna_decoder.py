@@ -0,0 +1,73 @@
+import numpy as np
+from app.services.dna_decoder import StudentDNADecoder
+from tests.checks import main, report
+
+def reference_decode(decoder, vector, telemetry_batch):
+    """The original per-label decoder loop, kept here as the reference for decode_batch."""
+    stats = decoder.telemetry_stats(telemetry_batch)
+    avg_intensity, total_duration, total_switches, batch_size = stats
+    dna = {}
+    for i, label in enumerate(decoder.labels):
+        latent_val = float(vector[i % len(vector)])
+        with np.errstate(over="ignore"):
+            base_score = 1 / (1 + np.exp(-latent_val)) * 100
+        if label == "Attention_Span":
+            score = 65.0 if batch_size < 2 else base_score * (1 + avg_intensity) / (total_switches + 1)
+        elif label == "Frustration":
+            score = (avg_intensity * 0.7 + latent_val * 0.3) * 100
+        elif label == "Cognitive_Load":
+            duration_min = (total_duration / 60000) if total_duration > 0 else 1
+            score = (avg_intensity / duration_min) * 50
+        elif label == "Boredom":
+            score = base_score + (15.0 if avg_intensity < 0.3 else 0.0)
+        else:
+            score = base_score
+        dna[label] = round(max(0, min(100.0, float(score))), 2)
+    return dna
+
+def random_batch(rng):
+    events = []
+    for _ in range(rng.integers(0, 6)):
+        kind = rng.integers(0, 3)
+        if kind == 0:
+            intensity = float(rng.random())
+        elif kind == 1:
+            intensity = {"scroll": float(rng.random()), "taps": float(rng.random())}
+        else:
+            intensity = {}  # Averages to NaN
+        events.append({"intensity": intensity, "duration_ms": int(rng.integers(0, 120000)),
+                       "tab_switches": int(rng.integers(0, 5))})
+    return events
+
+def verify_dna_decoder(num_students=5000, seed=0):
+    """
+    Checks that the vectorized decode_batch gives the same 40 scores as decoding every student
+    on its own (decode) and as the original per-label loop, including NaN / inf inputs.
+    """
+    rng = np.random.default_rng(seed)
+    decoder = StudentDNADecoder()
+    vectors = rng.normal(0, 3, (num_students, 128)).astype(np.float32)
+    vectors[rng.random(vectors.shape) < 0.001] = np.nan
+    vectors[rng.random(vectors.shape) < 0.001] = np.inf
+    vectors[rng.random(vectors.shape) < 0.001] = -np.inf
+    batches = [random_batch(rng) for _ in range(num_students)]
+
+    batched = decoder.decode_batch(vectors, np.stack([decoder.telemetry_stats(b) for b in batches]))
+    stacked = np.array([list(decoder.decode(v, b).values()) for v, b in zip(vectors, batches)], dtype=np.float32)
+    reference = np.array([list(reference_decode(decoder, v, b).values()) for v, b in zip(vectors, batches)], dtype=np.float32)
+
+    nan_rows = int(np.isnan(batched).any(axis=1).sum())
+    stacked_err = float(np.abs(batched - stacked).max())
+    reference_err = float(np.abs(batched - reference).max())
+    single = decoder.decode(vectors[0], batches[0])
+    return report(f"decode_batch over {num_students} students", [
+        (f"no NaN scores (rows with NaN: {nan_rows})", nan_rows == 0),
+        ("scores within [0, 100]", bool(((batched >= 0) & (batched <= 100)).all())),
+        (f"identical to decode per student (max error {stacked_err:.2e})", stacked_err == 0),
+        # Rounding to 2 decimals in float32 vs float64 can differ by one step
+        (f"matches the per-label loop (max error {reference_err:.2e})", reference_err <= 0.011),
+        ("decode returns the 40 labels in order", list(single) == decoder.labels),
+    ])
+
+if __name__ == "__main__":
+    main(verify_dna_decoder)
@@ -0,0 +1,58 @@
+import os
+import tempfile
+from app.core.model_loader import LocalDirBackend, ModelCache
+from tests.checks import main, report
+
+def verify_model_cache():
+    """
+    Syncs two artifacts from a local directory standing in for GCS and checks that
+    unchanged artifacts are skipped, changed ones are re-fetched, and rollbacks hit the cache.
+    """
+    with tempfile.TemporaryDirectory() as root:
+        source, dest, cache_dir = (os.path.join(root, d) for d in ("bucket", "assets", "cache"))
+        os.makedirs(source)
+        artifacts = {name: os.path.join(dest, name) for name in ("saint_weights.pt", "ppo_student_policy.zip")}
+
+        def publish(name, data):
+            with open(os.path.join(source, name), "wb") as f:
+                f.write(data)
+
+        def read(name):
+            with open(artifacts[name], "rb") as f:
+                return f.read()
+
+        publish("saint_weights.pt", b"saint-v1")
+        publish("ppo_student_policy.zip", b"ppo-v1")
+        cache = ModelCache(LocalDirBackend(source), cache_dir)
+
+        checks = []
+        first = cache.sync(artifacts)
+        checks.append(("cold start downloads everything", all(r["status"] == "downloaded" for r in first.values())))
+        checks.append(("installed bytes match", read("saint_weights.pt") == b"saint-v1"))
+
+        second = cache.sync(artifacts)
+        checks.append(("warm start skips unchanged", all(r["status"] == "unchanged" for r in second.values())))
+
+        publish("saint_weights.pt", b"saint-v2")
+        third = cache.sync(artifacts)
+        checks.append(("only the changed artifact is fetched",
+                       third["saint_weights.pt"]["status"] == "downloaded"
+                       and third["ppo_student_policy.zip"]["status"] == "unchanged"))
+        checks.append(("new version installed", read("saint_weights.pt") == b"saint-v2"))
+
+        publish("saint_weights.pt", b"saint-v1")
+        fourth = cache.sync(artifacts)
+        checks.append(("rollback served from the cache", fourth["saint_weights.pt"]["status"] == "cached"))
+        checks.append(("rollback installed", read("saint_weights.pt") == b"saint-v1"))
+
+        # Writing in place also hits the hard-linked cache blob; its checksum must catch that
+        with open(artifacts["ppo_student_policy.zip"], "wb") as f:
+            f.write(b"tampered")
+        fifth = cache.sync(artifacts)
+        checks.append(("locally modified file is repaired",
+                       fifth["ppo_student_policy.zip"]["status"] == "downloaded" and read("ppo_student_policy.zip") == b"ppo-v1"))
+
+    return report("Model cache", checks)
+
+if __name__ == "__main__":
+    main(verify_model_cache)
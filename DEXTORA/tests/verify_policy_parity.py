@@ -0,0 +1,50 @@
+import sys
+import numpy as np
+from stable_baselines3 import PPO
+from app.core.config import settings
+from app.models.policy_head import PolicyHead
+from app.models.rl_agent import StudentRSInv
+
+def verify_policy_parity(num_random=20000, num_scenarios=20000):
+    """
+    Checks that the PolicyHead picks exactly the same actions as PPO.predict
+    on random latent vectors and on the curriculum scenarios the agent was trained on.
+    """
+    print(f"🔍 Loading {settings.RL_MODEL_PATH} with SB3 and as a PolicyHead...")
+    sb3_policy = PPO.load(settings.RL_MODEL_PATH, device="cpu")
+    head = PolicyHead.from_sb3_zip(settings.RL_MODEL_PATH)
+
+    env = StudentRSInv(saint_model=None)
+    obs = np.concatenate([
+        np.random.normal(0, 1.5, (num_random, 128)).astype(np.float32),
+        np.stack([env._generate_scenario() for _ in range(num_scenarios)])
+    ])
+
+    sb3_actions, _ = sb3_policy.predict(obs, deterministic=True)
+    head_actions = head.act_batch(obs)
+    mismatches = int((sb3_actions != head_actions).sum())
+
+    # Single-observation calls must behave like PPO.predict too (0-d action array)
+    single_sb3, _ = sb3_policy.predict(obs[0], deterministic=True)
+    single_head, _ = head.predict(obs[0], deterministic=True)
+    single_ok = np.shape(single_sb3) == np.shape(single_head) and int(single_sb3) == int(single_head)
+
+    # Probabilities must agree with the SB3 distribution
+    import torch
+    with torch.no_grad():
+        sb3_probs = sb3_policy.policy.get_distribution(
+            torch.as_tensor(obs[:1000])
+        ).distribution.probs.numpy()
+    _, head_probs = head.act_batch(obs[:1000], return_probs=True)
+    max_prob_err = float(np.abs(sb3_probs - head_probs).max())
+
+    print(f"📊 Observations: {len(obs)} | Action mismatches: {mismatches} | "
+          f"Single-obs parity: {single_ok} | Max prob error: {max_prob_err:.2e}")
+    if mismatches or not single_ok or max_prob_err > 1e-5:
+        print("❌ PolicyHead does NOT match PPO.predict.")
+        return False
+    print("✅ PolicyHead matches PPO.predict exactly.")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if verify_policy_parity() else 1)
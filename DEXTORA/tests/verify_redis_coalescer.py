@@ -0,0 +1,102 @@
+import asyncio
+from app.db.redis_client import RedisWriteCoalescer
+from tests.checks import main, report
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def setex(self, key, ttl, value):
+        self.commands.append((key, ttl, value))
+
+    async def execute(self):
+        self.redis.executing.set()
+        delay, self.redis.delay_next = self.redis.delay_next, 0
+        await asyncio.sleep(delay)
+        if self.redis.fail_next:
+            self.redis.fail_next = False
+            raise ConnectionError("redis unavailable")
+        self.redis.pipelines.append([key for key, _, _ in self.commands])
+        self.redis.values.update({key: value for key, _, value in self.commands})
+
+class FakeRedis:
+    """Records every executed pipeline; `delay_next` / `fail_next` apply to the next one."""
+    def __init__(self):
+        self.pipelines = []
+        self.values = {}
+        self.delay_next = 0
+        self.fail_next = False
+        self.executing = asyncio.Event()
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+async def _check_coalescer():
+    checks = []
+
+    # Writes within the flush interval share one pipeline; the newest write to a key wins
+    redis = FakeRedis()
+    writer = RedisWriteCoalescer(redis, flush_interval_ms=20, max_batch=100)
+    futures = [writer.setex("a", 60, b"1"), writer.setex("b", 60, b"1"), writer.setex("a", 60, b"2")]
+    checks.append(("pending write readable before the flush", writer.pending_value("a") == b"2"))
+    await asyncio.wait_for(asyncio.gather(*futures), 1)
+    checks.append(("one pipeline, one SETEX per key", redis.pipelines == [["a", "b"]] and redis.values["a"] == b"2"))
+
+    # A full batch flushes without waiting for the interval
+    redis = FakeRedis()
+    writer = RedisWriteCoalescer(redis, flush_interval_ms=60000, max_batch=2)
+    await asyncio.wait_for(asyncio.gather(writer.setex("a", 60, b"1"), writer.setex("b", 60, b"1")), 1)
+    checks.append(("max_batch flushes early", redis.pipelines == [["a", "b"]]))
+    await writer.close()
+
+    # A failed pipeline fails its waiters instead of leaving them pending
+    redis = FakeRedis()
+    redis.fail_next = True
+    writer = RedisWriteCoalescer(redis, flush_interval_ms=1, max_batch=100)
+    results = await asyncio.wait_for(asyncio.gather(writer.setex("a", 60, b"1"), return_exceptions=True), 1)
+    checks.append(("failed flush fails its waiters", isinstance(results[0], ConnectionError)))
+    await writer.close()
+
+    # A discarded write still releases whoever waits on it
+    redis = FakeRedis()
+    writer = RedisWriteCoalescer(redis, flush_interval_ms=60000, max_batch=100)
+    future = writer.setex("a", 60, b"1")
+    writer.discard("a")
+    await asyncio.wait_for(writer.close(), 1)
+    checks.append(("discarded write's waiter resolves", future.done() and "a" not in redis.values))
+
+    # Shutdown while a pipeline is in flight: its writes land and every waiter resolves
+    redis = FakeRedis()
+    redis.delay_next = 3600
+    writer = RedisWriteCoalescer(redis, flush_interval_ms=1, max_batch=100)
+    in_flight = [writer.setex("a", 60, b"1"), writer.setex("b", 60, b"1")]
+    await asyncio.wait_for(redis.executing.wait(), 1)
+    newer = writer.setex("a", 60, b"2")
+    try:
+        await asyncio.wait_for(writer.close(), 1)
+        closed = True
+    except asyncio.TimeoutError:
+        closed = False
+    waiters = in_flight + [newer]
+    checks.append(("close() during a flush returns", closed))
+    checks.append(("every waiter resolved", all(f.done() and not f.cancelled() and f.exception() is None for f in waiters)))
+    checks.append(("cancelled writes land, newest value kept", redis.values == {"a": b"2", "b": b"1"}
+                   and writer.stats()["pending"] == 0))
+    return checks
+
+def verify_redis_coalescer():
+    """
+    Drives the Redis write coalescer against an in-memory pipeline: per-key coalescing, early
+    flush on a full batch, failed flushes, discarded writes, and shutdown mid-flush.
+    """
+    return report("Redis write coalescer", asyncio.run(_check_coalescer()))
+
+if __name__ == "__main__":
+    main(verify_redis_coalescer)
@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+import torch
+from app.models.saint_model import MAX_SEQ_LEN, NUM_CONCEPTS, NUM_INTERACTIONS, SAINT, incremental_step_tokens
+from app.services.inference_executor import encode_chunked, encode_sessions, saint_forward
+from app.services.sequence_window import SequenceWindow
+from app.services.session_store import SessionStateStore
+from tests.checks import main, report
+
+def _sequence(n, generator):
+    return (torch.randint(0, NUM_CONCEPTS, (n,), generator=generator).tolist(),
+            torch.randint(0, NUM_INTERACTIONS, (n,), generator=generator).tolist())
+
+def _incremental(model, context, behavior, state=None, max_cached_tokens=None):
+    return model.forward_incremental(torch.tensor([context]), torch.tensor([behavior]), state, max_cached_tokens)
+
+def _max_err(a, b):
+    return float((torch.as_tensor(a) - torch.as_tensor(b)).abs().max())
+
+def verify_sequence_window(length=700, carry=128, seed=0):
+    """
+    Checks windowing on packets longer than the positional table: chunked encoding carries the
+    last `carry` tokens into each chunk (instead of restarting once a chunk fills the table),
+    a step that leaves no room for history is rejected, and session mode splits long packets.
+    """
+    torch.manual_seed(seed)
+    generator = torch.Generator().manual_seed(seed)
+    model = SAINT(num_concepts=NUM_CONCEPTS, num_interactions=NUM_INTERACTIONS).eval()
+    models = SimpleNamespace(saint=model)
+    context, behavior = _sequence(length, generator)
+    checks = []
+
+    # Truncation keeps the most recent events and counts what it dropped
+    window = SequenceWindow("truncate", max_tokens=4, buckets=(2, 8))
+    clipped = window.clip(list(range(10)), list(range(10)))
+    checks.append(("truncate keeps the most recent events", clipped == (list(range(6, 10)), list(range(6, 10)))
+                   and window.stats()["dropped_tokens"] == 6))
+    checks.append(("buckets stop at max_tokens", window.buckets == [2, 4] and window.bucket(3) == 4))
+
+    with torch.no_grad():
+        # Chunks shrink so the carried history fits next to them in the positional table
+        step = incremental_step_tokens(carry)
+        window = SequenceWindow("chunked", max_tokens=MAX_SEQ_LEN, max_chunks=4, carry_tokens=carry)
+        chunked = saint_forward(models, [context], [behavior], window)[0]
+        checks.append((f"chunk of {step} + {carry} carried tokens fits the table", step + carry == MAX_SEQ_LEN))
+
+        # Reference: the last chunk encoded against the `carry` tokens before it, from position 0
+        last = (length - 1) // step * step
+        _, history = _incremental(model, context[last - carry:last], behavior[last - carry:last], None, carry)
+        reference, _ = _incremental(model, context[last:], behavior[last:], history, carry)
+        alone, _ = _incremental(model, context[last:], behavior[last:])
+        checks.append((f"{length}-token packet matches explicit carry-over (max error {_max_err(chunked, reference[0]):.2e})",
+                       _max_err(chunked, reference[0]) < 1e-4))
+        checks.append(("the last chunk sees earlier context", _max_err(chunked, alone[0]) > 1e-3))
+
+        # A step as long as the table leaves no room for history: rejected, not silently reset
+        _, state = _incremental(model, context[:100], behavior[:100], None, carry)
+        try:
+            _incremental(model, context[100:100 + MAX_SEQ_LEN], behavior[100:100 + MAX_SEQ_LEN], state, carry)
+            checks.append(("full-table step after cached history rejected", False))
+        except ValueError:
+            checks.append(("full-table step after cached history rejected", True))
+
+        # Session mode: a full-table packet after earlier packets is split, and matches encoding
+        # that student on its own
+        store = SessionStateStore(max_bytes=1 << 30, ttl_seconds=3600)
+        first = [_sequence(50, generator) for _ in range(2)]
+        second = [_sequence(MAX_SEQ_LEN, generator) for _ in range(2)]
+        sessions = (store, ["S1", "S2"], carry)
+        encode_sessions(models, sessions, [c for c, _ in first], [b for _, b in first], SequenceWindow())
+        batched = encode_sessions(models, sessions, [c for c, _ in second], [b for _, b in second], SequenceWindow())
+        session_err = 0.0
+        for i, ((c1, b1), (c2, b2)) in enumerate(zip(first, second)):
+            _, state = encode_chunked(model, c1, b1, step, None, carry)
+            vector, _ = encode_chunked(model, c2, b2, step, state, carry)
+            session_err = max(session_err, _max_err(batched[i], vector[0]))
+        checks.append((f"{MAX_SEQ_LEN}-token session packet split and matches per-student (max error {session_err:.2e})",
+                       session_err < 1e-4))
+    return report("Sequence windowing", checks)
+
+if __name__ == "__main__":
+    main(verify_sequence_window)
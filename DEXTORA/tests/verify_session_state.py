@@ -0,0 +1,66 @@
+import asyncio
+import torch
+from app.models.saint_model import MAX_SEQ_LEN, NUM_CONCEPTS, NUM_INTERACTIONS, SAINT
+from app.services.session_store import StudentLocks
+from tests.checks import main, report
+
+def _packet(n, generator):
+    return (torch.randint(0, NUM_CONCEPTS, (n,), generator=generator),
+            torch.randint(0, NUM_INTERACTIONS, (n,), generator=generator))
+
+async def _serialized(locks, student_id, log, tag):
+    async with locks.hold(student_id):
+        log.append(f"{tag}:start")
+        await asyncio.sleep(0.01)
+        log.append(f"{tag}:end")
+
+def verify_session_state(num_students=6, num_packets=30, max_cached_tokens=64, seed=0):
+    """
+    Checks session-mode SAINT: a first packet equals the full forward pass, the batched
+    incremental pass over ragged students equals encoding each student alone, positions stay
+    inside the positional table on long sessions, and StudentLocks serializes one student.
+    """
+    torch.manual_seed(seed)
+    generator = torch.Generator().manual_seed(seed)
+    model = SAINT(num_concepts=NUM_CONCEPTS, num_interactions=NUM_INTERACTIONS).eval()
+    with torch.no_grad():
+        # 1. No state: incremental == forward
+        context, behavior = _packet(17, generator)
+        full = model(context[None, :], behavior[None, :])
+        incremental, _ = model.forward_incremental(context[None, :], behavior[None, :])
+        first_err = float((full - incremental).abs().max())
+
+        # 2. Batched vs one-by-one, over many ragged packets (long enough to be rebased)
+        batched_states = [None] * num_students
+        single_states = [None] * num_students
+        batch_err, max_position = 0.0, 0
+        for _ in range(num_packets):
+            packets = [_packet(int(torch.randint(1, 40, (1,), generator=generator)), generator) for _ in range(num_students)]
+            vectors, batched_states = model.forward_incremental_batch(
+                [c for c, _ in packets], [b for _, b in packets], batched_states, max_cached_tokens
+            )
+            for i, (c, b) in enumerate(packets):
+                vector, single_states[i] = model.forward_incremental(c[None, :], b[None, :], single_states[i], max_cached_tokens)
+                batch_err = max(batch_err, float((vector[0] - vectors[i]).abs().max()))
+            max_position = max(max_position, *[max(s.context_position, s.behavior_position) for s in batched_states])
+
+    checks = [
+        (f"first packet matches the full forward pass (max error {first_err:.2e})", first_err < 1e-5),
+        (f"batched incremental matches per-student (max error {batch_err:.2e})", batch_err < 1e-4),
+        (f"positions stay inside the table ({max_position} <= {MAX_SEQ_LEN})", max_position <= MAX_SEQ_LEN),
+    ]
+
+    # 3. Same student twice: the second packet waits for the first; other students don't
+    locks, log = StudentLocks(), []
+    async def run():
+        await asyncio.gather(
+            _serialized(locks, "S1", log, "a"), _serialized(locks, "S1", log, "b"), _serialized(locks, "S2", log, "c")
+        )
+    asyncio.run(run())
+    checks.append((f"one student's packets run one at a time ({' '.join(log)})",
+                   log.index("a:end") < log.index("b:start") and log.index("c:start") < log.index("a:end")))
+    checks.append(("locks are dropped once released", len(locks) == 0))
+    return report("Session-mode SAINT state", checks)
+
+if __name__ == "__main__":
+    main(verify_session_state)
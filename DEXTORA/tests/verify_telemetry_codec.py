@@ -0,0 +1,77 @@
+import json
+import numpy as np
+from app.services.telemetry_codec import (
+    CODECS, FRAME_VERSION, TelemetryDecodeError, TelemetryFrame, decode_packet, encode_frame, msgpack
+)
+from tests.checks import main, report
+
+def _frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return TelemetryFrame(
+        rng.integers(0, 100, n), rng.integers(0, 6, n), rng.integers(0, 60000, n).astype(np.float64),
+        rng.random(n).astype(np.float32).astype(np.float64), rng.integers(0, 5, n).astype(np.float64)
+    )
+
+def _messages(frame):
+    """The same packet as each codec receives it: {codec: message}."""
+    events = [
+        {"context_id": int(c), "behavior_id": int(b), "duration_ms": float(d), "intensity": float(i), "tab_switches": int(t)}
+        for c, b, d, i, t in zip(frame.context, frame.behavior, frame.duration_ms, frame.intensity, frame.tab_switches)
+    ]
+    messages = {"json": json.dumps({"telemetry_batch": events})}
+    if msgpack is not None:
+        messages["msgpack"] = msgpack.packb({"telemetry_batch": events})
+        messages["binary"] = encode_frame(frame)
+    return messages
+
+def _same(a, b):
+    return all(
+        np.allclose(np.asarray(getattr(a, column), dtype=np.float64), np.asarray(getattr(b, column), dtype=np.float64))
+        for column in TelemetryFrame.__slots__
+    ) and np.allclose(a.stats(), b.stats())
+
+def _rejected(decode, message):
+    try:
+        decode(message)
+    except TelemetryDecodeError:
+        return True
+    return False
+
+def verify_telemetry_codec():
+    """
+    Round-trips a packet through every wire codec (same columns and stats out as went in) and
+    checks that each one rejects empty packets, which would otherwise reach SAINT as an
+    all-padding row.
+    """
+    checks = []
+    frame = _frame(12)
+    for name, message in _messages(frame).items():
+        decoded = CODECS[name]().decode(message)
+        checks.append((f"{name}: round trip of {len(frame)} events", _same(decoded, frame)))
+
+    empty = _frame(0)
+    for name, message in _messages(empty).items():
+        checks.append((f"{name}: empty packet rejected", _rejected(CODECS[name]().decode, message)))
+
+    # Missing batch, empty column form and out-of-range ids on the shared packet path
+    for label, packet in [
+        ("missing telemetry_batch", {}),
+        ("empty columns", {"telemetry_batch": {"context_id": [], "behavior_id": []}}),
+        ("out-of-range context_id", {"telemetry_batch": [{"context_id": -1, "behavior_id": 0}]})
+    ]:
+        checks.append((f"{label} rejected", _rejected(decode_packet, packet)))
+
+    # Binary frames: a cut-off frame and a wrong version are rejected, not misread
+    if msgpack is not None:
+        binary = encode_frame(frame)
+        checks.append(("binary: truncated frame rejected", _rejected(CODECS["binary"]().decode, binary[:-3])))
+        checks.append(("binary: unknown frame version rejected",
+                       _rejected(CODECS["binary"]().decode, binary[:2] + bytes([FRAME_VERSION + 1]) + binary[3:])))
+    checks.append(("json: malformed JSON rejected", _rejected(CODECS["json"]().decode, '{"telemetry_batch": [')))
+
+    if msgpack is None:
+        print("⚠️ msgpack is not installed: only the JSON codec was checked.")
+    return report("Telemetry codecs", checks)
+
+if __name__ == "__main__":
+    main(verify_telemetry_codec)
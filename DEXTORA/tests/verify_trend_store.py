@@ -0,0 +1,87 @@
+import asyncio
+import time
+import numpy as np
+from app.services.trend_store import TrendStore, _INDEX_BYTES_PER_ENTRY
+from tests.checks import main, report
+
+class FakeRedis:
+    """Stands in for the RedisClient DNA methods; `down` makes every call fail."""
+    def __init__(self):
+        self.rows = {}
+        self.ttls = {}
+        self.down = False
+
+    async def get_student_dna(self, student_id, num_labels):
+        if self.down:
+            raise ConnectionError("redis unavailable")
+        row = self.rows.get(student_id)
+        return None if row is None else row.copy()
+
+    async def set_student_dna(self, student_id, dna_row, ttl_seconds):
+        if self.down:
+            raise ConnectionError("redis unavailable")
+        self.rows[student_id] = np.asarray(dna_row, dtype=np.float32).copy()
+        self.ttls[student_id] = ttl_seconds
+
+def row(value):
+    return np.full(40, value, dtype=np.float32)
+
+async def _check_trend_store():
+    checks = []
+    row_bytes = 40 * 4 + 8 + _INDEX_BYTES_PER_ENTRY
+
+    # Memory backend: rows come back as copies
+    store = TrendStore(max_bytes=16 * row_bytes)
+    await store.put("a", row(1))
+    first = await store.get("a")
+    first[:] = 99
+    checks.append(("get returns a copy", float((await store.get("a"))[0]) == 1.0 and await store.get("b") is None))
+
+    # Capacity comes from max_bytes; the least recently used row is evicted
+    store = TrendStore(max_bytes=2 * row_bytes)
+    await store.put("a", row(1))
+    await store.put("b", row(2))
+    await store.get("a")  # "b" is now the least recently used
+    await store.put("c", row(3))
+    checks.append(("LRU eviction at capacity", store.capacity == 2 and await store.get("b") is None
+                   and float((await store.get("a"))[0]) == 1.0 and store.stats()["evictions"] == 1))
+
+    # Overwriting a student already stored takes no new slot
+    await store.put("c", row(4))
+    checks.append(("update in place at capacity", store.stats()["evictions"] == 1
+                   and float((await store.get("a"))[0]) == 1.0 and float((await store.get("c"))[0]) == 4.0))
+    checks.append(("a cap below one row still holds one student", TrendStore(max_bytes=1).capacity == 1))
+
+    # Idle rows expire, and their slot is reused without counting an eviction
+    store = TrendStore(max_bytes=2 * row_bytes, ttl_seconds=0.05)
+    await store.put("a", row(1))
+    time.sleep(0.1)
+    checks.append(("TTL expiry", await store.get("a") is None and store.stats()["students"] == 0))
+    await store.put("b", row(2))
+    await store.put("c", row(3))
+    checks.append(("expired slot reused", store.stats()["evictions"] == 0 and store.stats()["students"] == 2))
+
+    # Redis backend is shared across workers; local memory covers an outage
+    redis = FakeRedis()
+    worker_1 = TrendStore(max_bytes=16 * row_bytes, redis=redis)
+    worker_2 = TrendStore(max_bytes=16 * row_bytes, redis=redis)
+    await worker_1.put("a", row(1))
+    checks.append(("redis row visible to another worker", float((await worker_2.get("a"))[0]) == 1.0))
+    checks.append(("redis rows expire with the store's TTL", redis.ttls["a"] == worker_1.ttl))
+
+    redis.down = True
+    await worker_1.put("a", row(2))
+    fallback = await worker_1.get("a")
+    checks.append(("falls back to local memory when redis fails", fallback is not None and float(fallback[0]) == 2.0
+                   and worker_1.stats()["redis_errors"] == 2))
+    return checks
+
+def verify_trend_store():
+    """
+    Checks the trend store's copy-on-read, byte-capped LRU eviction and TTL expiry, and the
+    Redis backend with its fallback to local memory.
+    """
+    return report("Trend store", asyncio.run(_check_trend_store()))
+
+if __name__ == "__main__":
+    main(verify_trend_store)
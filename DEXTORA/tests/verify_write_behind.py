@@ -0,0 +1,109 @@
+import asyncio
+import numpy as np
+from app.db.write_behind import VectorWriteBehind
+from tests.checks import main, report
+
+class FakePostgres:
+    """
+    Records bulk upserts. `during_save` (a coroutine function) runs inside the next upsert,
+    before it lands or, with `fail_next`, raises.
+    """
+    def __init__(self):
+        self.batches = []
+        self.rows = {}
+        self.fail_next = False
+        self.during_save = None
+        self.saving = asyncio.Event()
+
+    async def save_many(self, vectors):
+        self.saving.set()
+        during_save, self.during_save = self.during_save, None
+        if during_save is not None:
+            await during_save()
+        if self.fail_next:
+            self.fail_next = False
+            raise ConnectionError("database unavailable")
+        self.batches.append(list(vectors))
+        self.rows.update(vectors)
+
+def vec(value):
+    return np.full(128, value, dtype=np.float32)
+
+async def _check_write_behind():
+    checks = []
+
+    # Latest value wins and batches never exceed flush_batch
+    db = FakePostgres()
+    queue = VectorWriteBehind(db.save_many, max_pending=100, flush_batch=2, flush_interval_s=3600)
+    await queue.mark_dirty("s0", vec(0))
+    await queue.mark_dirty("s0", vec(42))
+    for i in range(1, 5):
+        await queue.mark_dirty(f"s{i}", vec(i))
+    await queue.close()
+    written = [s for batch in db.batches for s in batch]
+    checks.append(("one write per student, latest value", sorted(written) == [f"s{i}" for i in range(5)]
+                   and float(db.rows["s0"][0]) == 42.0 and queue.stats()["pending"] == 0))
+    checks.append(("batches <= flush_batch", all(len(b) <= 2 for b in db.batches)))
+
+    # A failed flush requeues its batch without overwriting values that arrived meanwhile
+    db = FakePostgres()
+    queue = VectorWriteBehind(db.save_many, max_pending=100, flush_batch=100, flush_interval_s=3600)
+    await queue.mark_dirty("a", vec(1))
+    await queue.mark_dirty("b", vec(1))
+    db.fail_next = True
+    db.during_save = lambda: queue.mark_dirty("a", vec(2))
+    await queue.flush()
+    checks.append(("failed flush keeps its batch queued", queue.stats()["pending"] == 2 and queue.failed_flushes == 1
+                   and not db.rows))
+    checks.append(("update during a failed upsert kept", float(queue.pending_vector("a")[0]) == 2.0
+                   and float(queue.pending_vector("b")[0]) == 1.0))
+    await queue.close()
+    checks.append(("retry persists both", float(db.rows["a"][0]) == 2.0 and float(db.rows["b"][0]) == 1.0
+                   and queue.stats()["flushed"] == 2))
+
+    # A value updated while its upsert is in flight stays queued and is written right after
+    db = FakePostgres()
+    queue = VectorWriteBehind(db.save_many, max_pending=100, flush_batch=100, flush_interval_s=3600)
+    await queue.mark_dirty("a", vec(1))
+    async def update_a():
+        checks.append(("queued vector readable while its upsert is in flight", float(queue.pending_vector("a")[0]) == 1.0))
+        await queue.mark_dirty("a", vec(2))
+    db.during_save = update_a
+    await queue.flush()
+    checks.append(("update during an upsert is written after it", db.batches == [["a"], ["a"]]
+                   and float(db.rows["a"][0]) == 2.0 and queue.stats()["pending"] == 0))
+    await queue.close()
+
+    # Shutdown while the timer's flush is stuck in a slow upsert: the cancelled batch is
+    # flushed by close() instead of being lost
+    db = FakePostgres()
+    queue = VectorWriteBehind(db.save_many, max_pending=100, flush_batch=2, flush_interval_s=3600)
+    db.during_save = lambda: asyncio.sleep(3600)
+    await queue.mark_dirty("a", vec(1))
+    await queue.mark_dirty("b", vec(2))  # Reaches flush_batch: the timer task starts flushing
+    await asyncio.wait_for(db.saving.wait(), 1)
+    await asyncio.wait_for(queue.close(), 1)
+    checks.append(("close() during a slow flush persists its batch", sorted(db.rows) == ["a", "b"]
+                   and queue.stats()["pending"] == 0 and queue.failed_flushes == 0))
+
+    # The hot path drops new students instead of waiting when the queue is full
+    db = FakePostgres()
+    queue = VectorWriteBehind(db.save_many, max_pending=2, flush_batch=100, flush_interval_s=3600)
+    accepted = [queue.try_mark_dirty(s, vec(1)) for s in ("x", "y", "z")]
+    accepted.append(queue.try_mark_dirty("x", vec(3)))  # Already queued: always updated
+    checks.append(("try_mark_dirty drops when full", accepted == [True, True, False, True]
+                   and queue.stats()["dropped_hot_path_updates"] == 1
+                   and float(queue.pending_vector("x")[0]) == 3.0))
+    await queue.close()
+    return checks
+
+def verify_write_behind():
+    """
+    Drives the write-behind queue against an in-memory stand-in for PostgreSQL: coalescing,
+    batch size, failed and cancelled flushes, updates racing an upsert, and hot-path dropping
+    when full.
+    """
+    return report("Write-behind queue", asyncio.run(_check_write_behind()))
+
+if __name__ == "__main__":
+    main(verify_write_behind)